@@ -0,0 +1,68 @@
+"""Micro-benchmark of the cached ImageDraw context of Editor
+
+Compares the cached draw context with a new ``ImageDraw.Draw`` per call,
+for small shapes (where the context is most of the cost) and for a
+rank card like template made of draw calls only.
+
+    PYTHONPATH=. python benchmarks/draw_context.py
+"""
+import timeit
+
+from PIL import ImageDraw
+
+from easy_pil import Canvas, Editor, Font
+
+
+class UncachedEditor(Editor):
+    def _draw(self) -> ImageDraw.ImageDraw:
+        return ImageDraw.Draw(self.image)
+
+
+poppins = Font.poppins(size=40)
+poppins_small = Font.poppins(size=30)
+
+
+def template(editor_class):
+    editor = editor_class(Canvas((900, 300), color="#23272A"))
+    editor.polygon([(600, 0), (750, 300), (900, 300), (900, 0)], "#2C2F33")
+
+    for i in range(5):
+        editor.rectangle((30, 220), width=650, height=40, fill="#494b4f")
+        editor.rectangle((200, 100 + i), width=350, height=2, fill="#17F3F6")
+        editor.ellipse((30 + i * 10, 30), 10, 10, color="white")
+        editor.arc((700, 50), 100, 100, 0, i * 60, color="white")
+        editor.rounded_bar((800, 50), 60, 60, i * 20, color="#3db374")
+
+    editor.text((200, 40), "Shahriyar#9770", font=poppins, color="white")
+    editor.text((200, 130), "Level : 5", font=poppins_small, color="white")
+
+    return editor
+
+
+def small_shapes(editor):
+    for _ in range(50):
+        editor.rectangle((1, 1), 3, 3, fill="red")
+
+
+def main(number: int = 200):
+    editors = (
+        ("new ImageDraw per call", UncachedEditor),
+        ("cached ImageDraw", Editor),
+    )
+
+    for name, editor_class in editors:
+        editor = editor_class(Canvas((100, 100)))
+        seconds = min(
+            timeit.repeat(lambda: small_shapes(editor), number=number)
+        )
+        print(f"{name:<24} {seconds / number / 50 * 1e6:.2f} us per shape")
+
+    for name, editor_class in editors:
+        seconds = min(
+            timeit.repeat(lambda: template(editor_class), number=number)
+        )
+        print(f"{name:<24} {seconds / number * 1000:.3f} ms per image")
+
+
+if __name__ == "__main__":
+    main()
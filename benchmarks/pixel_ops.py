@@ -0,0 +1,77 @@
+"""Benchmark of the NumPy and Pillow paths of easy_pil.pixel_ops
+
+A per-pixel Python loop over ``getdata()`` is included for the tint as
+the baseline.
+
+    PYTHONPATH=. python benchmarks/pixel_ops.py
+"""
+import timeit
+
+from PIL import Image
+
+from easy_pil import pixel_ops
+
+SIZE = (1000, 400)
+
+
+def python_tint(image, color, amount):
+    pixels = [
+        (
+            int(r + amount * (color[0] - r)),
+            int(g + amount * (color[1] - g)),
+            int(b + amount * (color[2] - b)),
+            a,
+        )
+        for r, g, b, a in image.getdata()
+    ]
+    output = Image.new("RGBA", image.size)
+    output.putdata(pixels)
+    return output
+
+
+def main(number: int = 10):
+    image = pixel_ops.linear_gradient(SIZE, "navy", "gold", 30)
+    operations = {
+        "tint": lambda **kw: pixel_ops.tint(image, "red", 0.3, **kw),
+        "brightness": lambda **kw: pixel_ops.brightness(image, 0.6, **kw),
+        "opacity": lambda **kw: pixel_ops.opacity(image, 0.5, **kw),
+        "duotone": lambda **kw: pixel_ops.duotone(image, "navy", "gold", **kw),
+        "remap_colors": lambda **kw: pixel_ops.remap_colors(
+            image, {(0, 0, 128): "red", (255, 215, 0): "blue"}, **kw
+        ),
+        "channel_mask": lambda **kw: pixel_ops.channel_mask(
+            image, "R", 100, 200, **kw
+        ),
+        "linear_gradient": lambda **kw: pixel_ops.linear_gradient(
+            SIZE, "red", "blue", 30, **kw
+        ),
+        "radial_gradient": lambda **kw: pixel_ops.radial_gradient(
+            SIZE, "red", "blue", **kw
+        ),
+    }
+
+    backends = [("pillow", False)]
+    if pixel_ops.HAS_NUMPY:
+        backends.append(("numpy", True))
+
+    seconds = min(
+        timeit.repeat(
+            lambda: python_tint(image, (255, 0, 0), 0.3), number=1, repeat=3
+        )
+    )
+    print(f"{'tint':<16} {'python loop':<8} {seconds * 1000:8.2f} ms")
+
+    for name, operation in operations.items():
+        for backend, use_numpy in backends:
+            seconds = min(
+                timeit.repeat(
+                    lambda: operation(use_numpy=use_numpy), number=number
+                )
+            )
+            print(
+                f"{name:<16} {backend:<11} {seconds / number * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""Benchmark suite of the editor hot paths and the shipped examples
+
+Every benchmark runs in a fresh process and records per call:
+
+- the wall time (best, median and mean of ``--number`` calls after a
+  warm up call)
+- the growth of the peak resident set size over the calls, in KiB
+- the peak of Python memory allocations and the number of memory
+  blocks still allocated after the call, traced with ``tracemalloc`` in
+  a separate call (pixel buffers allocated by Pillow are not traced)
+
+Results are written as JSON so runs of different releases can be
+compared.
+
+    PYTHONPATH=. python benchmarks/suite.py --output before.json
+    PYTHONPATH=. python benchmarks/suite.py --compare before.json
+    PYTHONPATH=. python benchmarks/suite.py --filter text --number 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import runpy
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import PIL
+from PIL import Image
+
+import easy_pil
+from easy_pil import (
+    AioEditor,
+    Canvas,
+    Editor,
+    Font,
+    GifEditor,
+    RenderExecutor,
+    Text,
+    Workspace,
+)
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+PFP = os.path.join(EXAMPLES, "assets", "pfp.png")
+
+# Name -> setup returning the function called by the benchmark
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    def decorator(setup: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+@contextmanager
+def _in_examples() -> Iterator[None]:
+    # The examples load their assets relative to their directory and show
+    # the result when they are done
+    cwd = os.getcwd()
+    show = Editor.show
+    os.chdir(EXAMPLES)
+    Editor.show = lambda self: None  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        Editor.show = show  # type: ignore[assignment]
+        os.chdir(cwd)
+
+
+def _example(name: str) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        path = os.path.join(EXAMPLES, f"{name}.py")
+
+        def run() -> None:
+            with _in_examples():
+                runpy.run_path(path)
+
+        return run
+
+    return setup
+
+
+for _name in ("rank_card1", "welcome_image1", "owo_level"):
+    benchmark(f"example:{_name}")(_example(_name))
+
+
+@benchmark("paste")
+def _paste():
+    background = Editor(Canvas((900, 300), color="#23272A"))
+    profile = Editor(PFP).resize((150, 150)).circle_image()
+    return lambda: background.paste(profile, (30, 30))
+
+
+@benchmark("circle_image")
+def _circle_image():
+    image = Editor(PFP).resize((150, 150)).image
+    return lambda: Editor(image.copy()).circle_image()
+
+
+@benchmark("bar")
+def _bar():
+    background = Editor(Canvas((900, 300), color="#23272A"))
+    return lambda: background.bar(
+        (30, 220), 650, 40, percentage=23, fill="#3db374", radius=20
+    )
+
+
+@benchmark("text")
+def _text():
+    background = Editor(Canvas((900, 300), color="#23272A"))
+    font = Font.poppins(size=40)
+    return lambda: background.text(
+        (200, 40), "Shahriyar#9770", font=font, color="white"
+    )
+
+
+@benchmark("multi_text")
+def _multi_text():
+    background = Editor(Canvas((900, 300), color="#23272A"))
+    font = Font.poppins(size=30)
+    texts = [
+        Text("Level :", font, "white"),
+        Text("5", font, "#17F3F6"),
+        Text("XP :", font, "white"),
+        Text("1240 / 5000", font, "#17F3F6"),
+    ]
+    return lambda: background.multi_text((450, 150), texts, align="center")
+
+
+@benchmark("resize_crop")
+def _resize_crop():
+    image = Editor(PFP).image
+    return lambda: Editor(image).resize((150, 100), crop=True)
+
+
+@benchmark("image_bytes")
+def _image_bytes():
+    editor = Editor(os.path.join(EXAMPLES, "assets", "wlcbg.jpg"))
+
+    def run() -> BytesIO:
+        # A changed image is encoded again
+        editor.invalidate()
+        return editor.image_bytes
+
+    return run
+
+
+@benchmark("workspace:generate_image")
+def _generate_image():
+    workspace = Workspace((900, 300))
+    workspace.create_layer("background", background="#23272A")
+    workspace.create_layer("content")
+    workspace.add_component(
+        layer_name="background",
+        identifier="shape",
+        func="polygon",
+        options={
+            "coordinates": [(600, 0), (750, 300), (900, 300), (900, 0)],
+            "color": "#2C2F33",
+        },
+    )
+    workspace.add_component(
+        layer_name="content",
+        identifier="name",
+        func="text",
+        options={
+            "position": (200, 40),
+            "text": "Shahriyar#9770",
+            "font": Font.poppins(size=40),
+            "color": "white",
+        },
+    )
+    workspace.add_component(
+        layer_name="content",
+        identifier="bar",
+        func="bar",
+        options={
+            "position": (30, 220),
+            "max_width": 650,
+            "height": 40,
+            "percentage": 23,
+            "fill": "#3db374",
+            "radius": 20,
+        },
+    )
+
+    def run() -> Editor:
+        workspace.invalidate()
+        return workspace.generate_image()
+
+    return run
+
+
+@benchmark("gif_editor:save")
+def _gif_save():
+    frames = []
+    for i in range(12):
+        frame = Image.new("RGB", (200, 150), "navy")
+        frame.paste("yellow", (i * 12, 60, i * 12 + 30, 90))
+        frames.append(frame)
+
+    source = BytesIO()
+    frames[0].save(
+        source, "GIF", save_all=True, append_images=frames[1:], loop=0
+    )
+
+    def run() -> None:
+        gif = GifEditor(BytesIO(source.getvalue()))
+        gif.rectangle((0, 0), 40, 20, color="white")
+        gif.save(BytesIO())
+
+    return run
+
+
+@benchmark("aio_editor:execute")
+def _aio_execute():
+    image = Editor(PFP).resize((150, 150)).image
+    executor = RenderExecutor(2)
+    font = Font.poppins(size=40)
+
+    def run() -> Editor:
+        editor = AioEditor(Canvas((600, 200), color="#23272A"), executor)
+        editor.paste(image, (25, 25))
+        editor.text((200, 40), "Shahriyar#9770", font=font, color="white")
+        editor.bar((200, 120), 350, 30, 60, fill="#3db374", radius=15)
+        return asyncio.run(editor.execute())
+
+    return run
+
+
+def _peak_rss() -> int:
+    # KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_benchmark(name: str, number: int) -> Dict[str, Any]:
+    """Run one benchmark in the current process
+
+    Parameters
+    ----------
+    name : str
+        Name of the benchmark
+    number : int
+        Number of timed calls
+
+    Returns
+    -------
+    Dict[str, Any]
+        Timings in seconds and memory usage of one call
+    """
+    func = BENCHMARKS[name]()
+    func()
+
+    rss = _peak_rss()
+    times = []
+    for _ in range(number):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    rss_growth = _peak_rss() - rss
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(
+        stat.count_diff
+        for stat in after.compare_to(before, "filename")
+        if stat.count_diff > 0
+    )
+
+    return {
+        "number": number,
+        "best": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "peak_rss_growth_kib": rss_growth,
+        "peak_rss_kib": _peak_rss(),
+        "alloc_peak_bytes": peak,
+        "retained_blocks": blocks,
+    }
+
+
+def run_suite(
+    number: int = 20, pattern: Optional[str] = None
+) -> Dict[str, Any]:
+    """Run every benchmark, each in a new process
+
+    Parameters
+    ----------
+    number : int, optional
+        Number of timed calls per benchmark, by default 20
+    pattern : str, optional
+        Only run benchmarks whose name contains it, by default None
+
+    Returns
+    -------
+    Dict[str, Any]
+        Environment and results of the run
+    """
+    results = {}
+    for name in BENCHMARKS:
+        if pattern and pattern not in name:
+            continue
+
+        with ProcessPoolExecutor(1) as pool:
+            results[name] = pool.submit(run_benchmark, name, number).result()
+
+    return {
+        "easy_pil": easy_pil.__version__,
+        "pillow": PIL.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "results": results,
+    }
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    print(f"{'benchmark':<28}{'before':>12}{'after':>12}{'change':>10}")
+
+    for name, result in current["results"].items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+
+        change = result["median"] / before["median"] - 1
+        print(
+            f"{name:<28}{before['median'] * 1e3:>10.3f}ms"
+            f"{result['median'] * 1e3:>10.3f}ms{change:>+10.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--filter", help="only run matching benchmarks")
+    parser.add_argument("--output", help="write the results to a JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    report = run_suite(args.number, args.filter)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    else:
+        for name, result in report["results"].items():
+            print(
+                f"{name:<28}{result['median'] * 1e3:>10.3f} ms"
+                f"{result['alloc_peak_bytes'] / 1024:>10.1f} KiB traced"
+                f"{result['peak_rss_kib'] / 1024:>10.1f} MiB rss"
+            )
+
+
+if __name__ == "__main__":
+    main()
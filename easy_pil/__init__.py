@@ -2,8 +2,19 @@ from ._version import __version__, version_info
 from .aio_editor import AioEditor
 from .canvas import Canvas
 from .editor import Editor
+from .encoding import EncodingProfile, negotiate_profile
+from .executor import (
+    RenderExecutor,
+    get_executor,
+    set_executor,
+    shutdown_executor,
+)
 from .font import Font
 from .gif_editor import GifEditor
+from .gradient import Gradient
+from .lazy_editor import LazyEditor
+from .loader import ImageLoader
+from .template import Template, Var
 from .text import Text
 from .utils import load_image, load_image_async, run_in_executor
 from .workspace import Workspace
@@ -15,10 +26,21 @@ __all__ = [
     "Editor",
     "GifEditor",
     "AioEditor",
+    "LazyEditor",
     "Workspace",
+    "Template",
+    "Var",
+    "ImageLoader",
     "Font",
     "Text",
     "load_image",
     "load_image_async",
     "run_in_executor",
+    "RenderExecutor",
+    "get_executor",
+    "set_executor",
+    "shutdown_executor",
+    "EncodingProfile",
+    "negotiate_profile",
+    "Gradient",
 ]
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
-import asyncio
+from concurrent.futures import Executor
 from dataclasses import dataclass, field
-from functools import partial
 from io import BytesIO
 from pathlib import Path
-from typing import Any, Dict, List, Sequence, Union
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 from PIL.Image import Image
 
+from . import profiling
 from .canvas import Canvas
 from .editor import Editor
+from .executor import RenderExecutor, get_executor
 
 
 @dataclass
@@ -20,11 +21,61 @@ class Instruction:
     kwargs: Dict[str, Any] = field(default_factory=lambda: {})
 
 
+def execute_instructions(
+    image: Union[Image, str, BytesIO, Editor, Canvas, Path],
+    instructions: Sequence[Instruction],
+) -> Editor:
+    """Create an editor and run every instruction on it
+
+    Parameters
+    ----------
+    image : Union[Image, str, BytesIO, Editor, Canvas, Path]
+        Image to edit
+    instructions : Sequence[Instruction]
+        Editor method calls to run in order
+
+    Returns
+    -------
+    Editor
+        The edited editor
+    """
+    editor = Editor(image)
+    for ins in instructions:
+        if not profiling.enabled():
+            getattr(editor, ins.name)(*ins.args, **ins.kwargs)
+            continue
+
+        started = profiling.start()
+        try:
+            getattr(editor, ins.name)(*ins.args, **ins.kwargs)
+        finally:
+            profiling.finish("aio", ins.name, started, editor.image.size)
+
+    return editor
+
+
 class AioEditor:
+    """Records editor calls and runs them in an executor
+
+    Parameters
+    ----------
+    _image : Union[Image, str, BytesIO, Editor, Canvas, Path]
+        Image to edit
+    executor : Union[RenderExecutor, concurrent.futures.Executor], optional
+        Executor to run the instructions in, by default the executor
+        shared by the library (see :func:`easy_pil.set_executor`)
+    """
+
     def __init__(
-        self, _image: Union[Image, str, BytesIO, Editor, Canvas, Path]
+        self,
+        _image: Union[Image, str, BytesIO, Editor, Canvas, Path],
+        executor: Optional[Union[RenderExecutor, Executor]] = None,
     ) -> None:
+        if isinstance(executor, Executor):
+            executor = RenderExecutor(executor=executor)
+
         self.image = _image
+        self.executor: Optional[RenderExecutor] = executor
         self.instructions: List[Instruction] = []
 
     def __getattr__(self, name):
@@ -38,12 +89,15 @@ class AioEditor:
             return handler
         raise AttributeError(f"'{name}' is not available in Editor")
 
-    async def execute(self):
-        editor = Editor(self.image)
-        for ins in self.instructions:
-            func = partial(
-                editor.__getattribute__(ins.name), *ins.args, **ins.kwargs
-            )
-            await asyncio.get_event_loop().run_in_executor(None, func)
+    async def execute(self) -> Editor:
+        """Run the recorded instructions as a single executor job
 
-        return editor
+        Returns
+        -------
+        Editor
+            The edited editor
+        """
+        executor = self.executor or get_executor()
+        return await executor.run(
+            execute_instructions, self.image, list(self.instructions)
+        )
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from io import BytesIO
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+from .editor import Editor
+from .types.workspace import ComponentKwargs
+from .workspace import Workspace
+
+Overrides = Dict[str, ComponentKwargs]
+
+# Template of the worker process, set once per worker by ``_init_worker``
+_template: Optional[Workspace] = None
+
+
+def _init_worker(template: Workspace) -> None:
+    global _template
+    _template = template
+
+
+def _prepare(overrides: Overrides) -> Overrides:
+    prepared = {}
+
+    for identifier, options in overrides.items():
+        image = options.get("image")
+
+        if isinstance(image, bytes):
+            image = BytesIO(image)
+        if isinstance(image, (BytesIO, Path)):
+            options = {**options, "image": Editor(image)}
+
+        prepared[identifier] = options
+
+    return prepared
+
+
+def render_item(
+    template: Workspace,
+    overrides: Overrides,
+    file_format: str = "png",
+    params: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """Render one item of a batch
+
+    Parameters
+    ----------
+    template : Workspace
+        Workspace to render
+    overrides : Dict[str, ComponentKwargs]
+        Component options to replace, keyed by component identifier.
+        ``image`` options can be given as encoded bytes.
+    file_format : str, optional
+        Format to encode the image with, by default "png"
+    params : Dict[str, Any], optional
+        Extra parameters for the encoder, by default None
+
+    Returns
+    -------
+    bytes
+        The encoded image
+    """
+    editor = template.override(_prepare(overrides)).generate_image()
+
+    image = editor.image
+    if file_format.lower() in ("jpeg", "jpg"):
+        image = image.convert("RGB")
+
+    _bytes = BytesIO()
+    image.save(_bytes, file_format, **(params or {}))
+    editor.close()
+
+    return _bytes.getvalue()
+
+
+def _render_in_worker(
+    items: Sequence[Overrides], file_format: str, params: Dict[str, Any]
+) -> List[bytes]:
+    assert _template is not None, "worker was not initialized"
+    return [
+        render_item(_template, overrides, file_format, params)
+        for overrides in items
+    ]
+
+
+def _chunks(items: Iterable[Overrides], size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bounded(
+    submit: Callable[[Any], Future], jobs: Iterable[Any], window: int
+) -> Iterator[Any]:
+    # Results are collected in order with at most ``window`` jobs in
+    # flight, so a slow consumer does not pile up finished images
+    pending: Deque[Future] = deque()
+    try:
+        for job in jobs:
+            pending.append(submit(job))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def iter_render_batch(
+    template: Workspace,
+    items: Sequence[Overrides],
+    file_format: str = "png",
+    *,
+    max_workers: Optional[int] = None,
+    processes: bool = True,
+    chunksize: int = 8,
+    executor: Optional[Executor] = None,
+    window: Optional[int] = None,
+    **params,
+) -> Iterator[bytes]:
+    """Render a workspace once per item, yielding images as they finish
+
+    The template is sent to every worker process once, only the per item
+    overrides travel with each job. Images are yielded in the order of
+    ``items``, and only ``window`` jobs are submitted ahead of the
+    consumer so memory use does not grow with the size of the batch.
+
+    Parameters
+    ----------
+    template : Workspace
+        Workspace to render, it is not modified
+    items : Sequence[Dict[str, ComponentKwargs]]
+        Component options for each image, keyed by component identifier
+    file_format : str, optional
+        Format to encode the images with, by default "png"
+    max_workers : int, optional
+        Number of workers, by default the number of CPUs
+    processes : bool, optional
+        Render in a process pool instead of a thread pool, by default True.
+        The template and overrides must be picklable for process pools.
+    chunksize : int, optional
+        Number of items sent to a worker process at once, by default 8
+    executor : concurrent.futures.Executor, optional
+        Existing executor to render in, by default None. The template is
+        sent with every item in that case.
+    window : int, optional
+        Number of jobs (chunks of items for process pools) kept in
+        flight, by default twice ``max_workers``
+
+    Yields
+    ------
+    bytes
+        The encoded images
+    """
+    window = window or 2 * (max_workers or os.cpu_count() or 4)
+
+    if executor is not None or not processes:
+        pool = executor or ThreadPoolExecutor(
+            max_workers, thread_name_prefix="easy-pil"
+        )
+        try:
+            yield from _bounded(
+                lambda overrides: pool.submit(
+                    render_item, template, overrides, file_format, params
+                ),
+                items,
+                window,
+            )
+        finally:
+            if pool is not executor:
+                pool.shutdown()
+        return
+
+    with ProcessPoolExecutor(
+        max_workers, initializer=_init_worker, initargs=(template,)
+    ) as pool:
+        for images in _bounded(
+            lambda chunk: pool.submit(
+                _render_in_worker, chunk, file_format, params
+            ),
+            _chunks(items, chunksize),
+            window,
+        ):
+            yield from images
+
+
+def render_batch(
+    template: Workspace,
+    items: Sequence[Overrides],
+    file_format: str = "png",
+    **kwargs,
+) -> List[bytes]:
+    """Render a workspace once per item
+
+    Takes the same arguments as :func:`iter_render_batch`.
+
+    Returns
+    -------
+    List[bytes]
+        The encoded images, in the order of ``items``
+    """
+    return list(iter_render_batch(template, items, file_format, **kwargs))
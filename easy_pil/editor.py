@@ -1,29 +1,116 @@
 from __future__ import annotations
 
+import math
+import threading
+from functools import wraps
 from io import BytesIO
 from pathlib import Path
-from typing import List, Literal, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from PIL import Image as PilImage, ImageDraw, ImageFilter, ImageFont
 from PIL.Image import Image
 
+from . import pixel_ops, profiling
 from .canvas import Canvas
+from .encoding import EncodeResult, EncodingProfile, encode_image
 from .font import Font
+from .gradient import ColorStop, Gradient, GradientKind
+from .mask import apply_mask, get_mask
 from .text import Text
+from .text_layout import TextBoxLayout, draw_text, fit_text, text_metrics
 from .types.common import Color
+from .utils import reduce_image
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Editor of the outermost operation running in each thread
+_active = threading.local()
+
+
+def _mutates(method: F) -> F:
+    # Marks the encoded output of the editor as outdated and reports the
+    # operation to the profiling sinks
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self: Editor, *args, **kwargs):
+        outer = getattr(_active, "editor", None)
+        if outer is not None:
+            # Called by another operation, which is counted and reported
+            # once for both
+            if outer is not self:
+                self._revision += 1
+            return method(self, *args, **kwargs)
+
+        self._revision += 1
+        _active.editor = self
+        try:
+            if not profiling.enabled():
+                return method(self, *args, **kwargs)
+
+            started = profiling.start()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                profiling.finish("editor", name, started, self.image.size)
+        finally:
+            _active.editor = None
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _gradient_fill(
+    gradient: Gradient,
+    size: Tuple[int, int],
+    box: Tuple[float, float, float, float],
+    radius: int = 0,
+) -> Image:
+    # The gradient masked by the shape, the mask is drawn with the same
+    # coordinates as a plain color fill so both cover the same pixels
+    mask = PilImage.new("L", size, 0)
+    draw = ImageDraw.Draw(mask)
+    if radius <= 0:
+        draw.rectangle(box, fill=255)
+    else:
+        draw.rounded_rectangle(box, radius=radius, fill=255)
+
+    image = gradient.render(size).copy()
+    apply_mask(image, mask)
+    mask.close()
+
+    return image
 
 
 class Editor:
     """Editor class. It does all the editing operations.
 
+    The pixels can be read with ``numpy.asarray(editor.image)``, which
+    gives a (height, width, 4) copy as Pillow does not share its pixel
+    memory.
+
     Parameters
     ----------
     _image : Union[Image, str, Editor, Canvas]
         Image or Canvas to edit.
+    target_size : Tuple[int, int], optional
+        Size the image will be resized to. Large files and images are
+        decoded at a reduced size close to it, by default None
     """
 
     def __init__(
-        self, _image: Union[Image, str, BytesIO, Editor, Canvas, Path]
+        self,
+        _image: Union[Image, str, BytesIO, Editor, Canvas, Path],
+        target_size: Optional[Tuple[int, int]] = None,
     ) -> None:
         if isinstance(_image, (str, BytesIO, Path)):
             self.image: Image = PilImage.open(_image)
@@ -37,26 +124,94 @@ class Editor:
                 "Editor or Canvas to start with"
             )
 
+        if target_size and not isinstance(_image, (Canvas, Editor)):
+            self.image = reduce_image(self.image, target_size)
+
         self.image = self.image.convert("RGBA")
+        self._draw_context: Optional[ImageDraw.ImageDraw] = None
+        self._revision = 0
+        self._encoded: Optional[
+            Tuple[int, Image, Any, dict, EncodeResult]
+        ] = None
+
+    def _draw(self) -> ImageDraw.ImageDraw:
+        # One draw context is kept for the current image, a new one is
+        # created once an operation replaces the image
+        draw = self._draw_context
+        if draw is None or draw.im is not self.image.im:
+            draw = self._draw_context = ImageDraw.Draw(self.image)
+
+        return draw
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_draw_context"] = None
+        state["_encoded"] = None
+        return state
 
     @property
     def image_bytes(self) -> BytesIO:
         """Return image bytes
 
+        The PNG is encoded once and shared by the returned file objects
+        until the image is changed, see :meth:`encode`.
+
         Returns
         -------
         BytesIO
             Bytes from the image of Editor
         """
+        return self.encode().buffer
+
+    def encode(
+        self, profile: Union[str, EncodingProfile] = "png", **params
+    ) -> EncodeResult:
+        """Encode the image in memory with an encoding profile
+
+        Parameters
+        ----------
+        profile : Union[str, EncodingProfile], optional
+            Name of a profile in ``easy_pil.encoding.PROFILES`` (e.g.
+            ``"png_fast"``, ``"webp"``, ``"jpeg"``) or a profile,
+            by default ``"png"``
+        **params
+            Encoder options that replace the ones of the profile
+
+        The result of the last call is reused until the image is changed
+        by an editor method or replaced. Call :meth:`invalidate` after
+        changing ``image`` in place.
+
+        Returns
+        -------
+        EncodeResult
+            The encoded image in ``data``, with its format, size and
+            encode time
+        """
+        cached = self._encoded
+        if (
+            cached is not None
+            and cached[0] == self._revision
+            and cached[1] is self.image
+            and cached[2] == profile
+            and cached[3] == params
+        ):
+            return cached[4]
+
         _bytes = BytesIO()
-        self.image.save(_bytes, "png")
+        result = encode_image(self.image, _bytes, profile, **params)
+        result.data = _bytes.getvalue()
 
-        _bytes.seek(0)
-        return _bytes
+        self._encoded = (self._revision, self.image, profile, params, result)
+        return result
+
+    def invalidate(self):
+        """Marks the image as changed so it is encoded again"""
+        self._revision += 1
 
     def close(self):
         self.image.close()
 
+    @_mutates
     def resize(self, size: Tuple[int, int], crop=False) -> Editor:
         """Resize image
 
@@ -92,6 +247,7 @@ class Editor:
 
         return self
 
+    @_mutates
     def rounded_corners(self, radius: int = 10, offset: int = 2) -> Editor:
         """Make image rounded corners
 
@@ -102,54 +258,19 @@ class Editor:
         offset : int, optional
             Offset pixel while making rounded, by default 2
         """
-        background = PilImage.new(
-            "RGBA", size=self.image.size, color=(255, 255, 255, 0)
-        )
-        holder = PilImage.new(
-            "RGBA", size=self.image.size, color=(255, 255, 255, 0)
-        )
-        mask = PilImage.new(
-            "RGBA", size=self.image.size, color=(255, 255, 255, 0)
-        )
-        mask_draw = ImageDraw.Draw(mask)
-        mask_draw.rounded_rectangle(
-            (offset, offset)
-            + (self.image.size[0] - offset, self.image.size[1] - offset),
-            radius=radius,
-            fill="black",
-        )
-        holder.paste(self.image, (0, 0))
-        self.image = PilImage.composite(holder, background, mask)
-
-        background.close()
-        holder.close()
-        mask.close()
+        mask = get_mask("rounded_rectangle", self.image.size, radius, offset)
+        apply_mask(self.image, mask)
 
         return self
 
+    @_mutates
     def circle_image(self) -> Editor:
         """Make image circle"""
-        background = PilImage.new(
-            "RGBA", size=self.image.size, color=(255, 255, 255, 0)
-        )
-        holder = PilImage.new(
-            "RGBA", size=self.image.size, color=(255, 255, 255, 0)
-        )
-        mask = PilImage.new(
-            "RGBA", size=self.image.size, color=(255, 255, 255, 0)
-        )
-        mask_draw = ImageDraw.Draw(mask)
-        ellipse_size = tuple(i - 1 for i in self.image.size)
-        mask_draw.ellipse((0, 0) + ellipse_size, fill="black")
-        holder.paste(self.image, (0, 0))
-        self.image = PilImage.composite(holder, background, mask)
-
-        background.close()
-        holder.close()
-        mask.close()
+        apply_mask(self.image, get_mask("ellipse", self.image.size))
 
         return self
 
+    @_mutates
     def rotate(self, deg: float = 0, expand: bool = False) -> Editor:
         """Rotate image
 
@@ -163,6 +284,7 @@ class Editor:
         self.image = self.image.rotate(deg, expand=expand)
         return self
 
+    @_mutates
     def blur(
         self, mode: Literal["box", "gaussian"] = "gaussian", amount: float = 1
     ) -> Editor:
@@ -184,6 +306,71 @@ class Editor:
 
         return self
 
+    @_mutates
+    def tint(self, color: Color, amount: float = 0.5) -> Editor:
+        """Blend the image colors towards a color
+
+        Parameters
+        ----------
+        color : Color
+            Tint color
+        amount : float, optional
+            0 keeps the image, 1 fills it with the color, by default 0.5
+        """
+        self.image = pixel_ops.tint(self.image, color, amount)
+        return self
+
+    @_mutates
+    def brightness(self, factor: float) -> Editor:
+        """Change brightness of the image
+
+        Parameters
+        ----------
+        factor : float
+            0 makes the image black, 1 keeps it
+        """
+        self.image = pixel_ops.brightness(self.image, factor)
+        return self
+
+    @_mutates
+    def opacity(self, factor: float) -> Editor:
+        """Scale the transparency of the image
+
+        Parameters
+        ----------
+        factor : float
+            Multiplier of the alpha channel
+        """
+        self.image = pixel_ops.opacity(self.image, factor)
+        return self
+
+    @_mutates
+    def duotone(self, dark: Color, light: Color) -> Editor:
+        """Map the image between two colors by luminance
+
+        Parameters
+        ----------
+        dark : Color
+            Color of the shadows
+        light : Color
+            Color of the highlights
+        """
+        self.image = pixel_ops.duotone(self.image, dark, light)
+        return self
+
+    @_mutates
+    def remap_colors(self, mapping: Dict[Color, Color]) -> Editor:
+        """Replace exact colors of the image
+
+        Parameters
+        ----------
+        mapping : Dict[Color, Color]
+            New color of every color to replace
+        """
+        self.image = pixel_ops.remap_colors(self.image, mapping)
+        return self
+
+    @_mutates
     def blend(
         self,
         image: Union[Image, Editor, Canvas],
@@ -214,6 +401,7 @@ class Editor:
 
         return self
 
+    @_mutates
     def paste(
         self,
         image: Union[Image, Editor, Canvas],
@@ -228,20 +416,78 @@ class Editor:
         position : Tuple[int, int]
             Position to paste
         """
-        blank = PilImage.new(
-            "RGBA", size=self.image.size, color=(255, 255, 255, 0)
-        )
-
         if isinstance(image, Editor) or isinstance(image, Canvas):
             image = image.image
 
-        blank.paste(image, position)
-        self.image = PilImage.alpha_composite(self.image, blank)
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
 
-        blank.close()
+        # Only the area covered by the pasted image is composited, so the
+        # cost depends on the pasted image instead of the whole canvas.
+        x, y = int(position[0]), int(position[1])
+        left, top = max(x, 0), max(y, 0)
+        right = min(x + image.width, self.image.width)
+        bottom = min(y + image.height, self.image.height)
+
+        if left >= right or top >= bottom:
+            return self
+
+        box = (left, top, right, bottom)
+        if (left - x, top - y, right - x, bottom - y) != (0, 0) + image.size:
+            image = image.crop((left - x, top - y, right - x, bottom - y))
+
+        region = self.image.crop(box)
+        self.image.paste(PilImage.alpha_composite(region, image), box)
+        region.close()
 
         return self
 
+    @_mutates
+    def gradient(
+        self,
+        colors: Union[Gradient, List[Union[Color, ColorStop]]],
+        kind: GradientKind = "linear",
+        angle: float = 0,
+        center: Optional[Tuple[float, float]] = None,
+        radius: Optional[float] = None,
+        position: Tuple[int, int] = (0, 0),
+        size: Optional[Tuple[int, int]] = None,
+    ) -> Editor:
+        """Draw a gradient over the image
+
+        Gradients are rendered without Python loops and cached by their
+        parameters, drawing the same gradient again only composites it.
+
+        Parameters
+        ----------
+        colors : Union[Gradient, List[Union[Color, Tuple[float, Color]]]]
+            A gradient, or colors spread evenly or ``(position, color)``
+            stops with positions between 0 and 1
+        kind : Literal["linear", "radial", "conic"], optional
+            Shape of the gradient, by default "linear"
+        angle : float, optional
+            Direction of linear gradients (0 goes from left to right, 90
+            from top to bottom) or start of conic gradients, in degrees,
+            by default 0
+        center : Tuple[float, float], optional
+            Center of radial and conic gradients, relative to the
+            gradient, by default its center
+        radius : float, optional
+            Radius of radial gradients, by default the distance to the
+            farthest corner
+        position : Tuple[int, int], optional
+            Position of the gradient, by default (0, 0)
+        size : Tuple[int, int], optional
+            Size of the gradient, by default the size of the image
+        """
+        if not isinstance(colors, Gradient):
+            colors = Gradient(colors, kind, angle, center, radius)
+
+        self.paste(colors.render(size or self.image.size), position)
+
+        return self
+
+    @_mutates
     def text(
         self,
         position: Tuple[float, float],
@@ -278,23 +524,102 @@ class Editor:
 
         anchors = {"left": "lt", "center": "mt", "right": "rt"}
 
-        draw = ImageDraw.Draw(self.image)
+        draw = self._draw()
+
+        # Glyph masks are cached, repeated labels are only rasterized once
+        draw_text(
+            draw,
+            position,
+            text,
+            color,
+            font=font,
+            anchor=anchors[align],
+            stroke_width=stroke_width or 0,
+            stroke_fill=stroke_fill if stroke_width else None,
+        )
+
+        return self
 
-        if stroke_width:
-            draw.text(
-                position,
+    @_mutates
+    def text_box(
+        self,
+        box: Tuple[float, float, float, float],
+        text: str,
+        font_path: Union[str, Path],
+        min_size: int = 8,
+        max_size: int = 64,
+        color: Color = "black",
+        align: Literal["left", "center", "right"] = "left",
+        wrap: Literal["none", "greedy", "optimal"] = "greedy",
+        max_lines: Optional[int] = None,
+        ellipsis: Optional[str] = "…",
+        spacing: int = 4,
+        layout: Optional[TextBoxLayout] = None,
+    ) -> TextBoxLayout:
+        """Draw text with the largest font size that fits a box
+
+        Unlike the other methods this returns the layout of the text, so
+        it can be drawn again without fitting it.
+
+        Parameters
+        ----------
+        box : Tuple[float, float, float, float]
+            Left, top, right and bottom of the box
+        text : str
+            Text to draw
+        font_path : Union[str, Path]
+            Path of the font
+        min_size : int, optional
+            Smallest font size, by default 8
+        max_size : int, optional
+            Largest font size, by default 64
+        color : Color, optional
+            Color of the text, by default "black"
+        align : Literal["left", "center", "right"], optional
+            Align lines in the box, by default "left"
+        wrap : Literal["none", "greedy", "optimal"], optional
+            Line breaking, by default "greedy"
+        max_lines : int, optional
+            Maximum number of lines, by default None
+        ellipsis : str, optional
+            Appended to the text when it does not fit at the minimum
+            size, by default "…"
+        spacing : int, optional
+            Space between lines, by default 4
+        layout : TextBoxLayout, optional
+            Layout returned by an earlier call to reuse, by default None
+
+        Returns
+        -------
+        TextBoxLayout
+            Font, size and lines of the text
+        """
+        left, top, right, bottom = box
+
+        if layout is None:
+            layout = fit_text(
                 text,
-                color,
-                font=font,
-                anchor=anchors[align],
-                stroke_width=stroke_width,
-                stroke_fill=stroke_fill,
+                font_path,
+                (right - left, bottom - top),
+                min_size,
+                max_size,
+                wrap,
+                max_lines,
+                ellipsis,
+                spacing,
             )
-        else:
-            draw.text(position, text, color, font=font, anchor=anchors[align])
 
-        return self
+        anchor = {"left": "la", "center": "ma", "right": "ra"}[align]
+        x = {"left": left, "center": (left + right) / 2, "right": right}[align]
+        draw = self._draw()
+
+        for index, line in enumerate(layout.lines):
+            y = top + index * (layout.line_height + layout.spacing)
+            draw_text(draw, (x, y), line, color, layout.font, anchor)
 
+        return layout
+
+    @_mutates
     def multi_text(
         self,
         position: Tuple[float, float],
@@ -315,7 +640,7 @@ class Editor:
         align : Literal["left", "center", "right"], optional
             Align texts, by default "left"
         """
-        draw = ImageDraw.Draw(self.image)
+        draw = self._draw()
 
         if align == "left":
             position = position
@@ -324,7 +649,7 @@ class Editor:
             total_width = 0
 
             for t in texts:
-                total_width += t.font.getlength(t.text)
+                total_width += text_metrics(t.font, t.text).width
 
             position = (int(position[0] - total_width), int(position[1]))
 
@@ -332,7 +657,7 @@ class Editor:
             total_width = 0
 
             for t in texts:
-                total_width += t.font.getlength(t.text)
+                total_width += text_metrics(t.font, t.text).width
 
             position = (int(position[0] - (total_width / 2)), int(position[1]))
 
@@ -342,22 +667,23 @@ class Editor:
             color = text.color
 
             if space_separated:
-                width = font.getlength(sentence + " ")
+                width = text_metrics(font, sentence + " ").width
             else:
-                width = font.getlength(sentence)
+                width = text_metrics(font, sentence).width
 
-            draw.text(position, sentence, color, font=font, anchor="lm")
+            draw_text(draw, position, sentence, color, font=font, anchor="lm")
             position = (int(position[0] + width), int(position[1]))
 
         return self
 
+    @_mutates
     def rectangle(
         self,
         position: Tuple[float, float],
         width: float,
         height: float,
-        fill: Optional[Color] = None,
-        color: Optional[Color] = None,
+        fill: Optional[Union[Color, Gradient]] = None,
+        color: Optional[Union[Color, Gradient]] = None,
         outline: Optional[Color] = None,
         stroke_width: float = 1,
         radius: int = 0,
@@ -372,9 +698,9 @@ class Editor:
             Width of rectangle
         height : float
             Height of rectangle
-        fill : Color, optional
-            Fill color, by default None
-        color : Color, optional
+        fill : Union[Color, Gradient], optional
+            Fill color or gradient, by default None
+        color : Union[Color, Gradient], optional
             Alias of fill, by default None
         outline : Color, optional
             Outline color, by default None
@@ -383,7 +709,7 @@ class Editor:
         radius : int, optional
             Radius of rectangle, by default 0
         """
-        draw = ImageDraw.Draw(self.image)
+        draw = self._draw()
 
         to_width = width + position[0]
         to_height = height + position[1]
@@ -391,6 +717,27 @@ class Editor:
         if color:
             fill = color
 
+        if isinstance(fill, Gradient):
+            left, top = math.floor(position[0]), math.floor(position[1])
+            size = (
+                math.floor(to_width) + 1 - left,
+                math.floor(to_height) + 1 - top,
+            )
+            if size[0] > 0 and size[1] > 0:
+                box = (
+                    position[0] - left,
+                    position[1] - top,
+                    to_width - left,
+                    to_height - top,
+                )
+                image = _gradient_fill(fill, size, box, radius)
+                self.paste(image, (left, top))
+                image.close()
+
+            if outline is None:
+                return self
+            fill = None
+
         if radius <= 0:
             draw.rectangle(
                 position + (to_width, to_height),
@@ -409,14 +756,15 @@ class Editor:
 
         return self
 
+    @_mutates
     def bar(
         self,
         position: Tuple[int, int],
         max_width: Union[int, float],
         height: Union[int, float],
         percentage: int = 1,
-        fill: Optional[Color] = None,
-        color: Optional[Color] = None,
+        fill: Optional[Union[Color, Gradient]] = None,
+        color: Optional[Union[Color, Gradient]] = None,
         outline: Optional[Color] = None,
         stroke_width: float = 1,
         radius: int = 0,
@@ -433,9 +781,9 @@ class Editor:
             Height of the bar
         percentage : int, optional
             Percentage to fill of the bar, by default 1
-        fill : Color, optional
-            Fill color, by default None
-        color : Color, optional
+        fill : Union[Color, Gradient], optional
+            Fill color, or gradient spanning the whole bar, by default None
+        color : Union[Color, Gradient], optional
             Alias of fill, by default None
         outline : Color, optional
             Outline color, by default None
@@ -450,18 +798,21 @@ class Editor:
         if color:
             fill = color
 
-        bg = PilImage.new("RGBA", (int(max_width), int(height)), (0, 0, 0, 0))
-        main = PilImage.new(
-            "RGBA", (int(max_width), int(height)), (0, 0, 0, 0)
-        )
-        mask = PilImage.new("L", (int(max_width), int(height)), 0)
-        main_draw = ImageDraw.Draw(main)
-
         if percentage > 100 or percentage < 0:
             raise ValueError("Percentage must be between 1 and 100")
 
+        size = (int(max_width), int(height))
         bar_width = int((max_width / 100) * percentage)
 
+        if isinstance(fill, Gradient):
+            main = _gradient_fill(
+                fill, size, (0, 0, bar_width, height), radius
+            )
+            fill = None
+        else:
+            main = PilImage.new("RGBA", size, (0, 0, 0, 0))
+        main_draw = ImageDraw.Draw(main)
+
         if radius <= 0:
             main_draw.rectangle(
                 (0, 0) + (bar_width, height),
@@ -478,25 +829,14 @@ class Editor:
                 width=stroke_width,
             )
 
-        mask_draw = ImageDraw.Draw(mask)
-        mask_draw.rounded_rectangle(
-            (0, 0) + (max_width, height),
-            radius=radius,
-            fill=255,
-            outline=255,
-            width=stroke_width,
-        )
-
-        final = PilImage.composite(main, bg, mask)
-        self.paste(final, position)
+        apply_mask(main, get_mask("rounded_rectangle", size, radius))
+        self.paste(main, position)
 
         main.close()
-        final.close()
-        bg.close()
-        mask.close()
 
         return self
 
+    @_mutates
     def rounded_bar(
         self,
         position: Tuple[float, float],
@@ -526,7 +866,7 @@ class Editor:
         stroke_width : float, optional
             Stroke width, by default 1
         """
-        draw = ImageDraw.Draw(self.image)
+        draw = self._draw()
 
         if color:
             fill = color
@@ -544,6 +884,7 @@ class Editor:
 
         return self
 
+    @_mutates
     def ellipse(
         self,
         position: Tuple[float, float],
@@ -573,7 +914,7 @@ class Editor:
         stroke_width : float, optional
             Stroke width, by default 1
         """
-        draw = ImageDraw.Draw(self.image)
+        draw = self._draw()
         to_width = width + position[0]
         to_height = height + position[1]
 
@@ -589,6 +930,7 @@ class Editor:
 
         return self
 
+    @_mutates
     def polygon(
         self,
         coordinates: list,
@@ -612,11 +954,12 @@ class Editor:
         if color:
             fill = color
 
-        draw = ImageDraw.Draw(self.image)
+        draw = self._draw()
         draw.polygon(coordinates, fill=fill, outline=outline)
 
         return self
 
+    @_mutates
     def arc(
         self,
         position: Tuple[float, float],
@@ -649,7 +992,7 @@ class Editor:
         stroke_width : float, optional
             Stroke width, by default 1
         """
-        draw = ImageDraw.Draw(self.image)
+        draw = self._draw()
 
         start = start - 90
         end = rotation - 90
@@ -671,7 +1014,13 @@ class Editor:
         """Show the image."""
         self.image.show()
 
-    def save(self, fp, file_format: Optional[str] = None, **params):
+    def save(
+        self,
+        fp,
+        file_format: Optional[str] = None,
+        profile: Optional[Union[str, EncodingProfile]] = None,
+        **params,
+    ) -> Optional[EncodeResult]:
         """Save the image
 
         Parameters
@@ -680,5 +1029,17 @@ class Editor:
             File path
         file_format : str, optional
             File format, by default None
+        profile : Union[str, EncodingProfile], optional
+            Encoding profile to use instead of ``file_format``,
+            see :meth:`encode`, by default None
+
+        Returns
+        -------
+        Optional[EncodeResult]
+            Format, size and encode time when a profile is used
         """
+        if profile is not None:
+            return encode_image(self.image, fp, profile, **params)
+
         self.image.save(fp, file_format, **params)
+        return None
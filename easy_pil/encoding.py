@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import os
+import time
+import zlib
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Any, Dict, Mapping, Optional, Sequence, Union
+
+from PIL import Image as PilImage
+from PIL.Image import Image
+
+from . import profiling
+
+MIME_TYPES = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+}
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """Named set of encoder options
+
+    Parameters
+    ----------
+    file_format : str
+        Pillow format name, e.g. ``"png"``
+    params : Mapping[str, Any], optional
+        Options passed to ``Image.save``
+    quantize : bool, optional
+        Store images with at most 256 colors as palette images when it
+        does not change any pixel, by default False
+    """
+
+    file_format: str
+    params: Mapping[str, Any] = field(default_factory=dict)
+    quantize: bool = False
+
+    @property
+    def mime_type(self) -> str:
+        return MIME_TYPES.get(
+            self.file_format, f"image/{self.file_format.lower()}"
+        )
+
+
+PROFILES: Dict[str, EncodingProfile] = {
+    # Pillow defaults
+    "png": EncodingProfile("png"),
+    # Run length zlib strategy, fast and small for flat graphics
+    "png_fast": EncodingProfile(
+        "png", {"compress_level": 1, "compress_type": zlib.Z_RLE}
+    ),
+    "png_small": EncodingProfile(
+        "png", {"compress_level": 9, "optimize": True}, quantize=True
+    ),
+    "png_palette": EncodingProfile(
+        "png",
+        {"compress_level": 1, "compress_type": zlib.Z_RLE},
+        quantize=True,
+    ),
+    "webp": EncodingProfile("webp", {"quality": 80, "method": 4}),
+    "webp_fast": EncodingProfile("webp", {"quality": 80, "method": 0}),
+    "webp_lossless": EncodingProfile("webp", {"lossless": True, "method": 1}),
+    "jpeg": EncodingProfile("jpeg", {"quality": 85}),
+}
+
+
+@dataclass
+class EncodeResult:
+    """Format, size and duration of an encoded image
+
+    Attributes
+    ----------
+    file_format : str
+        Format of the image
+    mime_type : str
+        Mime type of the format
+    size : int, optional
+        Number of bytes written, None if the file object can not tell
+    encode_time : float
+        Seconds spent encoding
+    data : bytes, optional
+        The encoded image, when it was encoded to memory
+    """
+
+    file_format: str
+    mime_type: str
+    size: Optional[int]
+    encode_time: float
+    data: Optional[bytes] = None
+
+    def _data(self) -> bytes:
+        if self.data is None:
+            raise ValueError("The image was not encoded to memory")
+
+        return self.data
+
+    @property
+    def buffer(self) -> BytesIO:
+        """A new file object over the encoded image
+
+        The file object shares the memory of :attr:`data` until it is
+        written to.
+        """
+        return BytesIO(self._data())
+
+    def getbuffer(self) -> memoryview:
+        """Read-only view of the encoded image, without copying it"""
+        return memoryview(self._data())
+
+    def write_to(
+        self, target: Union[int, IO[bytes], bytearray, memoryview]
+    ) -> int:
+        """Write the encoded image without an intermediate copy
+
+        Parameters
+        ----------
+        target : Union[int, IO[bytes], bytearray, memoryview]
+            File descriptor, file object or writable buffer that is at
+            least :attr:`size` bytes long
+
+        Returns
+        -------
+        int
+            Number of bytes written
+
+        Raises
+        ------
+        ValueError
+            if the buffer is too small
+        """
+        view = self.getbuffer()
+
+        if isinstance(target, int):
+            written = 0
+            while written < len(view):
+                written += os.write(target, view[written:])
+            return written
+
+        if hasattr(target, "write"):
+            target.write(view)  # type: ignore[union-attr]
+            return len(view)
+
+        buffer = memoryview(target).cast("B")  # type: ignore[arg-type]
+        if len(buffer) < len(view):
+            raise ValueError(
+                f"Buffer of {len(buffer)} bytes is smaller than the "
+                f"{len(view)} bytes of the image"
+            )
+
+        buffer[: len(view)] = view
+        return len(view)
+
+
+def get_profile(profile: Union[str, EncodingProfile]) -> EncodingProfile:
+    """Get an encoding profile by name
+
+    Parameters
+    ----------
+    profile : Union[str, EncodingProfile]
+        Name of a profile in ``PROFILES`` or a profile
+
+    Returns
+    -------
+    EncodingProfile
+        The profile
+
+    Raises
+    ------
+    ValueError
+        if there is no profile with that name
+    """
+    if isinstance(profile, EncodingProfile):
+        return profile
+
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown encoding profile {profile!r}")
+
+
+def negotiate_profile(
+    accept: Optional[str], profiles: Sequence[str] = ("webp", "png")
+) -> str:
+    """Pick the first profile with a format accepted by the client
+
+    Parameters
+    ----------
+    accept : str, optional
+        Value of an HTTP ``Accept`` header
+    profiles : Sequence[str], optional
+        Profile names in order of preference, by default
+        ``("webp", "png")``
+
+    Returns
+    -------
+    str
+        Name of the profile, the last one if none is accepted
+    """
+    accepted: Dict[str, float] = {}
+
+    for item in (accept or "").split(","):
+        mime_type, *options = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for option in options:
+            if option.startswith("q="):
+                try:
+                    quality = float(option[2:])
+                except ValueError:
+                    quality = 0
+        if mime_type:
+            accepted[mime_type.lower()] = quality
+
+    for name in profiles:
+        mime_type = get_profile(name).mime_type
+        for candidate in (mime_type, "image/*", "*/*"):
+            if candidate in accepted:
+                if accepted[candidate] > 0:
+                    return name
+                break
+
+    return profiles[-1]
+
+
+def _palette_image(image: Image) -> Image:
+    colors = image.getcolors(256)
+    if colors is None:
+        return image
+
+    method = (
+        PilImage.Quantize.FASTOCTREE
+        if image.mode == "RGBA"
+        else PilImage.Quantize.MEDIANCUT
+    )
+    palette = image.quantize(len(colors), method=method)
+    if palette.convert(image.mode).tobytes() != image.tobytes():
+        return image
+
+    return palette
+
+
+def encode_image(
+    image: Image,
+    fp: Union[str, Path, IO[bytes]],
+    profile: Union[str, EncodingProfile] = "png",
+    **params,
+) -> EncodeResult:
+    """Encode an image with an encoding profile
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        Image to encode
+    fp : Union[str, Path, IO[bytes]]
+        File path or file object to write to
+    profile : Union[str, EncodingProfile], optional
+        Profile name or profile, by default ``"png"``
+    **params
+        Options that replace the ones of the profile
+
+    Returns
+    -------
+    EncodeResult
+        Format, size and duration of the encoding
+    """
+    profile = get_profile(profile)
+    options = {**profile.params, **params}
+    started = profiling.start() if profiling.enabled() else None
+    start = time.perf_counter()
+
+    try:
+        if profile.quantize:
+            image = _palette_image(image)
+
+        if profile.file_format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        if isinstance(fp, (str, Path)):
+            with open(fp, "wb") as f:
+                image.save(f, profile.file_format, **options)
+                size: Optional[int] = f.tell()
+        else:
+            try:
+                position = fp.tell()
+            except (AttributeError, OSError):
+                position = None
+
+            image.save(fp, profile.file_format, **options)
+            size = fp.tell() - position if position is not None else None
+    finally:
+        if started is not None:
+            profiling.finish(
+                "encode", profile.file_format, started, image.size
+            )
+
+    return EncodeResult(
+        profile.file_format,
+        profile.mime_type,
+        size,
+        time.perf_counter() - start,
+    )
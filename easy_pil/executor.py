@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+from weakref import WeakKeyDictionary
+
+T = TypeVar("T")
+
+
+class RenderExecutor:
+    """Executor used to run blocking editor work from async code
+
+    It owns a thread or process pool that is created on first use and
+    limits how many jobs can be waiting on it at the same time, so bursts
+    of renders queue up in the event loop instead of flooding the pool.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of workers in the pool, by default the number of CPUs
+        (plus four for threads)
+    processes : bool, optional
+        Use a process pool instead of a thread pool, by default False.
+        Everything submitted to a process pool must be picklable.
+    max_pending : int, optional
+        Maximum number of jobs submitted at once, by default twice the
+        number of workers
+    executor : concurrent.futures.Executor, optional
+        Use an existing executor instead of creating one, by default None.
+        Executors passed in are not shut down by :meth:`shutdown`.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        processes: bool = False,
+        max_pending: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        cpus = os.cpu_count() or 1
+
+        if not max_workers:
+            max_workers = cpus if processes else min(32, cpus + 4)
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+        self.processes = processes
+
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._lock = threading.Lock()
+        self._semaphores: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = WeakKeyDictionary()
+
+    @property
+    def executor(self) -> Executor:
+        """The underlying executor, created on first access"""
+        with self._lock:
+            if self._executor is None:
+                if self.processes:
+                    self._executor = ProcessPoolExecutor(self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="easy-pil"
+                    )
+
+            return self._executor
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_pending)
+            self._semaphores[loop] = semaphore
+
+        return semaphore
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run a function in the executor and wait for the result
+
+        Parameters
+        ----------
+        func : Callable
+            Function to run, it must be picklable for process pools
+        """
+        loop = asyncio.get_running_loop()
+
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(
+                self.executor, partial(func, *args, **kwargs)
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the pool if it is owned by this executor
+
+        The pool is created again if the executor is used afterwards.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Wait for running jobs to finish, by default True
+        """
+        if not self._owns_executor:
+            return
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __enter__(self) -> RenderExecutor:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+
+    async def __aenter__(self) -> RenderExecutor:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        # Waiting for the pool would block the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.shutdown)
+
+
+_default_executor: Optional[RenderExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_executor() -> RenderExecutor:
+    """Get the executor shared by the library
+
+    Returns
+    -------
+    RenderExecutor
+        The shared executor, a thread pool unless replaced with
+        :func:`set_executor`
+    """
+    global _default_executor
+
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = RenderExecutor()
+
+        return _default_executor
+
+
+def set_executor(
+    executor: Optional[RenderExecutor], shutdown: bool = True
+) -> None:
+    """Replace the executor shared by the library
+
+    Parameters
+    ----------
+    executor : RenderExecutor, optional
+        New shared executor, ``None`` to go back to the default one
+    shutdown : bool, optional
+        Shut down the previous executor, by default True
+    """
+    global _default_executor
+
+    with _default_lock:
+        previous, _default_executor = _default_executor, executor
+
+    if shutdown and previous is not None and previous is not executor:
+        previous.shutdown()
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shut down the executor shared by the library
+
+    Parameters
+    ----------
+    wait : bool, optional
+        Wait for running jobs to finish, by default True
+    """
+    with _default_lock:
+        executor = _default_executor
+
+    if executor is not None:
+        executor.shutdown(wait=wait)
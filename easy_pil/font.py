@@ -1,111 +1,284 @@
-import os
-from functools import lru_cache
-
-from PIL import ImageFont
-from typing_extensions import Literal
-
-fonts_directory = os.path.join(os.path.dirname(__file__), "fonts")
-
-
-fonts_path = {
-    "caveat": {
-        "regular": os.path.join(fonts_directory, "caveat", "caveat.ttf"),
-        "bold": os.path.join(fonts_directory, "caveat", "caveat.ttf"),
-        "italic": os.path.join(fonts_directory, "caveat", "caveat.ttf"),
-        "light": os.path.join(fonts_directory, "caveat", "caveat.ttf"),
-    },
-    "montserrat": {
-        "regular": os.path.join(
-            fonts_directory, "montserrat", "montserrat_regular.ttf"
-        ),
-        "bold": os.path.join(
-            fonts_directory, "montserrat", "montserrat_bold.ttf"
-        ),
-        "italic": os.path.join(
-            fonts_directory, "montserrat", "montserrat_italic.ttf"
-        ),
-        "light": os.path.join(
-            fonts_directory, "montserrat", "montserrat_light.ttf"
-        ),
-    },
-    "poppins": {
-        "regular": os.path.join(
-            fonts_directory, "poppins", "poppins_regular.ttf"
-        ),
-        "bold": os.path.join(fonts_directory, "poppins", "poppins_bold.ttf"),
-        "italic": os.path.join(
-            fonts_directory, "poppins", "poppins_italic.ttf"
-        ),
-        "light": os.path.join(fonts_directory, "poppins", "poppins_light.ttf"),
-    },
-}
-
-
-class Font:
-    """Font class
-
-    Parameters
-    ----------
-    path : str
-        Path of font
-    size : int, optional
-        Size of font, by default 10
-    """
-
-    def __init__(self, path: str, size: int = 10, **kwargs) -> None:
-        self.font = ImageFont.truetype(path, size=size, **kwargs)
-
-    def getsize(self, text: str):
-        bbox = self.font.getbbox(text)
-        return bbox[2], bbox[3]
-
-    @staticmethod
-    @lru_cache(32)
-    def poppins(
-        variant: Literal["regular", "bold", "italic", "light"] = "regular",
-        size: int = 10,
-    ):
-        """Poppins font
-
-        Parameters
-        ----------
-        variant : Literal["regular", "bold", "italic", "light"], optional
-            Font variant, by default "regular"
-        size : int, optional
-            Font size, by default 10
-        """
-        return ImageFont.truetype(fonts_path["poppins"][variant], size=size)
-
-    @staticmethod
-    @lru_cache(32)
-    def caveat(
-        variant: Literal["regular", "bold", "italic", "light"] = "regular",
-        size: int = 10,
-    ):
-        """Caveat font
-
-        Parameters
-        ----------
-        variant : Literal["regular", "bold", "italic", "light"], optional
-            Font variant, by default "regular"
-        size : int, optional
-            Font size, by default 10
-        """
-        return ImageFont.truetype(fonts_path["caveat"][variant], size=size)
-
-    @staticmethod
-    @lru_cache(32)
-    def montserrat(
-        variant: Literal["regular", "bold", "italic", "light"] = "regular",
-        size: int = 10,
-    ):
-        """Montserrat font
-
-        Parameters
-        ----------
-        variant : Literal["regular", "bold", "italic", "light"], optional
-            Font variant, by default "regular"
-        size : int, optional
-            Font size, by default 10
-        """
-        return ImageFont.truetype(fonts_path["montserrat"][variant], size=size)
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import BinaryIO, Dict, Optional, Sequence, Tuple, Union
+
+from PIL import ImageFont
+from typing_extensions import Literal
+
+fonts_directory = os.path.join(os.path.dirname(__file__), "fonts")
+
+
+fonts_path = {
+    "caveat": {
+        "regular": os.path.join(fonts_directory, "caveat", "caveat.ttf"),
+        "bold": os.path.join(fonts_directory, "caveat", "caveat.ttf"),
+        "italic": os.path.join(fonts_directory, "caveat", "caveat.ttf"),
+        "light": os.path.join(fonts_directory, "caveat", "caveat.ttf"),
+    },
+    "montserrat": {
+        "regular": os.path.join(
+            fonts_directory, "montserrat", "montserrat_regular.ttf"
+        ),
+        "bold": os.path.join(
+            fonts_directory, "montserrat", "montserrat_bold.ttf"
+        ),
+        "italic": os.path.join(
+            fonts_directory, "montserrat", "montserrat_italic.ttf"
+        ),
+        "light": os.path.join(
+            fonts_directory, "montserrat", "montserrat_light.ttf"
+        ),
+    },
+    "poppins": {
+        "regular": os.path.join(
+            fonts_directory, "poppins", "poppins_regular.ttf"
+        ),
+        "bold": os.path.join(fonts_directory, "poppins", "poppins_bold.ttf"),
+        "italic": os.path.join(
+            fonts_directory, "poppins", "poppins_italic.ttf"
+        ),
+        "light": os.path.join(fonts_directory, "poppins", "poppins_light.ttf"),
+    },
+}
+
+FontVariation = Union[str, bytes, Sequence[float]]
+FontKey = Tuple[str, float, int, str, Optional[int], Optional[tuple]]
+FontSource = Union[str, os.PathLike, BinaryIO]
+
+
+def _set_variation(
+    font: ImageFont.FreeTypeFont, variation: Optional[FontVariation]
+) -> None:
+    if isinstance(variation, (str, bytes)):
+        font.set_variation_by_name(variation)
+    elif variation is not None:
+        font.set_variation_by_axes(list(variation))
+
+
+class FontRegistry:
+    """Process wide least recently used cache of fonts
+
+    Font files are read once and shared by every size of the font,
+    fonts are keyed by ``(path, size, index, encoding, layout_engine,
+    variation)``. A font file is kept while a cached font uses it, so the
+    files are bounded by ``maxsize`` too. Every :class:`Font` goes through
+    the shared registry. Fonts handed out are shared and must not be
+    changed.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of fonts to keep, by default 256
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._fonts: OrderedDict[
+            FontKey, ImageFont.FreeTypeFont
+        ] = OrderedDict()
+        self._files: Dict[str, bytes] = {}
+        # Number of cached fonts using each file
+        self._users: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fonts)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the loaded font files in bytes"""
+        return sum(len(data) for data in self._files.values())
+
+    def _file(self, path: str) -> bytes:
+        data = self._files.get(path)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+
+        return data
+
+    def _add(
+        self, key: FontKey, font: ImageFont.FreeTypeFont, data: bytes
+    ) -> None:
+        # Called with the lock held
+        path = key[0]
+        self._fonts[key] = font
+        self._files.setdefault(path, data)
+        self._users[path] = self._users.get(path, 0) + 1
+
+        while len(self._fonts) > self.maxsize:
+            evicted, _ = self._fonts.popitem(last=False)
+            path = evicted[0]
+            self._users[path] -= 1
+            if not self._users[path]:
+                del self._users[path]
+                del self._files[path]
+
+    def get(
+        self,
+        path: FontSource,
+        size: float = 10,
+        index: int = 0,
+        encoding: str = "",
+        layout_engine: Optional[int] = None,
+        variation: Optional[FontVariation] = None,
+        cache: bool = True,
+    ) -> ImageFont.FreeTypeFont:
+        """Get a font, loading it if it is not cached yet
+
+        Parameters
+        ----------
+        path : Union[str, os.PathLike, BinaryIO]
+            Path of the font file, file objects are loaded every time
+        size : float, optional
+            Size of the font, by default 10
+        index : int, optional
+            Font face to load from collections, by default 0
+        encoding : str, optional
+            Font encoding, by default ""
+        layout_engine : int, optional
+            ``ImageFont.Layout`` to use, by default the best available
+        variation : Union[str, bytes, Sequence[float]], optional
+            Named style or axis values of variable fonts, by default None
+        cache : bool, optional
+            Keep a newly loaded font in the registry, by default True.
+            Fonts only used once, like sizes tried while fitting a text,
+            are loaded with False so they do not evict the others.
+
+        Returns
+        -------
+        ImageFont.FreeTypeFont
+            The shared font
+        """
+        if not isinstance(path, (str, os.PathLike)):
+            font = ImageFont.truetype(
+                path, size, index, encoding, layout_engine
+            )
+            _set_variation(font, variation)
+            return font
+
+        path = os.path.abspath(os.fspath(path))
+        if isinstance(variation, (str, bytes)) or variation is None:
+            variant: Optional[tuple] = (variation,) if variation else None
+        else:
+            variant = tuple(variation)
+        key = (path, size, index, encoding, layout_engine, variant)
+
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+
+            self.misses += 1
+            data = self._file(path)
+
+        # The faces share the bytes of the file, BytesIO does not copy them
+        font = ImageFont.FreeTypeFont(
+            BytesIO(data), size, index, encoding, layout_engine
+        )
+        # Pickled and varied copies load the file from its path like fonts
+        # made by ImageFont.truetype
+        font.path = path
+        _set_variation(font, variation)
+
+        if not cache:
+            return font
+
+        with self._lock:
+            cached = self._fonts.get(key)
+            if cached is not None:
+                self._fonts.move_to_end(key)
+                return cached
+
+            self._add(key, font, data)
+
+        return font
+
+    def clear(self) -> None:
+        """Remove every cached font and font file"""
+        with self._lock:
+            self._fonts.clear()
+            self._files.clear()
+            self._users.clear()
+
+
+font_registry = FontRegistry()
+
+
+class Font:
+    """Font class
+
+    Parameters
+    ----------
+    path : Union[str, os.PathLike, BinaryIO]
+        Path or file object of font
+    size : int, optional
+        Size of font, by default 10
+    **kwargs
+        ``index``, ``encoding``, ``layout_engine`` and ``variation``,
+        see :meth:`FontRegistry.get`
+    """
+
+    def __init__(self, path: FontSource, size: int = 10, **kwargs) -> None:
+        self.font = font_registry.get(path, size, **kwargs)
+
+    def getsize(self, text: str):
+        bbox = self.font.getbbox(text)
+        return bbox[2], bbox[3]
+
+    @staticmethod
+    def poppins(
+        variant: Literal["regular", "bold", "italic", "light"] = "regular",
+        size: int = 10,
+    ):
+        """Poppins font
+
+        Parameters
+        ----------
+        variant : Literal["regular", "bold", "italic", "light"], optional
+            Font variant, by default "regular"
+        size : int, optional
+            Font size, by default 10
+        """
+        return font_registry.get(fonts_path["poppins"][variant], size)
+
+    @staticmethod
+    def caveat(
+        variant: Literal["regular", "bold", "italic", "light"] = "regular",
+        size: int = 10,
+    ):
+        """Caveat font
+
+        Parameters
+        ----------
+        variant : Literal["regular", "bold", "italic", "light"], optional
+            Font variant, by default "regular"
+        size : int, optional
+            Font size, by default 10
+        """
+        return font_registry.get(fonts_path["caveat"][variant], size)
+
+    @staticmethod
+    def montserrat(
+        variant: Literal["regular", "bold", "italic", "light"] = "regular",
+        size: int = 10,
+    ):
+        """Montserrat font
+
+        Parameters
+        ----------
+        variant : Literal["regular", "bold", "italic", "light"], optional
+            Font variant, by default "regular"
+        size : int, optional
+            Font size, by default 10
+        """
+        return font_registry.get(fonts_path["montserrat"][variant], size)
@@ -1,35 +1,361 @@
 from __future__ import annotations
 
+import os
+from collections import deque
+from concurrent.futures import Executor, Future
 from io import BytesIO
+from itertools import islice
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import (
+    Callable,
+    Deque,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from weakref import WeakKeyDictionary
 
 from PIL import Image as PilImage, ImageSequence
 from PIL.GifImagePlugin import GifImageFile
+from PIL.Image import Image
 
+from .aio_editor import Instruction
 from .editor import Editor
+from .executor import RenderExecutor
+from .gif_encoder import GifEncoder, build_palette
+
+T = TypeVar("T")
+
+# Frames decoded to build a shared palette in stream mode
+PALETTE_SAMPLES = 8
+
+# Options of the built-in encoder, any other option is passed to Pillow
+_ENCODER_OPTIONS = {
+    "palette",
+    "optimize",
+    "colors",
+    "loop",
+    "duration",
+    "disposal",
+}
+
+
+def _frame_option(options: dict, name: str, index: int, default):
+    value = options.get(name, default)
+    if isinstance(value, (list, tuple)):
+        return value[index]
+
+    return value
+
+
+def apply_operations(
+    images: Sequence[Image], operations: Sequence[Instruction]
+) -> List[Image]:
+    """Run editor operations on a chunk of frames
+
+    Parameters
+    ----------
+    images : Sequence[PIL.Image.Image]
+        Frames to edit
+    operations : Sequence[Instruction]
+        Editor method calls to run on every frame
+
+    Returns
+    -------
+    List[PIL.Image.Image]
+        The edited frames, in the same order
+    """
+    edited = []
+    for image in images:
+        editor = Editor(image)
+        for ins in operations:
+            getattr(editor, ins.name)(*ins.args, **ins.kwargs)
+
+        edited.append(editor.image)
+
+    return edited
+
+
+class GifFrame:
+    """A frame of a gif with its timing
+
+    Parameters
+    ----------
+    editor : Editor
+        Editor of the frame
+    duration : float, optional
+        Display time of the frame in milliseconds
+    disposal : int
+        GIF disposal method of the frame
+    """
+
+    def __init__(
+        self, editor: Editor, duration: Optional[float], disposal: int
+    ) -> None:
+        self.editor = editor
+        self.duration = duration
+        self.disposal = disposal
 
 
 class GifEditor:
-    def __init__(self, image: Union[str, BytesIO, Path, GifImageFile]):
+    """Editor for animated gifs
+
+    Editor methods called on a ``GifEditor`` are recorded and applied to
+    every frame the next time the frames are used.
+
+    Parameters
+    ----------
+    image : Union[str, BytesIO, Path, GifImageFile]
+        Gif to edit
+    stream : bool, optional
+        Do not load the frames up front, by default False. Operations are
+        applied to each frame while it is decoded and encoded by
+        :meth:`save` or :attr:`image_bytes`, so only one frame (or one
+        chunk per worker with an executor) is kept in memory at a time.
+        ``frames`` is not available in this mode.
+    executor : Union[RenderExecutor, concurrent.futures.Executor], optional
+        Pool to apply the operations in, by default None (in the calling
+        thread). Process pools need picklable operation arguments.
+    chunksize : int, optional
+        Number of frames sent to the executor per job, by default 8
+    window : int, optional
+        Number of jobs kept in flight in stream mode, by default the
+        ``max_workers`` of a :class:`RenderExecutor`, otherwise the
+        number of CPUs
+    """
+
+    def __init__(
+        self,
+        image: Union[str, BytesIO, Path, GifImageFile],
+        stream: bool = False,
+        executor: Optional[Union[RenderExecutor, Executor]] = None,
+        chunksize: int = 8,
+        window: Optional[int] = None,
+    ):
         if isinstance(image, (str, BytesIO, Path)):
             self.image = PilImage.open(image)
         if isinstance(image, GifImageFile):
             self.image = image
 
-        self.original_frames = ImageSequence.Iterator(self.image)
-        self.frames: List[Editor] = list(
-            map(lambda x: Editor(x), self.original_frames)
-        )
+        if isinstance(executor, RenderExecutor):
+            window = window or executor.max_workers
+            executor = executor.executor
+
+        self.stream = stream
+        self.executor: Optional[Executor] = executor
+        self.chunksize = chunksize
+        self.window = window or os.cpu_count() or 4
         self.size: Tuple[int, int] = self.image.size
+        self.loop: Optional[int] = self.image.info.get("loop")
+        self.operations: List[Instruction] = []
+
+        # Duration and disposal of the loaded frames
+        self._timing: WeakKeyDictionary[
+            Editor, Tuple[Optional[float], int]
+        ] = WeakKeyDictionary()
+        self._frames: List[Editor] = []
+
+        if not stream:
+            for frame in self.__read_frames():
+                self._timing[frame.editor] = (frame.duration, frame.disposal)
+                self._frames.append(frame.editor)
+
+    @property
+    def frames(self) -> List[Editor]:
+        """Editors of the frames, with every recorded operation applied
+
+        This is the list of frames used by :meth:`save`, frames can be
+        replaced, added and removed. Frames that were not loaded from the
+        gif have no duration and the default disposal.
+        """
+        if self.stream:
+            raise AttributeError("frames are not available in stream mode")
+
+        self.__flush()
+        return self._frames
+
+    @frames.setter
+    def frames(self, frames: List[Editor]) -> None:
+        if self.stream:
+            raise AttributeError("frames are not available in stream mode")
+
+        self.__flush()
+        self._frames = frames
+
+    def __read_frames(self) -> Iterator[GifFrame]:
+        for frame in ImageSequence.Iterator(self.image):
+            yield GifFrame(
+                Editor(frame),
+                frame.info.get("duration"),
+                getattr(frame, "disposal_method", 0),
+            )
 
     def __getattr__(self, name):
+        if not hasattr(Editor, name):
+            raise AttributeError(f"'{name}' is not available in Editor")
+
         def wrapper(*args, **kwargs):
-            for frame in self.frames:
-                getattr(frame, name)(*args, **kwargs)
+            self.operations.append(Instruction(name, args, kwargs))
 
         return wrapper
 
+    def __chunks(self, items: Iterator[T]) -> Iterator[List[T]]:
+        while True:
+            chunk = list(islice(items, self.chunksize))
+            if not chunk:
+                return
+            yield chunk
+
+    def __submit(self, editors: List[Editor]) -> Future:
+        assert self.executor is not None
+        images = [editor.image for editor in editors]
+        return self.executor.submit(apply_operations, images, self.operations)
+
+    def __apply(self, editors: List[Editor]) -> None:
+        if not self.operations:
+            return
+
+        if self.executor is None:
+            for editor in editors:
+                for ins in self.operations:
+                    getattr(editor, ins.name)(*ins.args, **ins.kwargs)
+            return
+
+        futures = [(c, self.__submit(c)) for c in self.__chunks(iter(editors))]
+        for chunk, future in futures:
+            for editor, image in zip(chunk, future.result()):
+                editor.image = image
+
+    def __flush(self) -> None:
+        self.__apply(self._frames)
+        self.operations = []
+
+    def iter_frames(self) -> Iterator[GifFrame]:
+        """Iterate over the edited frames
+
+        In stream mode frames are decoded and edited one at a time.
+
+        Yields
+        ------
+        GifFrame
+            The frames of the gif
+        """
+        if not self.stream:
+            self.__flush()
+            for editor in self._frames:
+                yield GifFrame(editor, *self._timing.get(editor, (None, 0)))
+            return
+
+        self.image.seek(0)
+        frames = self.__read_frames()
+
+        if self.executor is None or not self.operations:
+            for frame in frames:
+                self.__apply([frame.editor])
+                yield frame
+            return
+
+        # Keep a few chunks in flight so workers stay busy while the
+        # finished frames are encoded in order
+        pending: Deque[Tuple[List[GifFrame], Future]] = deque()
+
+        for chunk in self.__chunks(frames):
+            editors = [frame.editor for frame in chunk]
+            pending.append((chunk, self.__submit(editors)))
+
+            if len(pending) > self.window:
+                yield from self.__collect(*pending.popleft())
+
+        while pending:
+            yield from self.__collect(*pending.popleft())
+
+    def __collect(
+        self, chunk: List[GifFrame], future: Future
+    ) -> Iterator[GifFrame]:
+        for frame, image in zip(chunk, future.result()):
+            frame.editor.image = image
+            yield frame
+
+    def __sample(self, count: int) -> List[Image]:
+        # Evenly spaced frames with the recorded operations applied
+        total = getattr(self.image, "n_frames", 1)
+        images = []
+        for index in sorted({i * total // count for i in range(count)}):
+            self.image.seek(index)
+            images.append(Editor(self.image).image)
+
+        return apply_operations(images, self.operations)
+
+    def __save_with_pillow(self, fp, **kwargs):
+        for option in ("palette", "colors"):
+            if option in kwargs:
+                raise TypeError(
+                    f"'{option}' can not be used with the Pillow options "
+                    f"{sorted(set(kwargs) - _ENCODER_OPTIONS)}"
+                )
+
+        frames = list(self.iter_frames())
+        images = [f.editor.image for f in frames]
+
+        options = {"disposal": [f.disposal for f in frames]}
+        if self.loop is not None:
+            options["loop"] = self.loop
+        if all(f.duration is not None for f in frames):
+            options["duration"] = [f.duration for f in frames]
+        options.update(kwargs)
+
+        images[0].save(
+            fp, "GIF", save_all=True, append_images=images[1:], **options
+        )
+
+    def __encode(
+        self,
+        fp,
+        palette: str = "adaptive",
+        optimize: bool = True,
+        colors: int = 256,
+        **kwargs,
+    ):
+        if palette not in ("adaptive", "shared"):
+            raise ValueError("palette must be 'adaptive' or 'shared'")
+
+        shared: Optional[Image] = None
+        if palette == "shared":
+            if self.stream:
+                images = self.__sample(PALETTE_SAMPLES)
+            else:
+                images = [f.image for f in self.frames]
+            shared = build_palette(images, colors)
+
+        with GifEncoder(
+            fp,
+            loop=kwargs.get("loop", self.loop),
+            palette=shared,
+            optimize=optimize,
+            colors=colors,
+        ) as gif:
+            for i, frame in enumerate(self.iter_frames()):
+                gif.add_frame(
+                    frame.editor.image,
+                    _frame_option(kwargs, "duration", i, frame.duration),
+                    _frame_option(kwargs, "disposal", i, frame.disposal),
+                )
+
+    def __encoder(self, options: dict) -> Callable[..., None]:
+        # Pillow's writer is used unless the built-in encoder is needed
+        # to stream the frames or was asked for
+        if set(options) - _ENCODER_OPTIONS:
+            return self.__save_with_pillow
+
+        if self.stream or "palette" in options or "colors" in options:
+            return self.__encode
+
+        return self.__save_with_pillow
+
     @property
     def image_bytes(self) -> BytesIO:
         """Return image bytes
@@ -40,8 +366,7 @@ class GifEditor:
             Bytes from the image of Editor
         """
         _bytes = BytesIO()
-        images = list(map(lambda e: e.image, self.frames))
-        images[0].save(_bytes, "GIF", save_all=True, append_images=images[1:])
+        self.__encoder({})(_bytes)
 
         _bytes.seek(0)
         return _bytes
@@ -49,12 +374,48 @@ class GifEditor:
     def save(self, fp, **kwargs):
         """Save the image
 
+        Parameters
+        ----------
+        Frames are written with Pillow's GIF writer, except in stream mode
+        or when ``palette`` or ``colors`` is given. The built-in encoder
+        is then used, which writes every frame as soon as it is edited.
+
         Parameters
         ----------
         fp : str
             File path
+        palette : str, optional
+            Built-in encoder only, ``"adaptive"`` for a palette per frame
+            or ``"shared"`` for one palette for every frame (computed from
+            ``PALETTE_SAMPLES`` evenly spaced frames in stream mode),
+            by default ``"adaptive"``
+        optimize : bool, optional
+            With the built-in encoder, only encode the part of each frame
+            that changed since the previous one, by default True. With
+            Pillow's writer, Pillow's ``optimize`` option
+        colors : int, optional
+            Built-in encoder only, maximum number of colors per palette,
+            by default 256
+        duration, disposal : optional
+            Value or list of values per frame, by default the ones of
+            the source gif
+        loop : int, optional
+            Number of times the animation repeats, by default the one of
+            the source gif
+        **kwargs
+            Any other option (``comment``, ``transparency``,
+            ``background``...) is passed to Pillow's GIF writer, which is
+            then used in stream mode too.
+
+        Raises
+        ------
+        TypeError
+            if ``palette`` or ``colors`` are used with Pillow options
         """
-        images = list(map(lambda e: e.image, self.frames))
-        images[0].save(
-            fp, "GIF", save_all=True, append_images=images[1:], **kwargs
-        )
+        encode = self.__encoder(kwargs)
+
+        if isinstance(fp, (str, Path)):
+            with open(fp, "wb") as f:
+                encode(f, **kwargs)
+        else:
+            encode(fp, **kwargs)
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import struct
+from functools import reduce
+from typing import IO, Iterable, NamedTuple, Optional, Tuple
+
+from PIL import GifImagePlugin, Image, ImageChops
+
+
+def build_palette(
+    frames: Iterable[Image.Image], colors: int = 256, sample: int = 1 << 18
+) -> Image.Image:
+    """Build one palette for a sequence of frames
+
+    The frames are scaled down so that about ``sample`` pixels are used
+    in total, and one entry is left free for a transparent index.
+
+    Parameters
+    ----------
+    frames : Iterable[PIL.Image.Image]
+        Frames of the animation
+    colors : int, optional
+        Maximum number of colors, by default 256
+    sample : int, optional
+        Number of pixels used to compute the palette, by default 262144
+
+    Returns
+    -------
+    PIL.Image.Image
+        A palette image to pass to :func:`quantize_frame`
+    """
+    frames = list(frames)
+    width, height = frames[0].size
+    scale = min(1.0, (sample / len(frames) / (width * height)) ** 0.5)
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+    montage = Image.new("RGB", (size[0], size[1] * len(frames)))
+    for i, frame in enumerate(frames):
+        thumbnail = frame.convert("RGB").resize(size, Image.Resampling.BOX)
+        montage.paste(thumbnail, (0, size[1] * i))
+
+    return montage.quantize(colors - 1)
+
+
+def quantize_frame(
+    image: Image.Image,
+    colors: int = 256,
+    palette: Optional[Image.Image] = None,
+    mask: Optional[Image.Image] = None,
+    transparent_index: bool = False,
+) -> Tuple[Image.Image, Optional[int]]:
+    """Convert an RGBA frame to a palette image for GIF
+
+    Pixels with an alpha below 128 are mapped to a transparent palette
+    index, as GIF only supports on/off transparency.
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        RGBA frame
+    colors : int, optional
+        Maximum number of colors, by default 256
+    palette : PIL.Image.Image, optional
+        Palette image with at most 255 colors to map the frame to,
+        by default a palette is computed for the frame with the fast
+        octree method
+    mask : PIL.Image.Image, optional
+        ``L`` mask of other pixels to make transparent, by default None
+    transparent_index : bool, optional
+        Add a transparent index even if no pixel is transparent,
+        by default False
+
+    Returns
+    -------
+    Tuple[PIL.Image.Image, Optional[int]]
+        The palette image and its transparent index, if any
+    """
+    transparent = image.getchannel("A").point(lambda a: 255 if a < 128 else 0)
+    if mask is not None:
+        transparent = ImageChops.lighter(transparent, mask)
+
+    has_transparency = transparent_index or transparent.getextrema()[1] == 255
+    rgb = image.convert("RGB")
+
+    if palette is not None:
+        frame = rgb.quantize(palette=palette)
+    else:
+        frame = rgb.quantize(
+            colors - 1 if has_transparency else colors,
+            Image.Quantize.FASTOCTREE,
+        )
+        # The octree palette is padded, keep the entries in use so that
+        # small frames are written with short codes
+        used = sorted(index for _, index in frame.getcolors(256) or [])
+        frame = frame.remap_palette(used)
+
+    if not has_transparency:
+        return frame, None
+
+    entries = frame.getpalette() or []
+    index = len(entries) // 3
+    frame.putpalette(entries + [0, 0, 0])
+    frame.paste(index, mask=transparent)
+
+    return frame, index
+
+
+def _difference(
+    previous: Image.Image, image: Image.Image
+) -> Tuple[Optional[Tuple[int, int, int, int]], Optional[Image.Image]]:
+    changed = reduce(
+        ImageChops.lighter, ImageChops.difference(previous, image).split()
+    )
+    box = changed.getbbox()
+    if box is None:
+        return None, None
+
+    return box, changed.crop(box).point(lambda v: 0 if v else 255)
+
+
+def _opaque(image: Image.Image) -> Image.Image:
+    return image.getchannel("A").point(lambda a: 255 if a >= 128 else 0)
+
+
+class _Frame(NamedTuple):
+    image: Image.Image
+    duration: Optional[float]
+    disposal: int
+    offset: Tuple[int, int]
+
+
+class GifEncoder:
+    """Writes an animated GIF one frame at a time
+
+    Frames are encoded as they are added, so only the frame being written
+    (and the previous one when optimizing) has to be kept in memory.
+
+    With ``optimize``, every frame is cropped to the area that changed
+    since the previous frame and unchanged pixels inside that area are
+    made transparent, so the previous frame shows through. Frames that
+    make a pixel of the previous frame transparent are written whole.
+
+    Parameters
+    ----------
+    fp : IO[bytes]
+        File object to write to
+    size : Tuple[int, int], optional
+        Size of the animation, by default the size of the first frame
+    loop : int, optional
+        Number of times the animation repeats, 0 for forever and None to
+        play it once, by default 0
+    palette : PIL.Image.Image, optional
+        Palette image from :func:`build_palette` written once as the
+        global color table, or None to compute a palette for every
+        frame, by default None
+    optimize : bool, optional
+        Only encode the changed part of every frame, by default True
+    colors : int, optional
+        Maximum number of colors per palette, by default 256
+    """
+
+    def __init__(
+        self,
+        fp: IO[bytes],
+        size: Optional[Tuple[int, int]] = None,
+        loop: Optional[int] = 0,
+        palette: Optional[Image.Image] = None,
+        optimize: bool = True,
+        colors: int = 256,
+    ) -> None:
+        self.fp = fp
+        self.size = size
+        self.loop = loop
+        self.palette = palette
+        self.optimize = optimize
+        self.colors = colors
+        self.frame_count = 0
+
+        self._pending: Optional[_Frame] = None
+        self._previous: Optional[Image.Image] = None
+
+    def _write_header(self) -> None:
+        assert self.size is not None
+
+        if isinstance(self.palette, Image.Image):
+            entries = bytes(self.palette.getpalette() or [])
+            bits = max(1, (len(entries) // 3 - 1).bit_length())
+            flags = 0xF0 | (bits - 1)
+            table = entries.ljust(3 << bits, b"\x00")
+        else:
+            # No global color table, every frame carries its own palette
+            flags = 0
+            table = b""
+
+        self.fp.write(
+            b"GIF89a" + struct.pack("<HHBBB", *self.size, flags, 0, 0) + table
+        )
+
+        if self.loop is not None:
+            self.fp.write(
+                b"!\xff\x0bNETSCAPE2.0\x03\x01"
+                + struct.pack("<H", self.loop)
+                + b"\x00"
+            )
+
+    def _covers(self, frame: _Frame) -> bool:
+        return (
+            frame.image.mode == "RGBA"
+            and frame.offset == (0, 0)
+            and frame.image.size == self.size
+        )
+
+    def _hides(self, frame: _Frame, following: _Frame) -> bool:
+        # Whether the following frame is transparent where this one is not
+        hidden = ImageChops.subtract(
+            _opaque(frame.image), _opaque(following.image)
+        )
+        return hidden.getbbox() is not None
+
+    def _write(self, frame: _Frame, disposal: int) -> None:
+        if self.frame_count == 0:
+            self.size = self.size or frame.image.size
+            self._write_header()
+
+        shared = isinstance(self.palette, Image.Image)
+        params = {"include_color_table": not shared, "disposal": disposal}
+
+        if frame.duration:
+            params["duration"] = frame.duration
+
+        image, offset = frame.image, frame.offset
+
+        if image.mode == "P":
+            output = image
+            if "transparency" in image.info:
+                params["transparency"] = image.info["transparency"]
+        else:
+            box, mask = None, None
+            if self._previous is not None:
+                box, mask = _difference(self._previous, image)
+                if box is None:
+                    # Nothing changed, keep a single transparent pixel
+                    box = (0, 0, 1, 1)
+                    mask = Image.new("L", (1, 1), 255)
+
+            if box is not None:
+                image, offset = image.crop(box), box[:2]
+
+            output, transparency = quantize_frame(
+                image,
+                self.colors,
+                self.palette if shared else None,  # type: ignore[arg-type]
+                mask,
+                # Frames cleared to the background name a transparent
+                # index, which readers like Pillow clear them to
+                disposal == 2,
+            )
+            if transparency is not None:
+                params["transparency"] = transparency
+
+        for data in GifImagePlugin.getdata(output, offset, **params):
+            self.fp.write(data)
+
+        self.frame_count += 1
+
+    def _flush(self, following: Optional[_Frame]) -> None:
+        if self._pending is None:
+            return
+
+        frame, self._pending = self._pending, None
+        disposal, stacks = frame.disposal, False
+
+        if (
+            following is not None
+            and self._covers(frame)
+            and self._covers(following)
+        ):
+            if not self._hides(frame, following):
+                # Keep the frame on screen, the next one is drawn on top
+                disposal, stacks = 1, True
+            elif disposal in (0, 1):
+                # Clear the frame so it does not show through the next one
+                disposal = 2
+
+        self._write(frame, disposal)
+        self._previous = frame.image if stacks else None
+
+    def add_frame(
+        self,
+        image: Image.Image,
+        duration: Optional[float] = None,
+        disposal: int = 0,
+        offset: Tuple[int, int] = (0, 0),
+    ) -> None:
+        """Encode a frame
+
+        Parameters
+        ----------
+        image : PIL.Image.Image
+            Frame to add, RGBA frames are quantized with
+            :func:`quantize_frame`
+        duration : float, optional
+            Display time of the frame in milliseconds, by default None
+        disposal : int, optional
+            GIF disposal method of the frame, by default 0
+        offset : Tuple[int, int], optional
+            Position of the frame in the animation, by default (0, 0)
+        """
+        if image.mode not in ("P", "RGBA"):
+            image = image.convert("RGBA")
+
+        frame = _Frame(image, duration, disposal, offset)
+        self.size = self.size or image.size
+
+        if not self.optimize:
+            self._write(frame, disposal)
+            return
+
+        self._flush(frame)
+        self._pending = frame
+
+    def close(self) -> None:
+        """Write the remaining frame and the end of the file"""
+        self._flush(None)
+
+        if self.frame_count == 0 and self.size:
+            self._write_header()
+
+        self.fp.write(b";")
+
+        if hasattr(self.fp, "flush"):
+            self.fp.flush()
+
+    def __enter__(self) -> GifEncoder:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
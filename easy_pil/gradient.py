@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+from . import pixel_ops
+from .types.common import Color
+
+GradientKind = Literal["linear", "radial", "conic"]
+ColorStop = Tuple[float, Color]
+GradientKey = Tuple[
+    str,
+    Tuple[int, int],
+    Tuple[Tuple[float, Tuple[int, int, int, int]], ...],
+    float,
+    Optional[Tuple[float, float]],
+    Optional[float],
+]
+
+
+def color_stops(
+    colors: Sequence[Union[Color, ColorStop]]
+) -> Tuple[Tuple[float, Tuple[int, int, int, int]], ...]:
+    """Normalize gradient colors to ``(position, RGBA)`` stops
+
+    Parameters
+    ----------
+    colors : Sequence[Union[Color, Tuple[float, Color]]]
+        Colors spread evenly, or ``(position, color)`` stops with
+        positions between 0 and 1
+
+    Returns
+    -------
+    Tuple[Tuple[float, Tuple[int, int, int, int]], ...]
+        The stops sorted by position
+
+    Raises
+    ------
+    ValueError
+        if no color is given
+    """
+    if not colors:
+        raise ValueError("A gradient needs at least one color")
+
+    stops = []
+    for index, item in enumerate(colors):
+        if isinstance(item, tuple) and len(item) == 2:
+            position, color = item
+        else:
+            position = index / max(len(colors) - 1, 1)
+            color = item  # type: ignore[assignment]
+
+        stops.append((float(position), pixel_ops.to_rgba(color)))
+
+    return tuple(sorted(stops, key=lambda stop: stop[0]))
+
+
+def _render(key: GradientKey) -> Image.Image:
+    kind, size, stops, angle, center, radius = key
+
+    if kind == "linear":
+        levels = pixel_ops.linear_levels(size, angle)
+    elif kind == "radial":
+        levels = pixel_ops.radial_levels(size, center, radius)
+    elif kind == "conic":
+        levels = pixel_ops.conic_levels(size, center, angle)
+    else:
+        raise ValueError(f"Unknown gradient kind '{kind}'")
+
+    return pixel_ops.colorize(levels, pixel_ops.color_lut(stops))
+
+
+class GradientCache:
+    """Least recently used cache of rendered gradients
+
+    Gradients are keyed by their kind, size, color stops and geometry,
+    and shared between every editor. Cached gradients must be treated as
+    read only.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of gradients to keep, by default 64
+    max_bytes : int, optional
+        Maximum memory used by the gradients in bytes, by default 64 MiB
+    """
+
+    def __init__(self, maxsize: int = 64, max_bytes: int = 64 << 20) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._gradients: OrderedDict[GradientKey, Image.Image] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._gradients)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the cached gradients in bytes"""
+        return self._bytes
+
+    def get(self, key: GradientKey) -> Image.Image:
+        """Get a gradient, rendering it if it is not cached yet
+
+        Parameters
+        ----------
+        key : GradientKey
+            ``(kind, size, stops, angle, center, radius)``, see
+            :meth:`Gradient.key`
+
+        Returns
+        -------
+        PIL.Image.Image
+            The RGBA gradient
+        """
+        with self._lock:
+            gradient = self._gradients.get(key)
+            if gradient is not None:
+                self._gradients.move_to_end(key)
+                self.hits += 1
+                return gradient
+
+            self.misses += 1
+
+        gradient = _render(key)
+
+        with self._lock:
+            if key not in self._gradients:
+                self._gradients[key] = gradient
+                self._bytes += gradient.width * gradient.height * 4
+                self._evict()
+
+        return gradient
+
+    def clear(self) -> None:
+        """Remove every cached gradient"""
+        with self._lock:
+            self._gradients.clear()
+            self._bytes = 0
+
+    def _evict(self) -> None:
+        while self._gradients and (
+            len(self._gradients) > self.maxsize or self._bytes > self.max_bytes
+        ):
+            _, gradient = self._gradients.popitem(last=False)
+            self._bytes -= gradient.width * gradient.height * 4
+
+
+gradient_cache = GradientCache()
+
+
+@dataclass(frozen=True)
+class Gradient:
+    """A gradient fill
+
+    Parameters
+    ----------
+    colors : Sequence[Union[Color, Tuple[float, Color]]]
+        Colors spread evenly, or ``(position, color)`` stops with
+        positions between 0 and 1
+    kind : Literal["linear", "radial", "conic"], optional
+        Shape of the gradient, by default "linear"
+    angle : float, optional
+        Direction of linear gradients (0 goes from left to right, 90 from
+        top to bottom) or start of conic gradients, in degrees,
+        by default 0
+    center : Tuple[float, float], optional
+        Center of radial and conic gradients, relative to the filled
+        area, by default its center
+    radius : float, optional
+        Radius of radial gradients, by default the distance to the
+        farthest corner
+    """
+
+    colors: Sequence[Union[Color, ColorStop]]
+    kind: GradientKind = "linear"
+    angle: float = 0
+    center: Optional[Tuple[float, float]] = None
+    radius: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "colors", tuple(self.colors))
+
+    def key(self, size: Tuple[int, int]) -> GradientKey:
+        """Cache key of the gradient rendered at a size"""
+        return (
+            self.kind,
+            (int(size[0]), int(size[1])),
+            color_stops(self.colors),
+            float(self.angle),
+            tuple(self.center) if self.center is not None else None,
+            float(self.radius) if self.radius is not None else None,
+        )
+
+    def render(
+        self, size: Tuple[int, int], cache: Optional[GradientCache] = None
+    ) -> Image.Image:
+        """Render the gradient, using the shared gradient cache
+
+        Parameters
+        ----------
+        size : Tuple[int, int]
+            Size of the gradient
+        cache : GradientCache, optional
+            Cache to use instead of the shared one, by default None
+
+        Returns
+        -------
+        PIL.Image.Image
+            RGBA gradient, must not be modified
+        """
+        if cache is None:
+            cache = gradient_cache
+
+        return cache.get(self.key(size))
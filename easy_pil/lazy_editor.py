@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import inspect
+from functools import reduce
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from PIL import ImageChops
+from PIL.Image import Image
+
+from .aio_editor import Instruction
+from .canvas import Canvas
+from .editor import Editor
+from .encoding import EncodeResult, EncodingProfile
+from .mask import apply_mask, get_mask
+
+# Editor methods that multiply the alpha channel with a binary mask
+MASK_OPERATIONS = {"rounded_corners", "circle_image"}
+
+
+def _mask_spec(ins: Instruction) -> Tuple[str, int, int]:
+    if ins.name == "circle_image":
+        return ("ellipse", 0, 0)
+
+    method = getattr(Editor, ins.name)
+    bound = inspect.signature(method).bind(None, *ins.args, **ins.kwargs)
+    bound.apply_defaults()
+
+    return (
+        "rounded_rectangle",
+        bound.arguments["radius"],
+        bound.arguments["offset"],
+    )
+
+
+def _is_noop(ins: Instruction) -> bool:
+    if ins.name != "rotate":
+        return False
+
+    method = getattr(Editor, ins.name)
+    bound = inspect.signature(method).bind(None, *ins.args, **ins.kwargs)
+    bound.apply_defaults()
+
+    return bound.arguments["deg"] % 360 == 0 and not bound.arguments["expand"]
+
+
+def plan(instructions: Sequence[Instruction]) -> List[Instruction]:
+    """Fuse a chain of editor calls into fewer steps
+
+    - rotations by a multiple of 360 degrees without ``expand`` are
+      dropped
+    - consecutive ``rounded_corners`` / ``circle_image`` calls become a
+      single ``_masks`` step that multiplies the alpha channel once with
+      the combined mask
+
+    The masks are binary, so multiplying them first gives the same
+    pixels as applying them one by one. Draw calls are not fused, the
+    editor already shares one ``ImageDraw`` context between them. Other
+    calls are kept as they are.
+
+    Parameters
+    ----------
+    instructions : Sequence[Instruction]
+        Editor method calls in order
+
+    Returns
+    -------
+    List[Instruction]
+        The steps to run with :func:`run_plan`
+    """
+    steps: List[Instruction] = []
+
+    for ins in instructions:
+        if _is_noop(ins):
+            continue
+
+        previous = steps[-1] if steps else None
+
+        if ins.name in MASK_OPERATIONS:
+            if previous is not None and previous.name == "_masks":
+                previous.args.append(_mask_spec(ins))
+            else:
+                steps.append(Instruction("_masks", [_mask_spec(ins)]))
+        else:
+            steps.append(ins)
+
+    return steps
+
+
+def _apply_masks(editor: Editor, *masks: Tuple[str, int, int]) -> None:
+    size = editor.image.size
+    mask = reduce(
+        ImageChops.multiply,
+        [
+            get_mask(shape, size, radius, offset)
+            for shape, radius, offset in masks
+        ],
+    )
+    apply_mask(editor.image, mask)
+
+
+_FUSED_STEPS: Dict[str, Callable[..., None]] = {
+    "_masks": _apply_masks,
+}
+
+
+def run_step(editor: Editor, step: Instruction) -> Any:
+    """Run one step made by :func:`plan` on an editor
+
+    Parameters
+    ----------
+    editor : Editor
+        Editor to run the step on
+    step : Instruction
+        Planned step
+
+    Returns
+    -------
+    Any
+        The return value of the editor method, None for fused steps
+    """
+    fused = _FUSED_STEPS.get(step.name)
+    if fused is not None:
+        return fused(editor, *step.args)
+
+    return getattr(editor, step.name)(*step.args, **step.kwargs)
+
+
+def run_plan(editor: Editor, steps: Sequence[Instruction]) -> Editor:
+    """Run the steps made by :func:`plan` on an editor
+
+    Parameters
+    ----------
+    editor : Editor
+        Editor to run the steps on
+    steps : Sequence[Instruction]
+        Planned steps
+
+    Returns
+    -------
+    Editor
+        The same editor
+    """
+    for step in steps:
+        run_step(editor, step)
+
+    return editor
+
+
+class LazyEditor:
+    """Records editor calls and runs them as a fused plan
+
+    Calls are chained like with :class:`Editor`, but nothing is done
+    until :meth:`render`, :attr:`image_bytes` or :meth:`save` is used.
+    The chain is first fused by :func:`plan`, the result is the same as
+    running the calls on an :class:`Editor`.
+
+    The rendered image is kept until another call is recorded or
+    :meth:`invalidate` is called, so reading :attr:`image` and
+    :attr:`image_bytes` does not run the chain again. Values returned by
+    the calls, like the layout of ``text_box``, are in :attr:`results`.
+
+    Parameters
+    ----------
+    _image : Union[Image, str, BytesIO, Editor, Canvas, Path]
+        Image to edit
+    target_size : Tuple[int, int], optional
+        Passed to :class:`Editor`, by default None
+    """
+
+    def __init__(
+        self,
+        _image: Union[Image, str, BytesIO, Editor, Canvas, Path],
+        target_size: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        self.source = _image
+        self.target_size = target_size
+        self.instructions: List[Instruction] = []
+
+        self._rendered: Optional[Editor] = None
+        self._results: List[Any] = []
+
+    def __getattr__(self, name):
+        if hasattr(Editor, name):
+
+            def handler(*args, **kwargs) -> LazyEditor:
+                self.instructions.append(
+                    Instruction(name=name, args=args, kwargs=kwargs)
+                )
+                self.invalidate()
+                return self
+
+            return handler
+        raise AttributeError(f"'{name}' is not available in Editor")
+
+    def plan(self) -> List[Instruction]:
+        """The fused steps of the recorded calls"""
+        return plan(self.instructions)
+
+    def invalidate(self) -> None:
+        """Drop the rendered image, after changing the source image"""
+        self._rendered = None
+        self._results = []
+
+    def __rendered(self) -> Editor:
+        if self._rendered is not None:
+            return self._rendered
+
+        editor = Editor(self.source, self.target_size)
+        index = {id(ins): i for i, ins in enumerate(self.instructions)}
+        results: List[Any] = [None] * len(self.instructions)
+
+        for step in self.plan():
+            value = run_step(editor, step)
+            # Fused steps are not recorded calls
+            i = index.get(id(step))
+            if i is not None and value is not editor:
+                results[i] = value
+
+        self._rendered = editor
+        self._results = results
+        return editor
+
+    @property
+    def results(self) -> List[Any]:
+        """Values returned by the recorded calls, rendering if needed
+
+        Calls returning the editor have None.
+        """
+        self.__rendered()
+        return self._results
+
+    def render(self) -> Editor:
+        """Run the recorded calls
+
+        Returns
+        -------
+        Editor
+            A new editor with every call applied
+        """
+        return Editor(self.__rendered().image.copy())
+
+    @property
+    def image(self) -> Image:
+        """The rendered image, shared until the next call is recorded"""
+        return self.__rendered().image
+
+    @property
+    def image_bytes(self) -> BytesIO:
+        """Render and return image bytes
+
+        Returns
+        -------
+        BytesIO
+            Bytes from the rendered image
+        """
+        return self.__rendered().image_bytes
+
+    def encode(
+        self, profile: Union[str, EncodingProfile] = "png", **params
+    ) -> EncodeResult:
+        """Render and encode the image, see :meth:`Editor.encode`"""
+        return self.__rendered().encode(profile, **params)
+
+    def save(
+        self, fp, file_format: Optional[str] = None, **params
+    ) -> Optional[EncodeResult]:
+        """Render and save the image, see :meth:`Editor.save`
+
+        Parameters
+        ----------
+        fp : str
+            File path
+        file_format : str, optional
+            File format, by default None
+        """
+        return self.__rendered().save(fp, file_format, **params)
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Dict, Mapping, Optional, Tuple
+
+import aiohttp
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+from .utils import reduce_image
+
+# Decoded sizes kept per cached image, the least recently used is dropped
+MAX_DECODED_SIZES = 4
+
+
+@dataclass
+class _CacheEntry:
+    data: bytes
+    expires: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    decoded: OrderedDict[Optional[Tuple[int, int]], Image.Image] = field(
+        default_factory=OrderedDict, repr=False
+    )
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class ImageLoader:
+    """Loads images over HTTP with pooled connections and a decoded cache
+
+    The loader owns an ``aiohttp`` session for :meth:`load_async` and a
+    ``requests`` session for :meth:`load`, both created on first use.
+    Concurrent requests for the same URL share a single download, and
+    decoded images are kept in an LRU cache that is revalidated with
+    ``ETag`` / ``Last-Modified`` once entries expire. Each cached image
+    keeps up to ``MAX_DECODED_SIZES`` decodes of different target sizes.
+
+    Parameters
+    ----------
+    max_connections : int, optional
+        Maximum number of open connections, by default 100
+    max_per_host : int, optional
+        Maximum number of concurrent requests per host, by default 8
+    timeout : float, optional
+        Total timeout of a request in seconds, by default 10
+    max_bytes : int, optional
+        Maximum size of a downloaded image in bytes, by default 10 MiB
+    cache_size : int, optional
+        Maximum number of cached images, 0 to disable the cache,
+        by default 256
+    ttl : float, optional
+        Seconds a cached image is used without revalidation when the
+        response has no ``Cache-Control: max-age``, by default 300
+    headers : Mapping[str, str], optional
+        Extra headers sent with every request, by default None
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_per_host: int = 8,
+        timeout: float = 10,
+        max_bytes: int = 10 << 20,
+        cache_size: int = 256,
+        ttl: float = 300,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.headers = dict(headers or {})
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+        self._cache: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self._sync_session: Optional[requests.Session] = None
+        self._sync_inflight: Dict[str, Future] = {}
+
+    def _get_cached(self, url: str) -> Optional[_CacheEntry]:
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is not None:
+                self._cache.move_to_end(url)
+
+            return entry
+
+    def _store(self, url: str, entry: _CacheEntry) -> None:
+        if self.cache_size <= 0:
+            return
+
+        with self._lock:
+            self._cache[url] = entry
+            self._cache.move_to_end(url)
+
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _expires(self, headers: Mapping[str, str]) -> float:
+        ttl = self.ttl
+        cache_control = headers.get("Cache-Control", "")
+
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            ttl = 0
+        else:
+            max_age = re.search(r"max-age=(\d+)", cache_control)
+            if max_age:
+                ttl = int(max_age.group(1))
+
+        return time.monotonic() + ttl
+
+    def _entry(self, data: bytes, headers: Mapping[str, str]) -> _CacheEntry:
+        return _CacheEntry(
+            data=data,
+            expires=self._expires(headers),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+        )
+
+    def _check_size(self, size: Optional[int]) -> None:
+        if size is not None and size > self.max_bytes:
+            raise ValueError(
+                f"Image is larger than the limit of {self.max_bytes} bytes"
+            )
+
+    def _image(
+        self,
+        entry: _CacheEntry,
+        raw: bool,
+        target_size: Optional[Tuple[int, int]] = None,
+    ) -> Image.Image:
+        if raw:
+            return Image.open(BytesIO(entry.data))
+
+        if target_size:
+            target_size = (int(target_size[0]), int(target_size[1]))
+
+        with self._lock:
+            decoded = entry.decoded.get(target_size)
+            if decoded is not None:
+                entry.decoded.move_to_end(target_size)
+
+        if decoded is None:
+            decoded = Image.open(BytesIO(entry.data))
+            if target_size:
+                decoded = reduce_image(decoded, target_size)
+            decoded = decoded.convert("RGBA")
+
+            with self._lock:
+                entry.decoded[target_size] = decoded
+                entry.decoded.move_to_end(target_size)
+                while len(entry.decoded) > MAX_DECODED_SIZES:
+                    entry.decoded.popitem(last=False)
+
+        return decoded.copy()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The ``aiohttp`` session used by :meth:`load_async`"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers,
+            )
+
+        return self._session
+
+    async def _fetch_async(self, url: str) -> _CacheEntry:
+        cached = self._get_cached(url)
+        headers = cached.validators if cached else {}
+
+        async with self.session.get(url, headers=headers) as response:
+            if cached is not None and response.status == 304:
+                self.revalidations += 1
+                cached.expires = self._expires(response.headers)
+                return cached
+
+            response.raise_for_status()
+            self._check_size(response.content_length)
+
+            chunks = bytearray()
+            async for chunk in response.content.iter_chunked(1 << 16):
+                chunks += chunk
+                self._check_size(len(chunks))
+
+            entry = self._entry(bytes(chunks), response.headers)
+
+        self._store(url, entry)
+        return entry
+
+    async def load_async(
+        self,
+        url: str,
+        raw: bool = False,
+        target_size: Optional[Tuple[int, int]] = None,
+    ) -> Image.Image:
+        """Load image from link (async)
+
+        Parameters
+        ----------
+        url : str
+            Image link
+        raw : bool, optional
+            Return the image without converting it to RGBA,
+            by default False
+        target_size : Tuple[int, int], optional
+            Size the image will be resized to, large images are decoded
+            at a reduced size (see :func:`easy_pil.utils.reduce_image`).
+            Ignored for raw images.
+
+        Returns
+        -------
+        PIL.Image.Image
+            Image from the provided link, a new copy on every call
+
+        Raises
+        ------
+        ValueError
+            if the image is larger than ``max_bytes``
+        """
+        cached = self._get_cached(url)
+        if cached is not None and cached.expires > time.monotonic():
+            self.hits += 1
+            return self._image(cached, raw, target_size)
+
+        self.misses += 1
+        future = self._inflight.get(url)
+
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_async(url))
+            self._inflight[url] = future
+            future.add_done_callback(lambda _: self._inflight.pop(url, None))
+
+        entry = await asyncio.shield(future)
+        return self._image(entry, raw, target_size)
+
+    @property
+    def sync_session(self) -> requests.Session:
+        """The ``requests`` session used by :meth:`load`"""
+        with self._lock:
+            if self._sync_session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=self.max_connections,
+                    pool_maxsize=self.max_per_host,
+                    pool_block=True,
+                )
+                self._sync_session = requests.Session()
+                self._sync_session.headers.update(self.headers)
+                self._sync_session.mount("http://", adapter)
+                self._sync_session.mount("https://", adapter)
+
+            return self._sync_session
+
+    def _fetch(self, url: str) -> _CacheEntry:
+        cached = self._get_cached(url)
+        headers = cached.validators if cached else {}
+
+        with self.sync_session.get(
+            url, headers=headers, timeout=self.timeout, stream=True
+        ) as response:
+            if cached is not None and response.status_code == 304:
+                self.revalidations += 1
+                cached.expires = self._expires(response.headers)
+                return cached
+
+            response.raise_for_status()
+            length = response.headers.get("Content-Length")
+            self._check_size(int(length) if length else None)
+
+            chunks = bytearray()
+            for chunk in response.iter_content(1 << 16):
+                chunks += chunk
+                self._check_size(len(chunks))
+
+            entry = self._entry(bytes(chunks), response.headers)
+
+        self._store(url, entry)
+        return entry
+
+    def load(
+        self,
+        url: str,
+        raw: bool = False,
+        target_size: Optional[Tuple[int, int]] = None,
+    ) -> Image.Image:
+        """Load image from link
+
+        Parameters
+        ----------
+        url : str
+            Image link
+        raw : bool, optional
+            Return the image without converting it to RGBA,
+            by default False
+        target_size : Tuple[int, int], optional
+            Size the image will be resized to, large images are decoded
+            at a reduced size (see :func:`easy_pil.utils.reduce_image`).
+            Ignored for raw images.
+
+        Returns
+        -------
+        PIL.Image.Image
+            Image from the provided link, a new copy on every call
+
+        Raises
+        ------
+        ValueError
+            if the image is larger than ``max_bytes``
+        """
+        cached = self._get_cached(url)
+        if cached is not None and cached.expires > time.monotonic():
+            self.hits += 1
+            return self._image(cached, raw, target_size)
+
+        self.misses += 1
+
+        with self._lock:
+            future = self._sync_inflight.get(url)
+            owner = future is None
+            if owner:
+                future = self._sync_inflight[url] = Future()
+
+        assert future is not None
+
+        if owner:
+            try:
+                future.set_result(self._fetch(url))
+            except BaseException as error:
+                future.set_exception(error)
+            finally:
+                with self._lock:
+                    self._sync_inflight.pop(url, None)
+
+        return self._image(future.result(), raw, target_size)
+
+    def clear(self) -> None:
+        """Remove every cached image"""
+        with self._lock:
+            self._cache.clear()
+
+    async def close(self) -> None:
+        """Close the sessions of the loader"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        self.close_sync()
+
+    def close_sync(self) -> None:
+        """Close the ``requests`` session of the loader"""
+        with self._lock:
+            session, self._sync_session = self._sync_session, None
+
+        if session is not None:
+            session.close()
+
+    async def __aenter__(self) -> ImageLoader:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    def __enter__(self) -> ImageLoader:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close_sync()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Literal, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageDraw
+
+MaskShape = Literal["ellipse", "rounded_rectangle"]
+MaskKey = Tuple[str, Tuple[int, int], int, int, int]
+
+
+class MaskCache:
+    """Least recently used cache of ``L`` mode shape masks
+
+    Masks are keyed by ``(shape, size, radius, offset, supersample)`` and
+    shared between every editor, so repeated avatars or bars of the same
+    size only draw their mask once. Cached masks must be treated as read
+    only.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of masks to keep, by default 128
+    max_bytes : int, optional
+        Maximum memory used by the masks in bytes, by default 32 MiB
+    """
+
+    def __init__(self, maxsize: int = 128, max_bytes: int = 32 << 20) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._masks: OrderedDict[MaskKey, Image.Image] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the cached masks in bytes"""
+        return self._bytes
+
+    def get(
+        self,
+        shape: MaskShape,
+        size: Tuple[int, int],
+        radius: int = 0,
+        offset: int = 0,
+        supersample: int = 1,
+    ) -> Image.Image:
+        """Get a mask, drawing it if it is not cached yet
+
+        Parameters
+        ----------
+        shape : Literal["ellipse", "rounded_rectangle"]
+            Shape of the mask
+        size : Tuple[int, int]
+            Size of the mask
+        radius : int, optional
+            Corner radius of ``rounded_rectangle``, by default 0
+        offset : int, optional
+            Inset of the shape from the mask edges, by default 0
+        supersample : int, optional
+            Draw the shape this many times larger and downscale it for
+            anti-aliased edges, by default 1 (hard edges)
+
+        Returns
+        -------
+        PIL.Image.Image
+            ``L`` mode mask, 255 inside the shape and 0 outside
+        """
+        size = (int(size[0]), int(size[1]))
+        key = (shape, size, int(radius), int(offset), max(int(supersample), 1))
+
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return mask
+
+            self.misses += 1
+
+        mask = _draw_mask(*key)
+
+        with self._lock:
+            if key not in self._masks:
+                self._masks[key] = mask
+                self._bytes += size[0] * size[1]
+                self._evict()
+
+        return mask
+
+    def clear(self) -> None:
+        """Remove every cached mask"""
+        with self._lock:
+            self._masks.clear()
+            self._bytes = 0
+
+    def _evict(self) -> None:
+        while self._masks and (
+            len(self._masks) > self.maxsize or self._bytes > self.max_bytes
+        ):
+            _, mask = self._masks.popitem(last=False)
+            self._bytes -= mask.width * mask.height
+
+
+def _draw_mask(
+    shape: str,
+    size: Tuple[int, int],
+    radius: int,
+    offset: int,
+    supersample: int,
+) -> Image.Image:
+    width, height = size[0] * supersample, size[1] * supersample
+    radius, offset = radius * supersample, offset * supersample
+
+    mask = Image.new("L", (width, height), 0)
+    draw = ImageDraw.Draw(mask)
+
+    if shape == "ellipse":
+        # Ellipse bounds are inclusive, so the last pixel is ``size - 1``
+        draw.ellipse(
+            (offset, offset, width - 1 - offset, height - 1 - offset),
+            fill=255,
+        )
+    elif shape == "rounded_rectangle":
+        draw.rounded_rectangle(
+            (offset, offset, width - offset, height - offset),
+            radius=radius,
+            fill=255,
+        )
+    else:
+        raise ValueError(f"Unknown mask shape '{shape}'")
+
+    if supersample > 1:
+        mask = mask.resize(size, Image.LANCZOS)
+
+    return mask
+
+
+mask_cache = MaskCache()
+
+
+def get_mask(
+    shape: MaskShape,
+    size: Tuple[int, int],
+    radius: int = 0,
+    offset: int = 0,
+    supersample: int = 1,
+    cache: Optional[MaskCache] = None,
+) -> Image.Image:
+    """Get a shape mask from the shared mask cache
+
+    Parameters
+    ----------
+    shape : Literal["ellipse", "rounded_rectangle"]
+        Shape of the mask
+    size : Tuple[int, int]
+        Size of the mask
+    radius : int, optional
+        Corner radius of ``rounded_rectangle``, by default 0
+    offset : int, optional
+        Inset of the shape from the mask edges, by default 0
+    supersample : int, optional
+        Supersampling factor for anti-aliased edges, by default 1
+    cache : MaskCache, optional
+        Cache to use instead of the shared one, by default None
+
+    Returns
+    -------
+    PIL.Image.Image
+        ``L`` mode mask, must not be modified
+    """
+    if cache is None:
+        cache = mask_cache
+
+    return cache.get(shape, size, radius, offset, supersample)
+
+
+def apply_mask(image: Image.Image, mask: Image.Image) -> None:
+    """Multiply the alpha channel of an RGBA image by a mask in place
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        RGBA image to mask
+    mask : PIL.Image.Image
+        ``L`` mode mask of the same size
+    """
+    image.putalpha(ImageChops.multiply(image.getchannel("A"), mask))
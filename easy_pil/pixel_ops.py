@@ -0,0 +1,608 @@
+"""Vectorized pixel operations
+
+Every operation has a NumPy and a Pillow implementation, none of them
+process pixels in Python. By default NumPy is used when it is installed
+and faster for the operation (color remapping, channel masks and
+gradient positions); per channel color changes are faster with Pillow
+lookup tables. Pass ``use_numpy`` to pick a backend, see
+``benchmarks/pixel_ops.py``.
+"""
+from __future__ import annotations
+
+import math
+from functools import reduce
+from typing import List, Mapping, Optional, Sequence, Tuple
+
+from PIL import Image as PilImage, ImageChops, ImageColor, ImageDraw
+from PIL.Image import Image
+
+from .types.common import Color
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+HAS_NUMPY = np is not None
+
+RGBA = Tuple[int, int, int, int]
+
+
+def _use_numpy(use_numpy: Optional[bool], preferred: bool = True) -> bool:
+    if use_numpy is None:
+        return HAS_NUMPY and preferred
+    if use_numpy and not HAS_NUMPY:
+        raise RuntimeError("NumPy is not installed")
+
+    return use_numpy
+
+
+def to_rgba(color: Color) -> RGBA:
+    """Convert a color to an RGBA tuple
+
+    Parameters
+    ----------
+    color : Color
+        Color name, hex string, gray level or RGB(A) tuple
+
+    Returns
+    -------
+    Tuple[int, int, int, int]
+        The RGBA color
+    """
+    if isinstance(color, str):
+        return ImageColor.getcolor(color, "RGBA")  # type: ignore[return-value]
+    if isinstance(color, int):
+        return (color, color, color, 255)
+    if len(color) == 3:
+        return (*color, 255)  # type: ignore[return-value]
+
+    return tuple(color)  # type: ignore[return-value]
+
+
+def _blend_lut(amount: float, target: int) -> List[int]:
+    # Same arithmetic as Image.blend, without the second image
+    return [
+        max(0, min(255, int(v + amount * (target - v)))) for v in range(256)
+    ]
+
+
+def tint(
+    image: Image,
+    color: Color,
+    amount: float = 0.5,
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Blend the colors of an image towards a color
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        RGBA image
+    color : Color
+        Tint color
+    amount : float, optional
+        0 keeps the image, 1 fills it with the color, by default 0.5
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        The tinted image, with the alpha of the original
+    """
+    rgb = to_rgba(color)[:3]
+
+    if _use_numpy(use_numpy, preferred=False):
+        pixels = np.asarray(image).astype(np.float32)
+        target = np.array(rgb, dtype=np.float32)
+        pixels[..., :3] += amount * (target - pixels[..., :3])
+        return PilImage.fromarray(
+            np.clip(pixels, 0, 255).astype(np.uint8), "RGBA"
+        )
+
+    bands = image.split()
+    return PilImage.merge(
+        "RGBA",
+        [band.point(_blend_lut(amount, c)) for band, c in zip(bands, rgb)]
+        + [bands[3]],
+    )
+
+
+def brightness(
+    image: Image, factor: float, *, use_numpy: Optional[bool] = None
+) -> Image:
+    """Scale the brightness of an image
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        RGBA image
+    factor : float
+        0 makes the image black, 1 keeps it
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        The new image, with the alpha of the original
+    """
+    if _use_numpy(use_numpy, preferred=False):
+        pixels = np.asarray(image).astype(np.float32)
+        pixels[..., :3] *= np.float32(factor)
+        return PilImage.fromarray(
+            np.clip(pixels, 0, 255).astype(np.uint8), "RGBA"
+        )
+
+    lut = _blend_lut(1 - factor, 0)
+    bands = image.split()
+    return PilImage.merge(
+        "RGBA", [band.point(lut) for band in bands[:3]] + [bands[3]]
+    )
+
+
+def opacity(
+    image: Image, factor: float, *, use_numpy: Optional[bool] = None
+) -> Image:
+    """Scale the alpha channel of an image
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        RGBA image
+    factor : float
+        Multiplier of the alpha values
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        The new image
+    """
+    if _use_numpy(use_numpy, preferred=False):
+        pixels = np.array(image)
+        alpha = pixels[..., 3] * np.float64(factor)
+        pixels[..., 3] = np.clip(alpha, 0, 255).astype(np.uint8)
+        return PilImage.fromarray(pixels, "RGBA")
+
+    output = image.copy()
+    output.putalpha(
+        image.getchannel("A").point(
+            lambda a: max(0, min(255, int(a * factor)))
+        )
+    )
+    return output
+
+
+def duotone(
+    image: Image,
+    dark: Color,
+    light: Color,
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Map the luminance of an image between two colors
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        RGBA image
+    dark : Color
+        Color of the shadows
+    light : Color
+        Color of the highlights
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        The new image, with the alpha of the original
+    """
+    lut = color_lut([(0, dark), (1, light)])
+    gray = image.convert("L")
+
+    if _use_numpy(use_numpy, preferred=False):
+        pixels = np.array(lut, dtype=np.uint8)[np.asarray(gray)]
+        pixels[..., 3] = np.asarray(image.getchannel("A"))
+        return PilImage.fromarray(pixels, "RGBA")
+
+    bands = [gray.point([entry[i] for entry in lut]) for i in range(3)]
+    return PilImage.merge("RGBA", bands + [image.getchannel("A")])
+
+
+def remap_colors(
+    image: Image,
+    mapping: Mapping[Color, Color],
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Replace exact colors of an image
+
+    Every color is matched against the original image, so mappings such
+    as ``{a: b, b: a}`` swap the colors.
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        RGBA image
+    mapping : Mapping[Color, Color]
+        New color of every color to replace
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        The new image
+    """
+    pairs = [(to_rgba(src), to_rgba(dst)) for src, dst in mapping.items()]
+
+    if _use_numpy(use_numpy):
+        pixels = np.array(image)
+        packed = pixels.view(np.uint32)[..., 0]
+        masks = [
+            packed == np.array(src, dtype=np.uint8).view(np.uint32)[0]
+            for src, _ in pairs
+        ]
+        for mask, (_, dst) in zip(masks, pairs):
+            pixels[mask] = dst
+        return PilImage.fromarray(pixels, "RGBA")
+
+    bands = image.split()
+    masks = [
+        reduce(
+            ImageChops.multiply,
+            [
+                band.point(lambda v, c=c: 255 if v == c else 0)
+                for band, c in zip(bands, src)
+            ],
+        )
+        for src, _ in pairs
+    ]
+
+    output = image.copy()
+    for mask, (_, dst) in zip(masks, pairs):
+        output.paste(dst, mask=mask)
+    return output
+
+
+def channel_mask(
+    image: Image,
+    channel: str = "A",
+    low: int = 128,
+    high: int = 255,
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Mask of the pixels with a channel value in a range
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        Image to read the channel of
+    channel : str, optional
+        Band name, e.g. ``"R"`` or ``"A"``, by default ``"A"``
+    low : int, optional
+        Lowest value in the mask, by default 128
+    high : int, optional
+        Highest value in the mask, by default 255
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        ``L`` mask, 255 inside the range and 0 outside
+    """
+    band = image.getchannel(channel)
+
+    if _use_numpy(use_numpy):
+        values = np.asarray(band)
+        mask = ((values >= low) & (values <= high)).astype(np.uint8) * 255
+        return PilImage.fromarray(mask, "L")
+
+    return band.point(lambda v: 255 if low <= v <= high else 0)
+
+
+def color_lut(stops: Sequence[Tuple[float, Color]]) -> List[RGBA]:
+    """Interpolate 256 colors between color stops
+
+    Parameters
+    ----------
+    stops : Sequence[Tuple[float, Color]]
+        Positions between 0 and 1 with their colors, in order
+
+    Returns
+    -------
+    List[Tuple[int, int, int, int]]
+        The RGBA color of every level
+    """
+    points = [(float(position), to_rgba(color)) for position, color in stops]
+    lut = []
+
+    for level in range(256):
+        t = level / 255
+        index = 0
+        while index < len(points) - 2 and t > points[index + 1][0]:
+            index += 1
+
+        p0, c0 = points[index]
+        p1, c1 = points[min(index + 1, len(points) - 1)]
+        f = 0.0 if p1 <= p0 else min(1.0, max(0.0, (t - p0) / (p1 - p0)))
+
+        r, g, b, a = (int(x + (y - x) * f + 0.5) for x, y in zip(c0, c1))
+        lut.append((r, g, b, a))
+
+    return lut
+
+
+def colorize(
+    levels: Image, lut: Sequence[RGBA], *, use_numpy: Optional[bool] = None
+) -> Image:
+    """Color an ``L`` image with a color lookup table
+
+    Parameters
+    ----------
+    levels : PIL.Image.Image
+        ``L`` image of positions between 0 and 255
+    lut : Sequence[Tuple[int, int, int, int]]
+        256 RGBA colors, see :func:`color_lut`
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        The RGBA image
+    """
+    if _use_numpy(use_numpy, preferred=False):
+        table = np.array(lut, dtype=np.uint8)
+        return PilImage.fromarray(table[np.asarray(levels)], "RGBA")
+
+    return PilImage.merge(
+        "RGBA", [levels.point([entry[i] for entry in lut]) for i in range(4)]
+    )
+
+
+def linear_levels(
+    size: Tuple[int, int],
+    angle: float = 0,
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Positions of a linear gradient
+
+    Parameters
+    ----------
+    size : Tuple[int, int]
+        Size of the gradient
+    angle : float, optional
+        Direction in degrees, 0 goes from left to right and 90 from top
+        to bottom, by default 0
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        ``L`` image going from 0 to 255 along the direction
+    """
+    width, height = size
+    cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    extent = max(1.0, width * abs(cos) + height * abs(sin))
+
+    if _use_numpy(use_numpy):
+        x = np.arange(width, dtype=np.float32) + 0.5 - width / 2
+        y = np.arange(height, dtype=np.float32) + 0.5 - height / 2
+        t = (x[None, :] * cos + y[:, None] * sin) / extent + 0.5
+        return PilImage.fromarray(
+            (np.clip(t, 0, 1) * 255 + 0.5).astype(np.uint8), "L"
+        )
+
+    ramp = PilImage.linear_gradient("L").transpose(
+        PilImage.Transpose.ROTATE_90
+    )
+
+    if angle % 90 == 0:
+        # Axis aligned, the ramp only has to be turned and resized
+        turns = [
+            PilImage.Transpose.ROTATE_270,
+            PilImage.Transpose.ROTATE_180,
+            PilImage.Transpose.ROTATE_90,
+        ]
+        quarter = int(angle // 90) % 4
+        if quarter:
+            ramp = ramp.transpose(turns[quarter - 1])
+        return ramp.resize(size, PilImage.BILINEAR)
+
+    # A horizontal ramp as long as the projection of the image on the
+    # direction, rotated and cropped to the size
+    side = math.ceil(math.hypot(width, height)) + 2
+    length = max(1, round(extent))
+
+    levels = PilImage.new("L", (side, side), 0)
+    left = (side - length) // 2
+    levels.paste(255, (left + length, 0, side, side))
+    levels.paste(ramp.resize((length, side), PilImage.BILINEAR), (left, 0))
+    levels = levels.rotate(-angle, PilImage.BILINEAR)
+
+    left, top = (side - width) // 2, (side - height) // 2
+    return levels.crop((left, top, left + width, top + height))
+
+
+def radial_levels(
+    size: Tuple[int, int],
+    center: Optional[Tuple[float, float]] = None,
+    radius: Optional[float] = None,
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Positions of a radial gradient
+
+    Parameters
+    ----------
+    size : Tuple[int, int]
+        Size of the gradient
+    center : Tuple[float, float], optional
+        Center of the gradient, by default the center of the image
+    radius : float, optional
+        Distance where the gradient ends, by default the distance to the
+        farthest corner
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        ``L`` image going from 0 at the center to 255 at the radius
+    """
+    width, height = size
+    cx, cy = center if center is not None else (width / 2, height / 2)
+    if radius is None:
+        radius = math.hypot(max(cx, width - cx), max(cy, height - cy))
+    radius = max(radius, 0.5)
+
+    if _use_numpy(use_numpy):
+        x = np.arange(width, dtype=np.float32) + 0.5 - cx
+        y = np.arange(height, dtype=np.float32) + 0.5 - cy
+        t = np.sqrt(x[None, :] ** 2 + y[:, None] ** 2) / radius
+        return PilImage.fromarray(
+            (np.clip(t, 0, 1) * 255 + 0.5).astype(np.uint8), "L"
+        )
+
+    # radial_gradient is 256x256 and reaches 255 in the corners, scale it
+    # to reach 255 at the edges (a radius of 128) instead
+    diameter = max(1, round(radius * 2))
+    circle = (
+        PilImage.radial_gradient("L")
+        .point(lambda v: min(255, round(v * math.sqrt(2))))
+        .resize((diameter, diameter), PilImage.BILINEAR)
+    )
+
+    levels = PilImage.new("L", size, 255)
+    levels.paste(circle, (round(cx - radius), round(cy - radius)))
+    return levels
+
+
+def conic_levels(
+    size: Tuple[int, int],
+    center: Optional[Tuple[float, float]] = None,
+    angle: float = 0,
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Positions of a conic gradient
+
+    Parameters
+    ----------
+    size : Tuple[int, int]
+        Size of the gradient
+    center : Tuple[float, float], optional
+        Center of the gradient, by default the center of the image
+    angle : float, optional
+        Start of the gradient in degrees, clockwise from the right,
+        by default 0
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        ``L`` image going from 0 to 255 around the center
+    """
+    width, height = size
+    cx, cy = center if center is not None else (width / 2, height / 2)
+
+    if _use_numpy(use_numpy):
+        x = np.arange(width, dtype=np.float32) + 0.5 - cx
+        y = np.arange(height, dtype=np.float32) + 0.5 - cy
+        turns = np.arctan2(y[:, None], x[None, :]) / (2 * np.pi)
+        turns = (turns - angle / 360) % 1
+        levels = np.minimum(turns * 256, 255).astype(np.uint8)
+        return PilImage.fromarray(levels, "L")
+
+    # One slice per level, drawn by Pillow
+    radius = math.hypot(max(cx, width - cx), max(cy, height - cy)) + 2
+    box = (cx - radius, cy - radius, cx + radius, cy + radius)
+    levels = PilImage.new("L", size, 0)
+    draw = ImageDraw.Draw(levels)
+
+    for level in range(256):
+        start = angle + level * 360 / 256
+        draw.pieslice(box, start, start + 360 / 256 + 0.5, fill=level)
+
+    return levels
+
+
+def linear_gradient(
+    size: Tuple[int, int],
+    start: Color,
+    end: Color,
+    angle: float = 0,
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Linear gradient between two colors
+
+    Parameters
+    ----------
+    size : Tuple[int, int]
+        Size of the gradient
+    start : Color
+        First color
+    end : Color
+        Last color
+    angle : float, optional
+        Direction in degrees, see :func:`linear_levels`, by default 0
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        The RGBA gradient
+    """
+    levels = linear_levels(size, angle, use_numpy=use_numpy)
+    lut = color_lut([(0, start), (1, end)])
+    return colorize(levels, lut, use_numpy=use_numpy)
+
+
+def radial_gradient(
+    size: Tuple[int, int],
+    inner: Color,
+    outer: Color,
+    center: Optional[Tuple[float, float]] = None,
+    radius: Optional[float] = None,
+    *,
+    use_numpy: Optional[bool] = None,
+) -> Image:
+    """Radial gradient between two colors
+
+    Parameters
+    ----------
+    size : Tuple[int, int]
+        Size of the gradient
+    inner : Color
+        Color at the center
+    outer : Color
+        Color at the radius and beyond
+    center : Tuple[float, float], optional
+        Center of the gradient, by default the center of the image
+    radius : float, optional
+        Radius of the gradient, by default the distance to the farthest
+        corner
+    use_numpy : bool, optional
+        Backend to use, by default NumPy when it is installed
+
+    Returns
+    -------
+    PIL.Image.Image
+        The RGBA gradient
+    """
+    levels = radial_levels(size, center, radius, use_numpy=use_numpy)
+    lut = color_lut([(0, inner), (1, outer)])
+    return colorize(levels, lut, use_numpy=use_numpy)
@@ -0,0 +1,252 @@
+"""Opt-in timing of editor operations
+
+Every public :class:`~easy_pil.Editor` operation, the components of a
+:class:`~easy_pil.Workspace`, the instructions of an
+:class:`~easy_pil.AioEditor` and image encoding report a
+:class:`ProfileEvent` to the registered sinks. A sink is any callable
+taking the event, see :class:`Recorder` and :class:`Counters`.
+
+Nothing is measured while no sink is registered, the instrumented code
+then only checks :func:`enabled`.
+
+Steps run inside another step are reported too, with ``nested`` set:
+a workspace component reports a ``workspace`` event and a nested
+``editor`` event for the editor method it calls.
+
+    with profiling.profile() as recorder:
+        card = workspace.generate_image()
+
+    for event in recorder.events:
+        print(event.kind, event.name, event.duration)
+"""
+from __future__ import annotations
+
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Literal, Optional, Tuple
+
+EventKind = Literal["editor", "workspace", "aio", "encode"]
+
+
+@dataclass(frozen=True)
+class ProfileEvent:
+    """One measured step
+
+    Attributes
+    ----------
+    kind : Literal["editor", "workspace", "aio", "encode"]
+        What ran: an editor method, a workspace component, an aio editor
+        instruction or the encoding of an image
+    name : str
+        Method name, ``identifier:function`` of a workspace component or
+        image format of an encoding
+    duration : float
+        Wall time in seconds
+    size : Tuple[int, int]
+        Size of the image after the step
+    allocated : int, optional
+        Change of the Python heap in bytes as seen by ``tracemalloc``,
+        only traced when :func:`profile` is used with ``trace_memory``.
+        Pixel buffers are allocated by Pillow outside of the Python heap
+        and are not included, so this is not the memory used by images.
+    nested : bool
+        Whether the step ran inside another measured step of the same
+        thread, its time is then part of the outer step too
+    """
+
+    kind: EventKind
+    name: str
+    duration: float
+    size: Tuple[int, int]
+    allocated: Optional[int] = None
+    nested: bool = False
+
+
+Sink = Callable[[ProfileEvent], None]
+
+_sinks: List[Sink] = []
+_lock = threading.Lock()
+
+# Outermost step running in each thread
+_running = threading.local()
+
+
+def enabled() -> bool:
+    """Whether any sink is registered"""
+    return bool(_sinks)
+
+
+def add_sink(sink: Sink) -> None:
+    """Register a sink that receives every event
+
+    Parameters
+    ----------
+    sink : Callable[[ProfileEvent], None]
+        Called with each event, from the thread that ran the step
+    """
+    global _sinks
+
+    with _lock:
+        # Replaced instead of changed, so steps never iterate over a list
+        # that is being changed
+        _sinks = [*_sinks, sink]
+
+
+def remove_sink(sink: Sink) -> None:
+    """Unregister a sink
+
+    Parameters
+    ----------
+    sink : Callable[[ProfileEvent], None]
+        A registered sink
+
+    Raises
+    ------
+    ValueError
+        if the sink is not registered
+    """
+    global _sinks
+
+    with _lock:
+        sinks = list(_sinks)
+        sinks.remove(sink)
+        _sinks = sinks
+
+
+def start() -> Tuple[float, Optional[int]]:
+    """Start measuring a step, see :func:`finish`"""
+    traced = None
+    if tracemalloc.is_tracing():
+        traced = tracemalloc.get_traced_memory()[0]
+
+    started = time.perf_counter(), traced
+    if getattr(_running, "step", None) is None:
+        _running.step = started
+
+    return started
+
+
+def finish(
+    kind: EventKind,
+    name: str,
+    started: Tuple[float, Optional[int]],
+    size: Tuple[int, int],
+) -> None:
+    """Report a step started with :func:`start` to the sinks
+
+    Parameters
+    ----------
+    kind : Literal["editor", "workspace", "aio", "encode"]
+        Kind of the step
+    name : str
+        Name of the step
+    started : Tuple[float, Optional[int]]
+        Value returned by :func:`start`
+    size : Tuple[int, int]
+        Size of the image after the step
+    """
+    duration = time.perf_counter() - started[0]
+    allocated = None
+    if started[1] is not None and tracemalloc.is_tracing():
+        allocated = tracemalloc.get_traced_memory()[0] - started[1]
+
+    nested = getattr(_running, "step", None) is not started
+    if not nested:
+        _running.step = None
+
+    event = ProfileEvent(kind, name, duration, tuple(size), allocated, nested)
+    for sink in _sinks:
+        sink(event)
+
+
+class Recorder:
+    """Sink keeping every event in order"""
+
+    def __init__(self) -> None:
+        self.events: List[ProfileEvent] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: ProfileEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def total(self, kind: Optional[EventKind] = None) -> float:
+        """Seconds spent in the recorded steps, optionally of one kind
+
+        Without ``kind`` only the outermost steps are summed, so the time
+        of nested steps is not counted twice. With ``kind`` every step of
+        that kind is summed, nested or not.
+        """
+        return sum(
+            event.duration
+            for event in self.events
+            if (not event.nested if kind is None else event.kind == kind)
+        )
+
+
+class Counters:
+    """Sink counting calls and seconds per step, like metric counters
+
+    Attributes
+    ----------
+    calls : Dict[Tuple[str, str], int]
+        Number of calls keyed by ``(kind, name)``
+    seconds : Dict[Tuple[str, str], float]
+        Total wall time keyed by ``(kind, name)``
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[Tuple[str, str], int] = {}
+        self.seconds: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: ProfileEvent) -> None:
+        key = (event.kind, event.name)
+        with self._lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+            self.seconds[key] = self.seconds.get(key, 0.0) + event.duration
+
+    def reset(self) -> None:
+        """Set every counter back to zero"""
+        with self._lock:
+            self.calls.clear()
+            self.seconds.clear()
+
+
+@contextmanager
+def profile(
+    sink: Optional[Sink] = None, trace_memory: bool = False
+) -> Iterator[Sink]:
+    """Register a sink for the duration of a block
+
+    Parameters
+    ----------
+    sink : Callable[[ProfileEvent], None], optional
+        Sink to register, by default a new :class:`Recorder`
+    trace_memory : bool, optional
+        Trace Python heap allocations with ``tracemalloc`` while the
+        block runs, which slows everything down, by default False. Pillow
+        pixel buffers are not traced.
+
+    Yields
+    ------
+    Callable[[ProfileEvent], None]
+        The registered sink
+    """
+    if sink is None:
+        sink = Recorder()
+
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    add_sink(sink)
+    try:
+        yield sink
+    finally:
+        remove_sink(sink)
+        if tracing:
+            tracemalloc.stop()
@@ -0,0 +1,738 @@
+from __future__ import annotations
+
+import base64
+import inspect
+import json
+import os
+from dataclasses import dataclass, field, fields, replace
+from io import BytesIO
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from PIL import Image as PilImage, ImageFont
+from PIL.Image import Image
+
+from . import profiling
+from .canvas import Canvas
+from .editor import Editor
+from .font import Font, font_registry, fonts_directory
+from .gradient import Gradient
+from .text import Text
+from .types.common import Color
+from .types.workspace import ComponentKwargs
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+FORMAT_VERSION = 1
+
+_OPTION_HINTS = get_type_hints(ComponentKwargs)
+_MISSING: Any = object()
+
+
+@dataclass(frozen=True)
+class Var:
+    """Placeholder for a component option given when rendering
+
+    ``Var`` can be used as an option or inside tuples, lists, dicts,
+    :class:`Text` and :class:`Gradient` options, for example
+    ``{"text": Var("username")}``, ``{"position": (Var("x", 10), 20)}``
+    or ``{"texts": [Text(Var("username"), font)]}``.
+
+    Parameters
+    ----------
+    name : str
+        Name of the variable
+    default : Any, optional
+        Value used when the variable is not given, by default the
+        variable is required
+    """
+
+    name: str
+    default: Any = _MISSING
+
+    def resolve(self, variables: Mapping[str, Any]) -> Any:
+        """Value of the variable
+
+        Raises
+        ------
+        ValueError
+            if a required variable is not given
+        """
+        try:
+            return variables[self.name]
+        except KeyError:
+            if self.default is _MISSING:
+                raise ValueError(
+                    f"No value for variable '{self.name}'"
+                ) from None
+
+            return self.default
+
+
+def has_vars(value: Any) -> bool:
+    """Whether an option contains a :class:`Var`"""
+    if isinstance(value, Var):
+        return True
+    if isinstance(value, (tuple, list)):
+        return any(has_vars(item) for item in value)
+    if isinstance(value, dict):
+        return any(has_vars(k) or has_vars(v) for k, v in value.items())
+    if isinstance(value, Text):
+        return has_vars([value.text, value.font, value.color])
+    if isinstance(value, Gradient):
+        return has_vars([getattr(value, f.name) for f in fields(value)])
+
+    return False
+
+
+def bind(value: Any, variables: Mapping[str, Any]) -> Any:
+    """Replace the :class:`Var` placeholders of an option
+
+    The option is not changed, containers, :class:`Text` and
+    :class:`Gradient` options are copied.
+
+    Parameters
+    ----------
+    value : Any
+        The option
+    variables : Mapping[str, Any]
+        Values of the variables
+
+    Returns
+    -------
+    Any
+        The option with the values of the variables
+    """
+    if isinstance(value, Var):
+        return value.resolve(variables)
+    if isinstance(value, tuple):
+        return tuple(bind(item, variables) for item in value)
+    if isinstance(value, list):
+        return [bind(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {
+            bind(k, variables): bind(v, variables) for k, v in value.items()
+        }
+    if isinstance(value, Text):
+        return Text(
+            bind(value.text, variables),
+            bind(value.font, variables),
+            bind(value.color, variables),
+        )
+    if isinstance(value, Gradient):
+        return replace(
+            value,
+            **{
+                f.name: bind(getattr(value, f.name), variables)
+                for f in fields(value)
+            },
+        )
+
+    return value
+
+
+def bind_options(
+    options: Mapping[str, Any],
+    variables: Mapping[str, Any],
+    keys: Optional[Tuple[str, ...]] = None,
+) -> Dict[str, Any]:
+    """Copy component options with their placeholders replaced
+
+    Parameters
+    ----------
+    options : Mapping[str, Any]
+        Component options
+    variables : Mapping[str, Any]
+        Values of the variables
+    keys : Tuple[str, ...], optional
+        Options that contain placeholders, by default every option is
+        checked
+
+    Returns
+    -------
+    Dict[str, Any]
+        The options with the values of the variables
+    """
+    bound = dict(options)
+    if keys is None:
+        keys = tuple(key for key, value in bound.items() if has_vars(value))
+
+    for key in keys:
+        bound[key] = _preload(key, bind(bound[key], variables))
+
+    return bound
+
+
+class RenderedLayer(NamedTuple):
+    image: Image
+    bbox: Optional[Tuple[int, int, int, int]]
+    opaque: bool
+
+
+def rendered_layer(image: Image) -> RenderedLayer:
+    """Area and opacity of a drawn layer"""
+    opaque = image.getextrema()[3][0] == 255
+    return RenderedLayer(image, image.getbbox(), opaque)
+
+
+def flatten_layer(
+    output: Optional[Image], layer: RenderedLayer, owned: bool
+) -> Optional[Image]:
+    """Composite a layer over the layers below it
+
+    Parameters
+    ----------
+    output : PIL.Image.Image, optional
+        The layers below, None if there are none
+    layer : RenderedLayer
+        Layer to composite, fully transparent layers are skipped
+    owned : bool
+        Whether the layer image can become the output without a copy
+
+    Returns
+    -------
+    PIL.Image.Image, optional
+        The composited image
+    """
+    if layer.bbox is None:
+        return output
+
+    if output is None or layer.opaque:
+        return layer.image if owned else layer.image.copy()
+
+    output.alpha_composite(layer.image, dest=layer.bbox[:2], source=layer.bbox)
+    return output
+
+
+class Component(NamedTuple):
+    """A compiled component
+
+    Attributes
+    ----------
+    identifier : str
+        Unique name of the component
+    func : Callable
+        The :class:`Editor` method
+    options : Tuple[Tuple[str, Any], ...]
+        Keyword arguments of the method
+    variables : Tuple[str, ...]
+        Options that contain :class:`Var` placeholders
+    """
+
+    identifier: str
+    func: Callable[..., Any]
+    options: Tuple[Tuple[str, Any], ...]
+    variables: Tuple[str, ...] = ()
+
+
+class Layer(NamedTuple):
+    """A compiled layer
+
+    Attributes
+    ----------
+    name : str
+        Name of the layer
+    background : Color
+        Background color of the layer
+    components : Tuple[Component, ...]
+        Components drawn in order
+    """
+
+    name: str
+    background: Color
+    components: Tuple[Component, ...]
+
+
+def _editor_method(func_name: str) -> Callable[..., Any]:
+    func = getattr(Editor, func_name, None)
+
+    # Editor operations are wrapped by _mutates
+    if not callable(func) or not hasattr(func, "__wrapped__"):
+        raise ValueError(f"'{func_name}' is not an Editor operation")
+
+    return func
+
+
+def _preload(key: str, value: Any) -> Any:
+    if isinstance(value, Font):
+        return value.font
+
+    if key == "image":
+        if isinstance(value, bytes):
+            value = BytesIO(value)
+        if isinstance(value, (str, Path, BytesIO, Canvas, Editor)):
+            value = Editor(value).image
+        if isinstance(value, Image):
+            value.load()
+
+    return value
+
+
+def _validate(
+    identifier: str, func: Callable[..., Any], options: Mapping[str, Any]
+) -> None:
+    try:
+        inspect.signature(func).bind(None, **options)
+    except TypeError as e:
+        raise ValueError(
+            f"Invalid options for component '{identifier}': {e}"
+        ) from None
+
+    for key, value in options.items():
+        hint = _OPTION_HINTS.get(key)
+        if has_vars(value):
+            continue
+        if get_origin(hint) is Literal and value not in get_args(hint):
+            raise ValueError(
+                f"Invalid '{key}' option for component '{identifier}': "
+                f"{value!r} is not one of {get_args(hint)}"
+            )
+
+
+def compile_template(
+    size: Tuple[int, int], layers: Mapping[str, Dict[str, Any]]
+) -> Template:
+    """Compile the layers of a workspace, see :meth:`Workspace.compile`
+
+    Parameters
+    ----------
+    size : Tuple[int, int]
+        Size of the generated image
+    layers : Mapping[str, Dict[str, Any]]
+        Layers of the workspace
+
+    Returns
+    -------
+    Template
+        The compiled template
+
+    Raises
+    ------
+    ValueError
+        if a component uses an unknown function or invalid options
+    """
+    compiled = []
+
+    for name, layer in layers.items():
+        components = []
+
+        for identifier, config in layer["components"].items():
+            func = _editor_method(config["func_name"])
+            options = {
+                key: _preload(key, value)
+                for key, value in config["options"].items()
+            }
+            _validate(identifier, func, options)
+            variables = tuple(
+                key for key, value in options.items() if has_vars(value)
+            )
+            components.append(
+                Component(identifier, func, tuple(options.items()), variables)
+            )
+
+        compiled.append(
+            Layer(name, layer["metadata"]["background"], tuple(components))
+        )
+
+    return Template((int(size[0]), int(size[1])), tuple(compiled))
+
+
+def _dump_font(font: ImageFont.FreeTypeFont) -> Dict[str, Any]:
+    if not isinstance(font.path, (str, Path)):
+        raise ValueError("Only fonts loaded from a file can be serialized")
+
+    path = os.path.abspath(font.path)
+    if os.path.commonpath([path, fonts_directory]) == fonts_directory:
+        # Bundled fonts are found in the installed package
+        path = os.path.relpath(path, fonts_directory)
+        location = "bundled"
+    else:
+        location = "path"
+
+    return {
+        location: path,
+        "size": font.size,
+        "index": font.index,
+        "encoding": font.encoding,
+        "layout_engine": font.layout_engine,
+    }
+
+
+def _load_font(data: Dict[str, Any]) -> ImageFont.FreeTypeFont:
+    if "bundled" in data:
+        path = os.path.join(fonts_directory, data["bundled"])
+    else:
+        path = data["path"]
+
+    return font_registry.get(
+        path,
+        data["size"],
+        data["index"],
+        data["encoding"],
+        data["layout_engine"],
+    )
+
+
+def _dump(value: Any, binary: bool) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, Var):
+        data = {"name": value.name}
+        if value.default is not _MISSING:
+            data["default"] = _dump(value.default, binary)
+        return {"$var": data}
+
+    if isinstance(value, (tuple, list)):
+        return [_dump(item, binary) for item in value]
+
+    if isinstance(value, dict):
+        return {
+            "$map": [
+                [_dump(k, binary), _dump(v, binary)] for k, v in value.items()
+            ]
+        }
+
+    if isinstance(value, Font):
+        value = value.font
+
+    if isinstance(value, ImageFont.FreeTypeFont):
+        return {"$font": _dump_font(value)}
+
+    if isinstance(value, Image):
+        _bytes = BytesIO()
+        value.save(_bytes, "png", compress_level=1)
+        data = _bytes.getvalue()
+        return {"$image": data if binary else base64.b64encode(data).decode()}
+
+    if isinstance(value, Text):
+        return {"$text": _dump([value.text, value.font, value.color], binary)}
+
+    if isinstance(value, Gradient):
+        return {
+            "$gradient": _dump(
+                [
+                    value.colors,
+                    value.kind,
+                    value.angle,
+                    value.center,
+                    value.radius,
+                ],
+                binary,
+            )
+        }
+
+    raise TypeError(f"Can not serialize {type(value).__name__} options")
+
+
+def _load(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_load(item) for item in value)
+
+    if not isinstance(value, dict):
+        return value
+
+    (tag, data), *rest = value.items()
+    if rest:
+        raise ValueError(f"Invalid template value {value!r}")
+
+    if tag == "$map":
+        return {_load(k): _load(v) for k, v in data}
+    if tag == "$var":
+        return Var(data["name"], _load(data.get("default", _MISSING)))
+    if tag == "$font":
+        return _load_font(data)
+    if tag == "$image":
+        if isinstance(data, str):
+            data = base64.b64decode(data)
+        image = PilImage.open(BytesIO(data))
+        image.load()
+        return image
+    if tag == "$text":
+        return Text(*_load(data))
+    if tag == "$gradient":
+        return Gradient(*_load(data))
+
+    raise ValueError(f"Unknown template value '{tag}'")
+
+
+@dataclass(frozen=True)
+class Template:
+    """Immutable precompiled workspace, made by :meth:`Workspace.compile`
+
+    Functions are resolved, fonts and static images are loaded and
+    options are validated when the template is compiled, rendering only
+    draws. Templates can be serialized with :meth:`to_json` and
+    :meth:`to_msgpack` to ship them to worker processes.
+
+    Options may contain :class:`Var` placeholders whose values are given
+    to :meth:`render`. Layers without placeholders are drawn once and
+    reused, a template is never changed by rendering and can be rendered
+    from many threads at once.
+
+    Parameters
+    ----------
+    size : Tuple[int, int]
+        Size of the generated image
+    layers : Tuple[Layer, ...]
+        Compiled layers from bottom to top
+    """
+
+    size: Tuple[int, int]
+    layers: Tuple[Layer, ...]
+    # Drawn layers without placeholders, keyed by their index
+    _static: Dict[int, RenderedLayer] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "size", tuple(self.size))
+        object.__setattr__(self, "layers", tuple(self.layers))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {**self.__dict__, "_static": {}}
+
+    @property
+    def variables(self) -> Tuple[str, ...]:
+        """Names of the variables used by the template"""
+        names: Dict[str, None] = {}
+
+        def collect(value: Any) -> None:
+            if isinstance(value, Var):
+                names[value.name] = None
+            elif isinstance(value, (tuple, list)):
+                for item in value:
+                    collect(item)
+            elif isinstance(value, dict):
+                for item in value.items():
+                    collect(item)
+            elif isinstance(value, Text):
+                collect([value.text, value.font, value.color])
+            elif isinstance(value, Gradient):
+                collect([getattr(value, f.name) for f in fields(value)])
+
+        for layer in self.layers:
+            for component in layer.components:
+                collect(component.options)
+
+        return tuple(names)
+
+    def _draw_layer(
+        self, layer: Layer, variables: Mapping[str, Any]
+    ) -> RenderedLayer:
+        editor = Editor(Canvas(self.size, color=layer.background))
+
+        for identifier, func, options, keys in layer.components:
+            if keys:
+                kwargs = bind_options(dict(options), variables, keys)
+            else:
+                kwargs = dict(options)
+
+            if not profiling.enabled():
+                func(editor, **kwargs)
+                continue
+
+            started = profiling.start()
+            try:
+                func(editor, **kwargs)
+            finally:
+                profiling.finish(
+                    "workspace",
+                    f"{identifier}:{func.__name__}",
+                    started,
+                    editor.image.size,
+                )
+
+        return rendered_layer(editor.image)
+
+    def render(
+        self, context: Optional[Mapping[str, Any]] = None, **variables: Any
+    ) -> Editor:
+        """Draw the template
+
+        Parameters
+        ----------
+        context : Mapping[str, Any], optional
+            Values of the :class:`Var` placeholders
+        **variables : Any
+            Values of the placeholders, override the context
+
+        Returns
+        -------
+        Editor
+            The editor instance
+
+        Raises
+        ------
+        ValueError
+            if a required variable is not given
+        """
+        if context is not None:
+            variables = {**context, **variables}
+
+        output: Optional[Image] = None
+
+        for index, layer in enumerate(self.layers):
+            if any(component.variables for component in layer.components):
+                rendered = self._draw_layer(layer, variables)
+                output = flatten_layer(output, rendered, True)
+                continue
+
+            # Shared between renders, flatten_layer copies it when needed
+            rendered = self._static.get(index)
+            if rendered is None:
+                rendered = self._draw_layer(layer, variables)
+                self._static[index] = rendered
+            output = flatten_layer(output, rendered, False)
+
+        if output is None:
+            return Editor(Canvas(self.size, color=(0, 0, 0, 0)))
+
+        return Editor(output)
+
+    def to_dict(self, binary: bool = False) -> Dict[str, Any]:
+        """Plain data of the template
+
+        Parameters
+        ----------
+        binary : bool, optional
+            Keep images as bytes instead of base64 text, by default False
+
+        Returns
+        -------
+        Dict[str, Any]
+            Lists, dicts, strings and numbers only
+
+        Raises
+        ------
+        TypeError
+            if an option can not be serialized
+        """
+        return {
+            "version": FORMAT_VERSION,
+            "size": list(self.size),
+            "layers": [
+                {
+                    "name": layer.name,
+                    "background": _dump(layer.background, binary),
+                    "components": [
+                        {
+                            "identifier": identifier,
+                            "func": func.__name__,
+                            "options": {
+                                key: _dump(value, binary)
+                                for key, value in options
+                            },
+                        }
+                        for identifier, func, options, _ in layer.components
+                    ],
+                }
+                for layer in self.layers
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Template:
+        """Load a template made by :meth:`to_dict`
+
+        Parameters
+        ----------
+        data : Mapping[str, Any]
+            Data of the template
+
+        Returns
+        -------
+        Template
+            The template
+
+        Raises
+        ------
+        ValueError
+            if the data is not a template of a supported version
+        """
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported template version {data.get('version')!r}"
+            )
+
+        layers: List[Layer] = []
+        for layer in data["layers"]:
+            components = []
+            for component in layer["components"]:
+                options = tuple(
+                    (key, _load(value))
+                    for key, value in component["options"].items()
+                )
+                variables = tuple(
+                    key for key, value in options if has_vars(value)
+                )
+                components.append(
+                    Component(
+                        component["identifier"],
+                        _editor_method(component["func"]),
+                        options,
+                        variables,
+                    )
+                )
+            layers.append(
+                Layer(
+                    layer["name"],
+                    _load(layer["background"]),
+                    tuple(components),
+                )
+            )
+
+        return cls(data["size"], layers)
+
+    def to_json(self) -> str:
+        """Serialize the template to JSON"""
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> Template:
+        """Load a template serialized with :meth:`to_json`"""
+        return cls.from_dict(json.loads(data))
+
+    def to_msgpack(self) -> bytes:
+        """Serialize the template to msgpack
+
+        Raises
+        ------
+        RuntimeError
+            if msgpack is not installed
+        """
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+
+        return msgpack.packb(self.to_dict(binary=True))
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> Template:
+        """Load a template serialized with :meth:`to_msgpack`
+
+        Raises
+        ------
+        RuntimeError
+            if msgpack is not installed
+        """
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+
+        return cls.from_dict(msgpack.unpackb(data, strict_map_key=False))
@@ -0,0 +1,572 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, List, Literal, NamedTuple, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .font import font_registry
+from .types.common import Color
+
+
+class TextMetrics(NamedTuple):
+    """Measurements of a text
+
+    Attributes
+    ----------
+    width : float
+        Advance width, the length of the text like ``font.getlength``
+    bbox : Tuple[int, int, int, int]
+        Bounding box relative to the anchor like ``font.getbbox``
+    """
+
+    width: float
+    bbox: Tuple[int, int, int, int]
+
+
+class GlyphRun(NamedTuple):
+    """Rendered glyphs of a text
+
+    Attributes
+    ----------
+    mask : PIL.Image.Image
+        ``L`` mode coverage of the glyphs
+    offset : Tuple[int, int]
+        Position of the mask relative to the text position
+    """
+
+    mask: Image.Image
+    offset: Tuple[int, int]
+
+
+class TextLayoutCache:
+    """Least recently used cache of text measurements and glyph masks
+
+    Entries are keyed by the font instance, the text, the anchor, the
+    stroke width and for glyph masks the sub-pixel start of the text.
+    Static labels drawn on every render are then only shaped and
+    rasterized by FreeType once, and stamped in with their fill color.
+    Cached masks must be treated as read only.
+
+    The font instance is part of the key, fonts must not be changed (for
+    example with ``set_variation_by_name``) once they are used.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of entries to keep, by default 1024
+    max_bytes : int, optional
+        Maximum memory used by the glyph masks in bytes, by default 16 MiB
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: int = 16 << 20) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[Tuple[Any, ...], Any] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the cached glyph masks in bytes"""
+        return self._bytes
+
+    def _lookup(self, key: Tuple[Any, ...]) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+            return value
+
+    def _store(self, key: Tuple[Any, ...], value: Any) -> None:
+        with self._lock:
+            if key in self._entries:
+                return
+
+            self._entries[key] = value
+            self._bytes += _nbytes(value)
+            self._evict()
+
+    def metrics(
+        self,
+        font: ImageFont.FreeTypeFont,
+        text: str,
+        anchor: Optional[str] = None,
+        stroke_width: int = 0,
+    ) -> TextMetrics:
+        """Measure a text, using the cached measurement if there is one
+
+        Parameters
+        ----------
+        font : ImageFont.FreeTypeFont
+            Font of the text
+        text : str
+            Text to measure
+        anchor : str, optional
+            Text anchor of the bounding box, by default None
+        stroke_width : int, optional
+            Stroke width, by default 0
+
+        Returns
+        -------
+        TextMetrics
+            Advance width and bounding box
+        """
+        key = ("metrics", font, text, anchor, stroke_width)
+        metrics = self._lookup(key)
+
+        if metrics is None:
+            metrics = TextMetrics(
+                font.getlength(text),
+                font.getbbox(text, anchor=anchor, stroke_width=stroke_width),
+            )
+            self._store(key, metrics)
+
+        return metrics
+
+    def glyphs(
+        self,
+        font: ImageFont.FreeTypeFont,
+        text: str,
+        anchor: Optional[str] = None,
+        start: Tuple[float, float] = (0, 0),
+    ) -> GlyphRun:
+        """Rasterize a text, using the cached glyph mask if there is one
+
+        Parameters
+        ----------
+        font : ImageFont.FreeTypeFont
+            Font of the text
+        text : str
+            Single line text
+        anchor : str, optional
+            Text anchor, by default None
+        start : Tuple[float, float], optional
+            Fractional part of the text position, between 0 and 1, by
+            default (0, 0)
+
+        Returns
+        -------
+        GlyphRun
+            The glyph mask and its offset
+        """
+        key = ("glyphs", font, text, anchor, tuple(start))
+        run = self._lookup(key)
+
+        if run is None:
+            # The glyphs are drawn by ImageDraw at the same fractional
+            # position, with a margin as the position can move them by a
+            # pixel. White on black keeps the mask values.
+            left, top, right, bottom = font.getbbox(text, anchor=anchor)
+            x, y = max(2 - left, 0), max(2 - top, 0)
+            mask = Image.new("L", (x + right + 2, y + bottom + 2))
+            ImageDraw.Draw(mask).text(
+                (x + start[0], y + start[1]),
+                text,
+                255,
+                font=font,
+                anchor=anchor,
+            )
+            run = GlyphRun(mask, (-x, -y))
+            self._store(key, run)
+
+        return run
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.maxsize or self._bytes > self.max_bytes
+        ):
+            _, value = self._entries.popitem(last=False)
+            self._bytes -= _nbytes(value)
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, GlyphRun):
+        return value.mask.width * value.mask.height
+
+    return 0
+
+
+text_layout_cache = TextLayoutCache()
+
+
+def text_metrics(
+    font: ImageFont.FreeTypeFont,
+    text: str,
+    anchor: Optional[str] = None,
+    stroke_width: int = 0,
+    cache: Optional[TextLayoutCache] = None,
+) -> TextMetrics:
+    """Measure a text with the shared text layout cache
+
+    Parameters
+    ----------
+    font : ImageFont.FreeTypeFont
+        Font of the text
+    text : str
+        Text to measure
+    anchor : str, optional
+        Text anchor of the bounding box, by default None
+    stroke_width : int, optional
+        Stroke width, by default 0
+    cache : TextLayoutCache, optional
+        Cache to use instead of the shared one, by default None
+
+    Returns
+    -------
+    TextMetrics
+        Advance width and bounding box
+    """
+    if cache is None:
+        cache = text_layout_cache
+
+    return cache.metrics(font, text, anchor, stroke_width)
+
+
+def draw_text(
+    draw: ImageDraw.ImageDraw,
+    position: Tuple[float, float],
+    text: str,
+    fill: Color,
+    font: Optional[ImageFont.FreeTypeFont] = None,
+    anchor: Optional[str] = None,
+    stroke_width: int = 0,
+    stroke_fill: Optional[Color] = None,
+    cache: Optional[TextLayoutCache] = None,
+) -> None:
+    """Draw a text like ``ImageDraw.text`` with cached glyph masks
+
+    Texts with several lines or a stroke, texts at negative fractional
+    positions and fonts that are not FreeType fonts are drawn by
+    ``ImageDraw.text``.
+
+    Parameters
+    ----------
+    draw : ImageDraw.ImageDraw
+        Draw context of the image
+    position : Tuple[float, float]
+        Position of the anchor
+    text : str
+        Text to draw
+    fill : Color
+        Color of the text
+    font : ImageFont.FreeTypeFont, optional
+        Font of the text, by default None
+    anchor : str, optional
+        Text anchor, by default None
+    stroke_width : int, optional
+        Stroke width, by default 0
+    stroke_fill : Color, optional
+        Stroke color, by default the fill color
+    cache : TextLayoutCache, optional
+        Cache to use instead of the shared one, by default None
+    """
+    start = (math.modf(position[0])[0], math.modf(position[1])[0])
+
+    if (
+        not isinstance(font, ImageFont.FreeTypeFont)
+        or "\n" in text
+        or stroke_width
+        or min(start) < 0
+        or draw.fontmode != "L"
+    ):
+        draw.text(
+            position,
+            text,
+            fill,
+            font=font,
+            anchor=anchor,
+            stroke_width=stroke_width,
+            stroke_fill=stroke_fill,
+        )
+        return
+
+    if cache is None:
+        cache = text_layout_cache
+
+    x, y = int(position[0]), int(position[1])
+    mask, offset = cache.glyphs(font, text, anchor, start)
+    draw.bitmap((x + offset[0], y + offset[1]), mask, fill=fill)
+
+
+@dataclass(frozen=True)
+class TextBoxLayout:
+    """Text fitted in a box by :func:`fit_text`
+
+    Attributes
+    ----------
+    font : ImageFont.FreeTypeFont
+        Font at the chosen size
+    size : int
+        Chosen font size
+    lines : Tuple[str, ...]
+        Lines of the text
+    line_height : int
+        Height of one line, ascent and descent of the font
+    spacing : int
+        Space between lines
+    width : float
+        Width of the longest line
+    height : int
+        Height of all lines
+    truncated : bool
+        Whether the text did not fit at the minimum size and was cut
+    """
+
+    font: ImageFont.FreeTypeFont
+    size: int
+    lines: Tuple[str, ...]
+    line_height: int
+    spacing: int
+    width: float
+    height: int
+    truncated: bool = False
+
+
+def _width(font: ImageFont.FreeTypeFont, text: str) -> float:
+    # Candidate lines are measured without the text layout cache, they
+    # would evict the texts that are drawn again and again
+    return font.getlength(text)
+
+
+def _greedy(
+    font: ImageFont.FreeTypeFont, words: List[str], width: float
+) -> List[str]:
+    lines: List[str] = []
+    line = ""
+
+    for word in words:
+        candidate = f"{line} {word}" if line else word
+        if not line or _width(font, candidate) <= width:
+            line = candidate
+        else:
+            lines.append(line)
+            line = word
+
+    lines.append(line)
+    return lines
+
+
+def _optimal(
+    font: ImageFont.FreeTypeFont, words: List[str], width: float
+) -> List[str]:
+    # Minimum raggedness: the sum of the squared free space of every line
+    # but the last is minimized. A word wider than the box gets a line of
+    # its own.
+    count = len(words)
+    costs = [0.0] + [math.inf] * count
+    breaks = [0] * (count + 1)
+
+    for end in range(1, count + 1):
+        for start in range(end - 1, -1, -1):
+            line_width = _width(font, " ".join(words[start:end]))
+            if line_width > width and end - start > 1:
+                break
+
+            slack = 0.0 if end == count else max(width - line_width, 0) ** 2
+            if costs[start] + slack < costs[end]:
+                costs[end] = costs[start] + slack
+                breaks[end] = start
+
+    lines = []
+    end = count
+    while end > 0:
+        start = breaks[end]
+        lines.append(" ".join(words[start:end]))
+        end = start
+
+    return lines[::-1]
+
+
+def wrap_text(
+    font: ImageFont.FreeTypeFont,
+    text: str,
+    width: float,
+    wrap: Literal["none", "greedy", "optimal"] = "greedy",
+) -> List[str]:
+    """Break a text into lines that fit a width
+
+    Parameters
+    ----------
+    font : ImageFont.FreeTypeFont
+        Font of the text
+    text : str
+        Text to wrap, new lines are kept
+    width : float
+        Maximum width of a line
+    wrap : Literal["none", "greedy", "optimal"], optional
+        ``greedy`` fills every line as much as possible, ``optimal``
+        balances the lengths of the lines and ``none`` only breaks at new
+        lines, by default "greedy"
+
+    Returns
+    -------
+    List[str]
+        The lines, a single word wider than the width is not broken
+    """
+    if wrap not in ("none", "greedy", "optimal"):
+        raise ValueError(f"Unknown wrap mode '{wrap}'")
+
+    lines: List[str] = []
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        if wrap == "none" or len(words) < 2:
+            lines.append(" ".join(words))
+        elif wrap == "greedy":
+            lines.extend(_greedy(font, words, width))
+        else:
+            lines.extend(_optimal(font, words, width))
+
+    return lines
+
+
+def _ellipsize(
+    font: ImageFont.FreeTypeFont, line: str, width: float, ellipsis: str
+) -> str:
+    while line and _width(font, line + ellipsis) > width:
+        line = line[:-1]
+
+    return line.rstrip() + ellipsis
+
+
+def _layout(
+    font_path: Union[str, os.PathLike],
+    size: int,
+    text: str,
+    box_size: Tuple[float, float],
+    wrap: Literal["none", "greedy", "optimal"],
+    max_lines: Optional[int],
+    spacing: int,
+    cache: bool = True,
+) -> Tuple[TextBoxLayout, bool]:
+    font = font_registry.get(font_path, size, cache=cache)
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    lines = wrap_text(font, text, box_size[0], wrap)
+    width = max(_width(font, line) for line in lines)
+    height = len(lines) * line_height + (len(lines) - 1) * spacing
+
+    fits = (
+        width <= box_size[0]
+        and height <= box_size[1]
+        and (max_lines is None or len(lines) <= max_lines)
+    )
+    layout = TextBoxLayout(
+        font, size, tuple(lines), line_height, spacing, width, height
+    )
+
+    return layout, fits
+
+
+def fit_text(
+    text: str,
+    font_path: Union[str, os.PathLike],
+    box_size: Tuple[float, float],
+    min_size: int = 8,
+    max_size: int = 64,
+    wrap: Literal["none", "greedy", "optimal"] = "greedy",
+    max_lines: Optional[int] = None,
+    ellipsis: Optional[str] = "…",
+    spacing: int = 4,
+) -> TextBoxLayout:
+    """Find the largest font size a text fits a box with
+
+    The size is found with a binary search. Only the font of the result
+    is kept in the shared font registry, the sizes and lines tried are
+    not cached.
+
+    Parameters
+    ----------
+    text : str
+        Text to fit
+    font_path : Union[str, os.PathLike]
+        Path of the font
+    box_size : Tuple[float, float]
+        Width and height of the box
+    min_size : int, optional
+        Smallest font size, by default 8
+    max_size : int, optional
+        Largest font size, by default 64
+    wrap : Literal["none", "greedy", "optimal"], optional
+        Line breaking, see :func:`wrap_text`, by default "greedy"
+    max_lines : int, optional
+        Maximum number of lines, by default None
+    ellipsis : str, optional
+        Appended to the last line when the text does not fit at the
+        minimum size, None cuts the text without it, by default "…"
+    spacing : int, optional
+        Space between lines, by default 4
+
+    Returns
+    -------
+    TextBoxLayout
+        Font, size and lines of the text
+    """
+    if min_size > max_size:
+        raise ValueError("min_size must not be larger than max_size")
+
+    best = None
+    low, high = min_size, max_size
+    while low <= high:
+        size = (low + high) // 2
+        layout, fits = _layout(
+            font_path, size, text, box_size, wrap, max_lines, spacing, False
+        )
+        if fits:
+            best = layout
+            low = size + 1
+        else:
+            high = size - 1
+
+    if best is not None:
+        return replace(best, font=font_registry.get(font_path, best.size))
+
+    # Even the minimum size overflows, keep the lines that fit and cut
+    # the last one
+    layout, _ = _layout(
+        font_path, min_size, text, box_size, wrap, max_lines, spacing
+    )
+    font = layout.font
+    count = int((box_size[1] + spacing) // (layout.line_height + spacing))
+    if max_lines is not None:
+        count = min(count, max_lines)
+    count = max(count, 1)
+
+    lines = list(layout.lines[:count])
+    if ellipsis is None:
+        ellipsis = ""
+    for index, line in enumerate(lines):
+        cut = index == len(lines) - 1 and len(layout.lines) > count
+        if cut or _width(font, line) > box_size[0]:
+            lines[index] = _ellipsize(font, line, box_size[0], ellipsis)
+
+    return TextBoxLayout(
+        font,
+        min_size,
+        tuple(lines),
+        layout.line_height,
+        spacing,
+        max(_width(font, line) for line in lines),
+        len(lines) * layout.line_height + (len(lines) - 1) * spacing,
+        truncated=True,
+    )
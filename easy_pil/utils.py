@@ -1,13 +1,29 @@
 import asyncio
 import functools
 from io import BytesIO
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
 import aiohttp
 import requests
 from PIL import Image
 from PIL.GifImagePlugin import GifImageFile
 
+# Modes whose pixels can be averaged by Image.reduce, palette and bilevel
+# images are converted first
+_REDUCE_MODES = {
+    "L",
+    "LA",
+    "La",
+    "RGB",
+    "RGBA",
+    "RGBa",
+    "RGBX",
+    "CMYK",
+    "YCbCr",
+    "I",
+    "F",
+}
+
 
 async def run_in_executor(func, **kwargs):
     """Run function in executor
@@ -18,12 +34,56 @@ async def run_in_executor(func, **kwargs):
         Function to run
     """
     func = functools.partial(func, **kwargs)
-    data = await asyncio.get_event_loop().run_in_executor(None, func)
+    data = await asyncio.get_running_loop().run_in_executor(None, func)
     return data
 
 
+def reduce_image(
+    image: Image.Image,
+    target_size: Tuple[int, int],
+    reducing_gap: float = 2.0,
+) -> Image.Image:
+    """Shrink an image while decoding it, keeping it larger than a size
+
+    JPEG images are decoded at a reduced scale, other images are reduced
+    by an integer factor right after decoding. Palette, bilevel and 16 bit
+    images are converted to RGBA before they are reduced. The result stays
+    at least ``reducing_gap`` times larger than ``target_size`` on both
+    sides, so a following resize or crop to ``target_size`` keeps its
+    quality.
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        Image to shrink, preferably not loaded yet
+    target_size : Tuple[int, int]
+        Size the image will be resized to afterwards
+    reducing_gap : float, optional
+        How much larger than ``target_size`` the image is kept,
+        by default 2.0
+
+    Returns
+    -------
+    PIL.Image.Image
+        The reduced image, or the same image when it is small enough
+    """
+    width, height = (max(int(i * reducing_gap), 1) for i in target_size)
+
+    image.draft(None, (width, height))
+    factor = min(image.width // width, image.height // height)
+
+    if factor >= 2:
+        if image.mode not in _REDUCE_MODES:
+            image = image.convert("RGBA")
+        image = image.reduce(factor)
+
+    return image
+
+
 def load_image(
-    link: str, raw: bool = False
+    link: str,
+    raw: bool = False,
+    target_size: Optional[Tuple[int, int]] = None,
 ) -> Union[Image.Image, GifImageFile]:
     """Load image from link
 
@@ -33,6 +93,9 @@ def load_image(
         Image link
     raw: bool
         if you want the raw image without any conversion
+    target_size: Tuple[int, int], optional
+        size the image will be resized to, large images are decoded at a
+        reduced size (see :func:`reduce_image`). Ignored for raw images.
 
     Returns
     -------
@@ -42,6 +105,8 @@ def load_image(
     _bytes = BytesIO(requests.get(link).content)
     image = Image.open(_bytes)
     if not raw:
+        if target_size:
+            image = reduce_image(image, target_size)
         image = image.convert("RGBA")
 
     return image
@@ -51,6 +116,7 @@ async def load_image_async(
     link: str,
     session: Optional[aiohttp.ClientSession] = None,
     raw: bool = False,
+    target_size: Optional[Tuple[int, int]] = None,
 ) -> Union[Image.Image, GifImageFile]:
     """Load image from link (async)
 
@@ -62,6 +128,9 @@ async def load_image_async(
         clientSession for making requests, defaults to None
     raw: bool
         if you want the raw image without any conversion
+    target_size: Tuple[int, int], optional
+        size the image will be resized to, large images are decoded at a
+        reduced size (see :func:`reduce_image`). Ignored for raw images.
 
     Returns
     -------
@@ -79,6 +148,8 @@ async def load_image_async(
     _bytes = BytesIO(data)
     image = Image.open(_bytes)
     if not raw:
+        if target_size:
+            image = reduce_image(image, target_size)
         image = image.convert("RGBA")
 
     return image
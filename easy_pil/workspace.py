@@ -1,19 +1,155 @@
 import random
 import string
-from typing import Any, Callable, Dict, Optional, Tuple, Union
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
 
+from PIL.Image import Image
+
+from . import profiling
 from .editor import Canvas, Editor
+from .template import (
+    RenderedLayer,
+    Template,
+    bind_options,
+    compile_template,
+    flatten_layer,
+    has_vars,
+    rendered_layer,
+)
 from .types.common import Color
 from .types.workspace import ComponentKwargs
 
+LayerRecord = Mapping[str, Any]
 
-class Workspace:
-    """Workspace class for working with layers and components"""
 
-    def __init__(self, size: Tuple[int, int]) -> None:
+def _component(func_name: str, options: Mapping[str, Any]) -> LayerRecord:
+    options = dict(options)
+
+    for value in options.values():
+        # Images are loaded once here instead of by concurrent renders
+        image = getattr(value, "image", value)
+        if isinstance(image, Image):
+            image.load()
+
+    return MappingProxyType(
+        {"func_name": func_name, "options": MappingProxyType(options)}
+    )
+
+
+def _layer(
+    background: Color, components: Mapping[str, LayerRecord]
+) -> LayerRecord:
+    return MappingProxyType(
+        {
+            "metadata": MappingProxyType({"background": background}),
+            "components": MappingProxyType(dict(components)),
+        }
+    )
+
+
+class Workspace:
+    """Workspace class for working with layers and components
+
+    Rendered layers are cached and only rendered again after they are
+    changed through the workspace methods. Call :meth:`invalidate` after
+    changing objects used in component options.
+
+    Layers and components are read-only records, the workspace methods
+    replace them along with the ``layers`` dict instead of changing them
+    (copy-on-write). Every render works on the ``layers`` dict taken when
+    it starts and never changes component options, so one workspace can
+    be rendered from many threads while it is being edited, each image
+    showing the workspace as it was before or after each edit. Edits
+    from several threads are applied one at a time. Objects used in
+    options, like images and lists, are shared by the records and must
+    not be changed while they are rendered.
+
+    Component options may contain :class:`~easy_pil.template.Var`
+    placeholders, for example ``{"text": Var("username")}``, whose values
+    are given to :meth:`generate_image` or :meth:`render`. Placeholders
+    are resolved in copies of the options, layers using them are drawn
+    for every call and the others stay cached.
+
+    Parameters
+    ----------
+    size : Tuple[int, int]
+        size of the generated image
+    cache_layers : bool, optional
+        keep rendered layers between :meth:`generate_image` calls, by
+        default True. When disabled, the first layer is drawn directly
+        onto the output and at most one other layer is kept in memory.
+    """
+
+    def __init__(
+        self, size: Tuple[int, int], cache_layers: bool = True
+    ) -> None:
         self.size = size
-        self.layers: dict = dict()
+        self.layers: Dict[str, LayerRecord] = dict()
         self.working_layer = None
+        self.cache_layers = cache_layers
+
+        # Rendered layers with the record they were rendered from
+        self._layer_cache: Dict[str, Tuple[LayerRecord, RenderedLayer]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_layer_cache"] = {}
+        state["layers"] = {
+            name: {
+                "metadata": dict(layer["metadata"]),
+                "components": {
+                    identifier: {
+                        "func_name": config["func_name"],
+                        "options": dict(config["options"]),
+                    }
+                    for identifier, config in layer["components"].items()
+                },
+            }
+            for name, layer in self.layers.items()
+        }
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self.layers = {
+            name: _layer(
+                layer["metadata"]["background"],
+                {
+                    identifier: _component(
+                        config["func_name"], config["options"]
+                    )
+                    for identifier, config in layer["components"].items()
+                },
+            )
+            for name, layer in self.layers.items()
+        }
+
+    def invalidate(self, layer_name: Optional[str] = None):
+        """Marks a layer as changed so it is rendered again
+
+        Parameters
+        ----------
+        layer_name : str, optional
+            name of the layer, every layer if not provided
+        """
+        with self._lock:
+            if layer_name is None:
+                self._layer_cache.clear()
+            else:
+                self._layer_cache.pop(layer_name, None)
+
+            # Renders started before are not cached
+            self._generation += 1
+
+    def __replace_layer(self, name: str, layer: LayerRecord) -> None:
+        # Called with the lock held
+        self.layers = {**self.layers, name: layer}
+        self._layer_cache.pop(name, None)
 
     def create_layer(self, name: str, background: Color = (0, 0, 0, 0)):
         """Creates a layer
@@ -25,12 +161,8 @@ class Workspace:
         background: Color
             background color of the layer
         """
-        self.layers[name] = {
-            "metadata": {
-                "background": background,
-            },
-            "components": dict(),
-        }
+        with self._lock:
+            self.__replace_layer(name, _layer(background, {}))
 
     def remove_layer(self, name: str):
         """Removes a layer
@@ -45,10 +177,15 @@ class Workspace:
         ValueError
             if the layer is not available in the workspace
         """
-        try:
-            self.layers.pop(name)
-        except KeyError:
-            raise ValueError("Invalid layer name")
+        with self._lock:
+            layers = dict(self.layers)
+            try:
+                layers.pop(name)
+            except KeyError:
+                raise ValueError("Invalid layer name")
+
+            self.layers = layers
+            self._layer_cache.pop(name, None)
 
     def update_layer(
         self,
@@ -72,14 +209,25 @@ class Workspace:
         ValueError
             if the layer is not available in the workspace
         """
-        if layer_name not in self.layers:
-            raise ValueError("Invalid layer name")
-
-        if background:
-            self.layers[layer_name]["metadata"]["background"] = background
-
-        if new_layer_name:
-            self.layers[new_layer_name] = self.layers.pop(layer_name)
+        with self._lock:
+            if layer_name not in self.layers:
+                raise ValueError("Invalid layer name")
+
+            if background:
+                layer = self.layers[layer_name]
+                self.__replace_layer(
+                    layer_name, _layer(background, layer["components"])
+                )
+
+            if new_layer_name:
+                layers = dict(self.layers)
+                layers[new_layer_name] = layers.pop(layer_name)
+                self.layers = layers
+
+                # Still valid, the layer record did not change
+                if layer_name in self._layer_cache:
+                    rendered = self._layer_cache.pop(layer_name)
+                    self._layer_cache[new_layer_name] = rendered
 
     def set_working_layer(self, name: str):
         """Sets a layer as working layer
@@ -108,7 +256,7 @@ class Workspace:
         layer_name: Optional[str] = None,
         identifier: Optional[str] = None,
         func: Union[Callable, str],
-        options: ComponentKwargs
+        options: ComponentKwargs,
     ):
         """Add component to a layer
 
@@ -135,18 +283,22 @@ class Workspace:
 
         layer_name = layer_name or self.working_layer
 
-        if layer_name not in self.layers:
-            raise ValueError("Invalid layer name")
-
         func_name = func.__name__ if isinstance(func, Callable) else func
         identifier_name = (
             identifier if identifier else self.__get_random_identifier()
         )
+        component = _component(func_name, options)
 
-        self.layers[layer_name]["components"][identifier_name] = {
-            "func_name": func_name,
-            "options": options,
-        }
+        with self._lock:
+            if layer_name not in self.layers:
+                raise ValueError("Invalid layer name")
+
+            layer = self.layers[layer_name]
+            components = {**layer["components"], identifier_name: component}
+            self.__replace_layer(
+                layer_name,
+                _layer(layer["metadata"]["background"], components),
+            )
 
     def remove_component(
         self, *, layer_name: Optional[str] = None, identifier: str
@@ -173,17 +325,25 @@ class Workspace:
 
         layer_name = layer_name or self.working_layer
 
-        try:
-            self.layers[layer_name]["components"].pop(identifier)
-        except KeyError:
-            raise ValueError("Invalid layer name or identifier")
+        with self._lock:
+            try:
+                layer = self.layers[layer_name]
+                components = dict(layer["components"])
+                components.pop(identifier)
+            except KeyError:
+                raise ValueError("Invalid layer name or identifier")
+
+            self.__replace_layer(
+                layer_name,
+                _layer(layer["metadata"]["background"], components),
+            )
 
     def update_component(
         self,
         *,
         layer_name: Optional[str] = None,
         identifier: str,
-        options: ComponentKwargs
+        options: ComponentKwargs,
     ):
         """Update component of a layer
 
@@ -208,40 +368,243 @@ class Workspace:
 
         layer_name = layer_name or self.working_layer
 
-        if layer_name not in self.layers:
-            raise ValueError("Invalid layer name")
+        with self._lock:
+            if layer_name not in self.layers:
+                raise ValueError("Invalid layer name")
+
+            layer = self.layers[layer_name]
+            config = layer["components"][identifier]
+            components = {
+                **layer["components"],
+                identifier: _component(
+                    config["func_name"], {**config["options"], **options}
+                ),
+            }
+            self.__replace_layer(
+                layer_name,
+                _layer(layer["metadata"]["background"], components),
+            )
 
-        self.layers[layer_name]["components"][identifier]["options"].update(
-            options
-        )
+    def override(self, overrides: Dict[str, ComponentKwargs]) -> "Workspace":
+        """Copy the workspace with some component options replaced
+
+        Layers and components that are not overridden are shared with
+        this workspace, the overridden ones get new records, so this
+        workspace is never modified. Rendered layers without overridden
+        components are reused from this workspace.
+
+        Parameters
+        ----------
+        overrides : Dict[str, ComponentKwargs]
+            options to merge, keyed by component identifier
+
+        Returns
+        -------
+        Workspace
+            The new workspace
+
+        Raises
+        ------
+        ValueError
+            if a component identifier is not available in the workspace
+        """
+        workspace = Workspace(self.size, self.cache_layers)
+        workspace.working_layer = self.working_layer
+        remaining = set(overrides)
+
+        with self._lock:
+            layers = self.layers
+            # Entries of overridden layers no longer match their record
+            workspace._layer_cache = dict(self._layer_cache)
+
+        for name, layer in layers.items():
+            overridden = remaining.intersection(layer["components"])
+            if not overridden:
+                workspace.layers[name] = layer
+                continue
+
+            components = dict(layer["components"])
+            for identifier in overridden:
+                config = components[identifier]
+                components[identifier] = _component(
+                    config["func_name"],
+                    {**config["options"], **overrides[identifier]},
+                )
+                remaining.discard(identifier)
+
+            workspace.layers[name] = _layer(
+                layer["metadata"]["background"], components
+            )
+
+        if remaining:
+            raise ValueError(f"Invalid identifier {sorted(remaining)[0]}")
+
+        return workspace
+
+    def compile(self) -> Template:
+        """Compile the workspace into an immutable template
+
+        Editor functions are resolved, fonts and static images (``image``
+        options given as paths, bytes or editors) are loaded and options
+        are validated against the functions and ``ComponentKwargs`` once.
+        Later changes to the workspace do not change the template.
+
+        Returns
+        -------
+        Template
+            The template, render it with :meth:`Template.render`
+
+        Raises
+        ------
+        ValueError
+            if a component uses an unknown function or invalid options
+        """
+        return compile_template(self.size, self.layers)
 
     def __create_editor_layer(
-        self, size: Tuple[int, int], metadata: Dict[str, Any]
+        self, size: Tuple[int, int], metadata: Mapping[str, Any]
     ):
         return Editor(Canvas(size, color=metadata["background"]))
 
-    def generate_image(self) -> Editor:
+    def __draw_layer(
+        self,
+        layer: LayerRecord,
+        size: Tuple[int, int],
+        variables: Mapping[str, Any],
+    ) -> RenderedLayer:
+        _layer = self.__create_editor_layer(size, layer["metadata"])
+
+        for identifier, config in layer["components"].items():
+            func_name = config["func_name"]
+            options = config["options"]
+            if any(has_vars(value) for value in options.values()):
+                options = bind_options(options, variables)
+
+            _func = getattr(_layer, func_name)
+
+            if not _func:
+                continue
+
+            if not profiling.enabled():
+                _func(**options)
+                continue
+
+            started = profiling.start()
+            try:
+                _func(**options)
+            finally:
+                profiling.finish(
+                    "workspace",
+                    f"{identifier}:{func_name}",
+                    started,
+                    _layer.image.size,
+                )
+
+        return rendered_layer(_layer.image)
+
+    def __render_layer(
+        self,
+        name: str,
+        layer: LayerRecord,
+        size: Tuple[int, int],
+        variables: Mapping[str, Any],
+    ) -> RenderedLayer:
+        if any(
+            has_vars(dict(config["options"]))
+            for config in layer["components"].values()
+        ):
+            # Depends on the variables of the call, never cached
+            return self.__draw_layer(layer, size, variables)
+
+        with self._lock:
+            cached = self._layer_cache.get(name)
+            generation = self._generation
+
+        if cached is not None and cached[0] is layer:
+            return cached[1]
+
+        rendered = self.__draw_layer(layer, size, variables)
+
+        with self._lock:
+            # Not cached when the layer changed while it was rendered
+            current = self.layers.get(name) is layer
+            if current and generation == self._generation:
+                self._layer_cache[name] = (layer, rendered)
+
+        return rendered
+
+    def generate_image(self, **variables: Any) -> Editor:
         """Generates image from the layers
 
+        Only the layers that changed since the last call are rendered
+        again, the others are taken from the cache. Layers are composited
+        within the area they cover, fully transparent layers are skipped
+        and everything below a fully opaque layer is ignored.
+
+        Parameters
+        ----------
+        **variables : Any
+            values of the ``Var`` placeholders in component options
+
         Returns
         -------
         Editor
             The editor instance
-        """
-        editor = Editor(Canvas(self.size, color=(0, 0, 0, 0)))
-
-        for layer in self.layers.values():
-            _layer = self.__create_editor_layer(self.size, layer["metadata"])
 
-            for config in layer["components"].values():
-                func_name = config["func_name"]
-                options = config["options"]
-
-                _func = getattr(_layer, func_name)
+        Raises
+        ------
+        ValueError
+            if a required variable is not given
+        """
+        output: Optional[Image] = None
+        # Snapshot of the layers, edits replace the dict instead of
+        # changing it
+        snapshot = self.layers
+        size = self.size
+
+        if self.cache_layers:
+            layers = [
+                self.__render_layer(name, layer, size, variables)
+                for name, layer in snapshot.items()
+            ]
+            opaque = [i for i, layer in enumerate(layers) if layer.opaque]
+
+            for layer in layers[opaque[-1] if opaque else 0 :]:
+                output = flatten_layer(output, layer, owned=False)
+        else:
+            for layer in snapshot.values():
+                output = flatten_layer(
+                    output,
+                    self.__draw_layer(layer, size, variables),
+                    owned=True,
+                )
+
+        if output is None:
+            return Editor(Canvas(size, color=(0, 0, 0, 0)))
+
+        return Editor(output)
+
+    def render(
+        self, context: Optional[Mapping[str, Any]] = None, **variables: Any
+    ) -> Editor:
+        """Generates image from the layers with the given variables
+
+        Same as :meth:`generate_image`, with the values of the ``Var``
+        placeholders given as a mapping.
 
-                if _func:
-                    _func(**options)
+        Parameters
+        ----------
+        context : Mapping[str, Any], optional
+            values of the placeholders
+        **variables : Any
+            values of the placeholders, override the context
 
-            editor.paste(_layer, position=(0, 0))
+        Returns
+        -------
+        Editor
+            The editor instance
+        """
+        if context is not None:
+            variables = {**context, **variables}
 
-        return editor
+        return self.generate_image(**variables)
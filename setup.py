@@ -55,6 +55,8 @@ setup(
     install_requires=_get_requirements(),
     extras_require={
         "dev": ["black", "isort", "click", "twine"],
+        "numpy": ["numpy>=1.22"],
+        "msgpack": ["msgpack>=1.0"],
     },
     project_urls={
         "Documentation": "https://easy-pil.readthedocs.io/en/latest/",
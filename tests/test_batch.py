@@ -0,0 +1,82 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+
+from easy_pil import Canvas, Workspace
+from easy_pil.batch import iter_render_batch, render_batch
+
+
+def make_template() -> Workspace:
+    workspace = Workspace((100, 50))
+    workspace.create_layer("background", background="black")
+    workspace.create_layer("content")
+    workspace.add_component(
+        layer_name="content",
+        identifier="bar",
+        func="rectangle",
+        options={"position": (0, 0), "width": 10, "height": 50},
+    )
+    workspace.add_component(
+        layer_name="content",
+        identifier="avatar",
+        func="paste",
+        options={"image": Canvas((10, 10), color="blue"), "position": (90, 0)},
+    )
+    return workspace
+
+
+class TestBatch(unittest.TestCase):
+    def test_render_batch(self):
+        """Tests rendering a template in a process pool"""
+        template = make_template()
+        avatar = BytesIO()
+        Image.new("RGB", (10, 10), color="green").save(avatar, "png")
+
+        items = [
+            {"bar": {"width": 20, "color": "red"}},
+            {"bar": {"width": 40, "color": "white"}},
+            {"avatar": {"image": avatar.getvalue()}},
+        ]
+        results = render_batch(template, items, max_workers=2, chunksize=1)
+        images = [Image.open(BytesIO(result)) for result in results]
+
+        self.assertEqual(images[0].getpixel((15, 10)), (255, 0, 0, 255))
+        self.assertEqual(images[0].getpixel((30, 10)), (0, 0, 0, 255))
+        self.assertEqual(images[1].getpixel((30, 10)), (255, 255, 255, 255))
+        self.assertEqual(images[2].getpixel((95, 5)), (0, 128, 0, 255))
+        self.assertNotIn(
+            "color", template.layers["content"]["components"]["bar"]["options"]
+        )
+
+    def test_render_batch_threads(self):
+        """Tests rendering a template in a thread pool"""
+        results = render_batch(
+            make_template(), [{}, {}], "jpeg", processes=False, quality=50
+        )
+        self.assertEqual([r[:2] for r in results], [b"\xff\xd8"] * 2)
+
+    def test_window(self):
+        """Tests only a window of items is rendered ahead of the consumer"""
+        with ThreadPoolExecutor(2) as pool, mock.patch.object(
+            pool, "submit", wraps=pool.submit
+        ) as submit:
+            results = iter_render_batch(
+                make_template(), [{}] * 20, executor=pool, window=3
+            )
+            next(results)
+            self.assertEqual(submit.call_count, 3)
+
+            self.assertEqual(len(list(results)), 19)
+            self.assertEqual(submit.call_count, 20)
+
+    def test_invalid_identifier(self):
+        """Tests overriding an unknown component"""
+        with self.assertRaises(ValueError):
+            make_template().override({"missing": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
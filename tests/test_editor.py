@@ -1,4 +1,5 @@
 import os
+import pickle
 import unittest
 from io import BytesIO
 
@@ -29,6 +30,28 @@ class TestEditor(unittest.TestCase):
         editor = Editor(image)
         self.assertIsInstance(editor, Editor)
 
+    def test_target_size(self):
+        """Tests editor decoding at a reduced size"""
+        for file_format in ("jpeg", "png"):
+            _bytes = BytesIO()
+            Image.new("RGB", (1000, 800), "red").save(_bytes, file_format)
+
+            editor = Editor(_bytes, target_size=(100, 100))
+            self.assertLessEqual(editor.image.width, 500)
+            self.assertGreaterEqual(editor.image.height, 200)
+            self.assertEqual(editor.image.mode, "RGBA")
+
+        for mode in ("P", "1", "I;16"):
+            _bytes = BytesIO()
+            Image.new("RGB", (1000, 800), "white").convert(mode).save(
+                _bytes, "png"
+            )
+
+            editor = Editor(_bytes, target_size=(100, 100))
+            self.assertLessEqual(editor.image.width, 500)
+            self.assertEqual(editor.image.mode, "RGBA")
+            self.assertEqual(editor.image.getpixel((0, 0))[3], 255)
+
     def test_from_editor(self):
         """Tests editor from canvas"""
         canvas = Canvas((100, 100), color="black")
@@ -88,6 +111,34 @@ class TestEditor(unittest.TestCase):
         editor = Editor(canvas).paste(canvas2, (0, 0))
         self.assertIsInstance(editor, Editor)
 
+    def test_paste_clipping(self):
+        """Tests editor paste outside of the canvas"""
+        canvas = Canvas((100, 100), color="black")
+        red = Image.new("RGB", (50, 50), color="red")
+
+        editor = Editor(canvas).paste(red, (-25, 75))
+        self.assertEqual(editor.image.size, (100, 100))
+        self.assertEqual(editor.image.getpixel((0, 99)), (255, 0, 0, 255))
+        self.assertEqual(editor.image.getpixel((25, 99)), (0, 0, 0, 255))
+        self.assertEqual(editor.image.getpixel((0, 74)), (0, 0, 0, 255))
+
+        editor.paste(red, (100, 100)).paste(red, (-50, -50))
+        self.assertEqual(editor.image.getpixel((50, 50)), (0, 0, 0, 255))
+
+    def test_draw_context(self):
+        """Tests reusing the draw context of the editor image"""
+        editor = Editor(Canvas((100, 100), color="black"))
+        draw = editor._draw()
+        editor.rectangle((0, 0), 10, 10, color="white")
+        self.assertIs(editor._draw(), draw)
+
+        editor.resize((50, 50)).ellipse((0, 0), 10, 10, color="red")
+        self.assertIsNot(editor._draw(), draw)
+        self.assertEqual(editor.image.getpixel((5, 5)), (255, 0, 0, 255))
+
+        copy = pickle.loads(pickle.dumps(editor))
+        self.assertEqual(copy.image.tobytes(), editor.image.tobytes())
+
     def test_multi_text(self):
         """Tests editor multi text"""
         canvas = Canvas((200, 100), color="black")
@@ -142,6 +193,51 @@ class TestEditor(unittest.TestCase):
         editor = Editor(canvas).polygon(cords, color="white", outline="black")
         self.assertIsInstance(editor, Editor)
 
+    def test_encode_cache(self):
+        """Tests reusing the encoded image until it is changed"""
+        editor = Editor(Canvas((100, 100), color="black"))
+        result = editor.encode()
+        self.assertIs(editor.encode(), result)
+        self.assertEqual(editor.image_bytes.getvalue(), result.data)
+        self.assertIsNot(editor.encode("png_fast"), result)
+
+        editor.rectangle((0, 0), 10, 10, color="white")
+        self.assertIsNot(editor.encode(), result)
+
+        result = editor.encode()
+        editor.image = editor.image.copy()
+        self.assertIsNot(editor.encode(), result)
+
+        result = editor.encode()
+        editor.invalidate()
+        self.assertIsNot(editor.encode(), result)
+
+    def test_encoded_output(self):
+        """Tests writing the encoded image without copies"""
+        result = Editor(Canvas((100, 100), color="black")).encode()
+        view = result.getbuffer()
+        self.assertTrue(view.readonly)
+        self.assertIs(view.obj, result.data)
+
+        target = bytearray(result.size + 10)
+        self.assertEqual(result.write_to(target), result.size)
+        self.assertEqual(bytes(target[: result.size]), result.data)
+
+        with self.assertRaises(ValueError):
+            result.write_to(bytearray(10))
+
+        output = BytesIO()
+        result.write_to(output)
+        self.assertEqual(output.getvalue(), result.data)
+
+        read, write = os.pipe()
+        try:
+            self.assertEqual(result.write_to(write), result.size)
+            self.assertEqual(os.read(read, result.size + 1), result.data)
+        finally:
+            os.close(read)
+            os.close(write)
+
     def test_bytes(self):
         """Tests editor bytes"""
         canvas = Canvas((100, 100), color="black")
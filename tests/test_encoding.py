@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+
+from PIL import Image
+
+from easy_pil import Canvas, Editor, EncodingProfile, negotiate_profile
+from easy_pil.encoding import PROFILES
+
+
+class TestEncoding(unittest.TestCase):
+    def setUp(self):
+        self.editor = Editor(Canvas((200, 100), color="#23272A")).rectangle(
+            (10, 10), 100, 40, color="white"
+        )
+
+    def test_profiles(self):
+        """Tests encoding with every profile"""
+        for name, profile in PROFILES.items():
+            result = self.editor.encode(name)
+            data = result.buffer.getvalue()
+
+            self.assertEqual(result.file_format, profile.file_format)
+            self.assertEqual(result.size, len(data))
+            self.assertGreaterEqual(result.encode_time, 0)
+
+            image = Image.open(BytesIO(data))
+            self.assertEqual(image.size, (200, 100))
+            self.assertEqual(image.format.lower(), profile.file_format)
+
+    def test_lossless(self):
+        """Tests that lossless profiles keep every pixel"""
+        for name in ("png", "png_fast", "png_small", "png_palette"):
+            data = self.editor.encode(name).buffer
+            image = Image.open(data).convert("RGBA")
+            self.assertEqual(image.tobytes(), self.editor.image.tobytes())
+
+        self.assertEqual(
+            Image.open(self.editor.encode("png_small").buffer).mode, "P"
+        )
+
+    def test_custom_profile(self):
+        """Tests encoding with a profile and option overrides"""
+        profile = EncodingProfile("jpeg", {"quality": 10})
+        low = self.editor.encode(profile)
+        high = self.editor.encode(profile, quality=95)
+
+        self.assertEqual(low.mime_type, "image/jpeg")
+        self.assertLess(low.size, high.size)
+
+        with self.assertRaises(ValueError):
+            self.editor.encode("missing")
+
+    def test_save(self):
+        """Tests saving with a profile"""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "image.bin")
+            result = self.editor.save(path, profile="webp")
+
+            self.assertEqual(result.size, os.path.getsize(path))
+            self.assertEqual(Image.open(path).format, "WEBP")
+
+        self.assertIsNone(self.editor.save(BytesIO(), "png"))
+
+    def test_negotiate(self):
+        """Tests picking a profile from an Accept header"""
+        accept = "image/avif,image/webp,image/apng,*/*;q=0.8"
+        self.assertEqual(negotiate_profile(accept), "webp")
+        self.assertEqual(negotiate_profile("image/png"), "png")
+        self.assertEqual(negotiate_profile("image/webp;q=0, */*"), "png")
+        self.assertEqual(negotiate_profile(None), "png")
+        self.assertEqual(negotiate_profile("image/*", ("jpeg", "png")), "jpeg")
+
+
+if __name__ == "__main__":
+    unittest.main()
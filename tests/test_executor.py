@@ -0,0 +1,62 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from easy_pil import AioEditor, Canvas, Editor, RenderExecutor
+
+
+class TestExecutor(unittest.IsolatedAsyncioTestCase):
+    async def test_thread_executor(self):
+        """Tests aio editor on a thread pool"""
+        with RenderExecutor(max_workers=2) as executor:
+            aio = AioEditor(Canvas((100, 100), color="black"), executor)
+            aio.rectangle((0, 0), 50, 50, color="red")
+            editor = await aio.execute()
+
+        self.assertIsInstance(editor, Editor)
+        self.assertEqual(editor.image.getpixel((10, 10)), (255, 0, 0, 255))
+
+    async def test_process_executor(self):
+        """Tests aio editor on a process pool"""
+        async with RenderExecutor(max_workers=1, processes=True) as executor:
+            aio = AioEditor(Canvas((100, 100), color="black"), executor)
+            aio.resize((50, 50))
+            aio.circle_image()
+            editor = await aio.execute()
+
+        self.assertEqual(editor.image.size, (50, 50))
+        self.assertEqual(editor.image.getpixel((0, 0))[3], 0)
+
+    async def test_async_shutdown(self):
+        """Tests the pool is not shut down on the event loop thread"""
+        executor = RenderExecutor(max_workers=1)
+        threads = []
+        shutdown = executor.shutdown
+
+        def record(*args, **kwargs):
+            threads.append(threading.current_thread())
+            shutdown(*args, **kwargs)
+
+        with mock.patch.object(executor, "shutdown", side_effect=record):
+            async with executor:
+                await executor.run(sum, [1, 2])
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertIsNone(executor._executor)
+
+    async def test_external_executor(self):
+        """Tests external executors are not shut down"""
+        pool = ThreadPoolExecutor(1)
+        executor = RenderExecutor(executor=pool, max_pending=1)
+        aio = AioEditor(Canvas((10, 10)), executor)
+        await aio.execute()
+        executor.shutdown()
+
+        self.assertEqual(pool.submit(lambda: 1).result(), 1)
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import pickle
+import unittest
+from io import BytesIO
+from pathlib import Path
+
+from easy_pil import Font
+from easy_pil.font import FontRegistry, font_registry, fonts_path
+
+
+class TestFont(unittest.TestCase):
+    def test_registry(self):
+        """Tests fonts are loaded once and share their font file"""
+        registry = FontRegistry(maxsize=2)
+        path = fonts_path["poppins"]["bold"]
+
+        font = registry.get(path, 20)
+        self.assertIs(registry.get(Path(path), 20), font)
+        self.assertEqual((registry.hits, registry.misses), (1, 1))
+
+        larger = registry.get(path, 30)
+        self.assertIsNot(larger, font)
+        self.assertIs(larger.font_bytes, font.font_bytes)
+        self.assertEqual(registry.nbytes, len(font.font_bytes))
+        self.assertGreater(larger.getlength("XP"), font.getlength("XP"))
+
+        registry.get(path, 40)
+        self.assertEqual(len(registry), 2)
+        self.assertIsNot(registry.get(path, 20), font)
+
+        other = fonts_path["poppins"]["light"]
+        registry.get(other, 20)
+        registry.get(other, 30)
+        self.assertEqual(registry.nbytes, len(registry.get(other).font_bytes))
+
+        copy = pickle.loads(pickle.dumps(font))
+        self.assertEqual(copy.getbbox("Level"), font.getbbox("Level"))
+
+        registry.clear()
+        self.assertEqual((len(registry), registry.nbytes), (0, 0))
+
+    def test_font(self):
+        """Tests bundled and user fonts use the shared registry"""
+        path = fonts_path["montserrat"]["light"]
+
+        self.assertIs(Font(path, 18).font, Font.montserrat("light", 18))
+        self.assertIs(Font.poppins(size=12), Font.poppins("regular", 12))
+        self.assertIs(
+            Font.caveat(size=12),
+            font_registry.get(fonts_path["caveat"]["regular"], 12),
+        )
+
+        with open(path, "rb") as f:
+            font = Font(BytesIO(f.read()), 18).font
+        self.assertEqual(
+            font.getbbox("Level"), Font(path, 18).font.getbbox("Level")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
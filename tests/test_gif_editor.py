@@ -0,0 +1,237 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image, ImageSequence
+
+from easy_pil import Canvas, Editor, GifEditor, RenderExecutor
+from easy_pil.gif_encoder import GifEncoder
+
+
+def make_gif() -> BytesIO:
+    frames = [Image.new("RGB", (64, 48), c) for c in ("red", "green", "blue")]
+    _bytes = BytesIO()
+    frames[0].save(
+        _bytes,
+        "GIF",
+        save_all=True,
+        append_images=frames[1:],
+        duration=[100, 200, 300],
+        loop=0,
+        disposal=2,
+    )
+    _bytes.seek(0)
+    return _bytes
+
+
+class TestGifEditor(unittest.TestCase):
+    def check_output(self, output: BytesIO, disposal: bool = False):
+        image = Image.open(output)
+        self.assertEqual(image.n_frames, 3)
+        self.assertEqual(image.size, (32, 24))
+        self.assertEqual(image.info["loop"], 0)
+
+        colors = [(255, 0, 0), (0, 128, 0), (0, 0, 255)]
+        for frame, duration, color in zip(
+            ImageSequence.Iterator(image), (100, 200, 300), colors
+        ):
+            rgb = frame.convert("RGB")
+            self.assertEqual(frame.info["duration"], duration)
+            if disposal:
+                self.assertEqual(frame.disposal_method, 2)
+            self.assertEqual(rgb.getpixel((20, 20)), color)
+            self.assertEqual(rgb.getpixel((2, 2)), (255, 255, 255))
+
+    def test_gif_editor(self):
+        """Tests gif editor"""
+        gif = GifEditor(make_gif())
+        gif.resize((32, 24))
+        gif.rectangle((0, 0), 10, 10, color="white")
+
+        self.assertEqual(len(gif.frames), 3)
+        with mock.patch("easy_pil.gif_editor.GifEncoder") as encoder:
+            self.check_output(gif.image_bytes)
+        encoder.assert_not_called()
+
+        output = BytesIO()
+        gif.save(output, optimize=False)
+        output.seek(0)
+        self.check_output(output, disposal=True)
+
+    def test_frames(self):
+        """Tests changes to the frames list are saved"""
+        gif = GifEditor(make_gif())
+        gif.resize((32, 24))
+
+        gif.frames[0] = Editor(Canvas((32, 24), color="yellow"))
+        gif.frames.append(gif.frames[1])
+        gif.rectangle((0, 0), 10, 10, color="white")
+
+        image = Image.open(gif.image_bytes)
+        self.assertEqual(image.n_frames, 4)
+
+        colors = [(255, 255, 0), (0, 128, 0), (0, 0, 255), (0, 128, 0)]
+        for frame, color in zip(ImageSequence.Iterator(image), colors):
+            rgb = frame.convert("RGB")
+            self.assertEqual(rgb.getpixel((20, 20)), color)
+            self.assertEqual(rgb.getpixel((2, 2)), (255, 255, 255))
+
+        image.seek(2)
+        self.assertEqual(image.info["duration"], 300)
+
+    def test_stream(self):
+        """Tests gif editor in stream mode"""
+        gif = GifEditor(make_gif(), stream=True)
+        gif.resize((32, 24))
+        gif.rectangle((0, 0), 10, 10, color="white")
+
+        self.assertEqual(len(gif.operations), 2)
+        self.check_output(gif.image_bytes)
+
+        output = BytesIO()
+        gif.save(output)
+        output.seek(0)
+        self.check_output(output)
+
+        # The shared palette has the colors of the later frames too
+        output = BytesIO()
+        gif.save(output, palette="shared")
+        output.seek(0)
+        self.check_output(output)
+
+    def test_executor(self):
+        """Tests gif editor with frames edited in a pool"""
+        with ThreadPoolExecutor(2) as threads, ProcessPoolExecutor(2) as pool:
+            for executor in (threads, pool):
+                for stream in (False, True):
+                    gif = GifEditor(
+                        make_gif(), stream, executor=executor, chunksize=2
+                    )
+                    gif.resize((32, 24))
+                    gif.rectangle((0, 0), 10, 10, color="white")
+
+                    self.check_output(gif.image_bytes)
+
+        with RenderExecutor(3) as executor:
+            gif = GifEditor(make_gif(), True, executor=executor, chunksize=1)
+            self.assertEqual(gif.window, 3)
+            gif.resize((32, 24))
+            gif.rectangle((0, 0), 10, 10, color="white")
+            self.check_output(gif.image_bytes)
+
+        gif = GifEditor(make_gif(), True, window=1)
+        self.assertEqual(gif.window, 1)
+
+    def test_optimize(self):
+        """Tests gif encoding with frame differencing and palettes"""
+        frames = []
+        for i in range(8):
+            frame = Image.new("RGB", (120, 90), "navy")
+            frame.paste("yellow", (i * 10, 30, i * 10 + 20, 50))
+            frames.append(frame)
+
+        source = BytesIO()
+        frames[0].save(
+            source, "GIF", save_all=True, append_images=frames[1:], loop=0
+        )
+
+        sizes = []
+        for stream in (False, True):
+            for palette in ("adaptive", "shared"):
+                for optimize in (False, True):
+                    gif = GifEditor(BytesIO(source.getvalue()), stream)
+                    output = BytesIO()
+                    gif.save(output, palette=palette, optimize=optimize)
+                    sizes.append(len(output.getvalue()))
+
+                    image = Image.open(output)
+                    self.assertEqual(image.n_frames, 8)
+                    for i, frame in enumerate(ImageSequence.Iterator(image)):
+                        rgb = frame.convert("RGB")
+                        self.assertEqual(
+                            rgb.getpixel((i * 10 + 5, 40)), (255, 255, 0)
+                        )
+                        self.assertEqual(
+                            rgb.getpixel((i * 10 + 25, 40)), (0, 0, 128)
+                        )
+
+        self.assertLess(sizes[1], sizes[0])
+        self.assertLess(sizes[3], sizes[2])
+
+        with self.assertRaises(ValueError):
+            GifEditor(BytesIO(source.getvalue())).save(BytesIO(), palette="x")
+
+    def test_transparent_frames(self):
+        """Tests frames with transparent pixels are encoded as differences"""
+        frames = []
+        for i in range(8):
+            frame = Image.new("RGB", (120, 90), "navy")
+            frame.paste("yellow", (i * 10 + 10, 30, i * 10 + 30, 50))
+            frames.append(frame)
+
+        source = BytesIO()
+        frames[0].save(
+            source, "GIF", save_all=True, append_images=frames[1:], loop=0
+        )
+
+        sizes = []
+        for optimize in (False, True):
+            gif = GifEditor(BytesIO(source.getvalue()), stream=True)
+            gif.rounded_corners(10)
+            output = BytesIO()
+            gif.save(output, optimize=optimize)
+            sizes.append(len(output.getvalue()))
+
+            image = Image.open(output)
+            for i, frame in enumerate(ImageSequence.Iterator(image)):
+                rgba = frame.convert("RGBA")
+                self.assertEqual(rgba.getpixel((0, 0))[3], 0)
+                self.assertEqual(
+                    rgba.getpixel((i * 10 + 15, 40)), (255, 255, 0, 255)
+                )
+                self.assertEqual(
+                    rgba.getpixel((i * 10 + 35, 40)), (0, 0, 128, 255)
+                )
+
+        self.assertLess(sizes[1], sizes[0])
+
+        # A frame hiding pixels of the previous one is not drawn over it
+        opaque = Image.new("RGBA", (40, 30), "navy")
+        corner = opaque.copy()
+        corner.paste((0, 0, 0, 0), (0, 0, 10, 10))
+
+        output = BytesIO()
+        with GifEncoder(output) as encoder:
+            encoder.add_frame(opaque)
+            encoder.add_frame(corner)
+
+        image = Image.open(output)
+        image.seek(1)
+        rgba = image.convert("RGBA")
+        self.assertEqual(rgba.getpixel((5, 5))[3], 0)
+        self.assertEqual(rgba.getpixel((20, 20)), (0, 0, 128, 255))
+
+    def test_pillow_options(self):
+        """Tests other save options are passed to Pillow"""
+        gif = GifEditor(make_gif())
+        gif.resize((32, 24))
+        gif.rectangle((0, 0), 10, 10, color="white")
+
+        output = BytesIO()
+        gif.save(output, comment=b"easy-pil")
+        output.seek(0)
+        self.check_output(output, disposal=True)
+        self.assertEqual(Image.open(output).info["comment"], b"easy-pil")
+
+        with self.assertRaises(TypeError):
+            gif.save(BytesIO(), palette="shared", comment=b"easy-pil")
+
+    def test_invalid_operation(self):
+        """Tests unknown operations"""
+        with self.assertRaises(AttributeError):
+            GifEditor(make_gif(), stream=True).missing()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+
+from easy_pil import Canvas, Editor, Gradient, pixel_ops
+from easy_pil.gradient import GradientCache, color_stops
+
+
+def distance(first, second) -> int:
+    return max(abs(a - b) for a, b in zip(first, second))
+
+
+class TestGradient(unittest.TestCase):
+    def test_color_stops(self):
+        """Tests color stop normalization"""
+        self.assertEqual(
+            color_stops(["red", (0.25, "blue"), "lime"]),
+            (
+                (0.0, (255, 0, 0, 255)),
+                (0.25, (0, 0, 255, 255)),
+                (1.0, (0, 255, 0, 255)),
+            ),
+        )
+
+        with self.assertRaises(ValueError):
+            color_stops([])
+
+    def test_kinds(self):
+        """Tests linear, radial and conic gradients"""
+        cache = GradientCache()
+        size = (100, 60)
+
+        linear = Gradient(["red", "lime", "blue"]).render(size, cache)
+        self.assertLessEqual(
+            distance(linear.getpixel((0, 30)), (255, 0, 0)), 4
+        )
+        self.assertLessEqual(
+            distance(linear.getpixel((99, 30)), (0, 0, 255)), 4
+        )
+        self.assertGreater(linear.getpixel((50, 30))[1], 240)
+
+        radial = Gradient(["white", "black"], "radial").render(size, cache)
+        self.assertGreater(radial.getpixel((50, 30))[0], 245)
+        self.assertLess(radial.getpixel((0, 0))[0], 5)
+
+        conic = Gradient(["black", "white"], "conic", 90).render(size, cache)
+        self.assertLess(conic.getpixel((45, 55))[0], 20)
+        self.assertGreater(conic.getpixel((49, 5))[0], 100)
+
+        with self.assertRaises(ValueError):
+            Gradient(["red"], "spiral").render(size, cache)  # type: ignore
+
+    def test_conic_backends(self):
+        """Tests conic gradient positions with and without NumPy"""
+        if not pixel_ops.HAS_NUMPY:
+            self.skipTest("NumPy is not installed")
+
+        pillow = pixel_ops.conic_levels((80, 80), angle=45, use_numpy=False)
+        numpy = pixel_ops.conic_levels((80, 80), angle=45, use_numpy=True)
+        for point in ((70, 40), (40, 70), (10, 40), (40, 10), (20, 60)):
+            self.assertLessEqual(
+                abs(pillow.getpixel(point) - numpy.getpixel(point)), 4
+            )
+
+    def test_cache(self):
+        """Tests gradients are rendered once per set of parameters"""
+        cache = GradientCache(maxsize=2)
+        gradient = Gradient(["red", "blue"], angle=45)
+
+        first = gradient.render((50, 50), cache)
+        self.assertIs(gradient.render((50, 50), cache), first)
+        self.assertIs(
+            Gradient(("red", "blue"), angle=45).render((50, 50), cache), first
+        )
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertEqual(cache.nbytes, 50 * 50 * 4)
+
+        gradient.render((60, 50), cache)
+        gradient.render((70, 50), cache)
+        self.assertEqual(len(cache), 2)
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+    def test_editor(self):
+        """Tests gradient fills of editors, rectangles and bars"""
+        editor = Editor(Canvas((120, 80), color="white"))
+        editor.gradient(["black", "white"], angle=90, size=(120, 40))
+        self.assertLessEqual(
+            distance(editor.image.getpixel((60, 0)), (0,) * 3), 8
+        )
+        self.assertEqual(editor.image.getpixel((60, 60)), (255,) * 4)
+
+        gradient = Gradient(["red", "blue"])
+        for radius in (0, 10):
+            plain = Editor(Canvas((120, 80)))
+            plain.rectangle((10.5, 5), 90, 50, fill="red", radius=radius)
+            filled = Editor(Canvas((120, 80)))
+            filled.rectangle((10.5, 5), 90, 50, fill=gradient, radius=radius)
+
+            self.assertEqual(
+                filled.image.getchannel("A").tobytes(),
+                plain.image.getchannel("A").tobytes(),
+            )
+            self.assertLessEqual(
+                distance(filled.image.getpixel((11, 30)), (255, 0, 0)), 8
+            )
+            self.assertLessEqual(
+                distance(filled.image.getpixel((99, 30)), (0, 0, 255)), 8
+            )
+
+        outlined = Editor(Canvas((120, 80)))
+        outlined.rectangle((10, 5), 90, 50, fill=gradient, outline="lime")
+        self.assertEqual(outlined.image.getpixel((10, 30)), (0, 255, 0, 255))
+
+        bar = Editor(Canvas((120, 40)))
+        bar.bar((0, 0), 100, 20, percentage=50, fill=gradient, radius=10)
+        self.assertEqual(bar.image.getpixel((80, 10))[3], 0)
+        self.assertGreater(bar.image.getpixel((48, 10))[0], 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import unittest
+from unittest import mock
+
+from easy_pil import Canvas, Editor, Font, LazyEditor, Text
+from easy_pil.font import fonts_path
+from easy_pil.text_layout import TextBoxLayout
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+def chain(editor):
+    pfp = os.path.join(EXAMPLES, "assets", "pfp.png")
+    font = Font.poppins(size=20)
+
+    return (
+        editor.resize((150, 100), crop=True)
+        .rotate(360)
+        .rounded_corners(radius=20)
+        .circle_image()
+        .blur(amount=1)
+        .text((10, 10), "Hello", font=font, color="white")
+        .rectangle((5, 5), 60, 20, outline="red", radius=4)
+        .multi_text((75, 50), [Text("A ", font, "red"), Text("B", font)])
+        .ellipse((20, 20), 30, 30, color="blue")
+        .paste(Editor(pfp).resize((40, 40)).circle_image(), (100, 50))
+        .arc((40, 40), 30, 30, 0, 180, color="green", stroke_width=3)
+    )
+
+
+class TestLazyEditor(unittest.TestCase):
+    def test_plan(self):
+        """Tests fusing the recorded calls"""
+        lazy = chain(LazyEditor(Canvas((200, 120), color="orange")))
+        steps = [step.name for step in lazy.plan()]
+
+        self.assertEqual(len(lazy.instructions), 11)
+        self.assertEqual(steps[:4], ["resize", "_masks", "blur", "text"])
+        self.assertEqual(len(steps), 9)
+        self.assertEqual(len(lazy.plan()[1].args), 2)
+
+    def test_same_as_editor(self):
+        """Tests lazy editor output against the editor"""
+        canvas = Canvas((200, 120), color="orange")
+        source = Editor(canvas)
+
+        eager = chain(Editor(canvas)).image
+        lazy = chain(LazyEditor(source))
+
+        self.assertEqual(lazy.image.tobytes(), eager.tobytes())
+        self.assertEqual(lazy.render().image.tobytes(), eager.tobytes())
+        self.assertEqual(source.image.getpixel((0, 0)), (255, 165, 0, 255))
+        self.assertEqual(lazy.image_bytes.read(4), b"\x89PNG")
+
+    def test_cached_render(self):
+        """Tests the rendered image is kept until a call is recorded"""
+        lazy = LazyEditor(Canvas((120, 60), color="black"))
+        lazy.circle_image().text_box(
+            (0, 0, 120, 60), "Hello there", fonts_path["poppins"]["bold"]
+        )
+
+        with mock.patch.object(
+            Editor,
+            "text_box",
+            autospec=True,
+            side_effect=Editor.text_box,
+        ) as text_box:
+            image = lazy.image
+            self.assertIs(lazy.image, image)
+            self.assertEqual(lazy.image_bytes.read(4), b"\x89PNG")
+            self.assertIsNot(lazy.render().image, image)
+            self.assertEqual(text_box.call_count, 1)
+
+            self.assertIsNone(lazy.results[0])
+            self.assertIsInstance(lazy.results[1], TextBoxLayout)
+            self.assertEqual(lazy.results[1].lines, ("Hello there",))
+
+            lazy.blur()
+            self.assertIsNot(lazy.image, image)
+            self.assertEqual(text_box.call_count, 2)
+            self.assertEqual(len(lazy.results), 3)
+
+    def test_invalid_operation(self):
+        """Tests unknown operations"""
+        with self.assertRaises(AttributeError):
+            LazyEditor(Canvas((10, 10))).missing()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import asyncio
+import unittest
+from io import BytesIO
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from PIL import Image
+
+from easy_pil import ImageLoader
+from easy_pil.loader import MAX_DECODED_SIZES
+
+
+def make_png(size=(20, 10)) -> bytes:
+    _bytes = BytesIO()
+    Image.new("RGB", size, color="red").save(_bytes, "png")
+    return _bytes.getvalue()
+
+
+class TestLoader(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+        self.png = make_png()
+
+        async def image(request: web.Request):
+            self.requests.append(request)
+            await asyncio.sleep(0.05)
+
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304)
+
+            return web.Response(
+                body=self.png,
+                content_type="image/png",
+                headers={"ETag": '"v1"', "Cache-Control": "max-age=0"},
+            )
+
+        async def fresh(request: web.Request):
+            self.fresh_requests += 1
+            return web.Response(
+                body=self.png, headers={"Cache-Control": "max-age=60"}
+            )
+
+        async def large(request: web.Request):
+            return web.Response(body=make_png((1000, 1000)))
+
+        app = web.Application()
+        app.router.add_get("/image.png", image)
+        app.router.add_get("/fresh.png", fresh)
+        app.router.add_get("/large.png", large)
+
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url("/image.png"))
+        self.fresh_url = str(self.server.make_url("/fresh.png"))
+        self.fresh_requests = 0
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_load_async(self):
+        """Tests concurrent loads share one request"""
+        async with ImageLoader() as loader:
+            images = await asyncio.gather(
+                *[loader.load_async(self.url) for _ in range(5)]
+            )
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(images[0].mode, "RGBA")
+        self.assertEqual(images[0].size, (20, 10))
+        self.assertIsNot(images[0], images[1])
+
+    async def test_revalidate(self):
+        """Tests expired images are revalidated"""
+        async with ImageLoader() as loader:
+            await loader.load_async(self.url)
+            image = await loader.load_async(self.url, raw=True)
+
+            self.assertEqual(loader.revalidations, 1)
+            self.assertEqual(image.mode, "RGB")
+
+        self.assertEqual(self.requests[1].headers["If-None-Match"], '"v1"')
+
+    async def test_cache_hit(self):
+        """Tests fresh images are served from the cache"""
+        async with ImageLoader() as loader:
+            await loader.load_async(self.fresh_url)
+            await loader.load_async(self.fresh_url)
+
+        self.assertEqual((loader.hits, loader.misses), (1, 1))
+        self.assertEqual(self.fresh_requests, 1)
+
+    async def test_target_size(self):
+        """Tests images are decoded near the target size"""
+        self.png = make_png((800, 800))
+
+        async with ImageLoader() as loader:
+            image = await loader.load_async(
+                self.fresh_url, target_size=[50, 50]
+            )
+            full = await loader.load_async(self.fresh_url)
+
+            for side in range(10, 80, 10):
+                await loader.load_async(
+                    self.fresh_url, target_size=(side, side)
+                )
+            entry = loader._cache[self.fresh_url]
+
+        self.assertEqual(image.size, (100, 100))
+        self.assertEqual(full.size, (800, 800))
+        self.assertEqual(len(entry.decoded), MAX_DECODED_SIZES)
+        self.assertIn((70, 70), entry.decoded)
+
+    async def test_max_bytes(self):
+        """Tests images over the size limit are rejected"""
+        async with ImageLoader(max_bytes=1000) as loader:
+            with self.assertRaises(ValueError):
+                await loader.load_async(
+                    str(self.server.make_url("/large.png"))
+                )
+
+    async def test_load(self):
+        """Tests the sync loader"""
+        loop = asyncio.get_running_loop()
+        with ImageLoader() as loader:
+            image = await loop.run_in_executor(None, loader.load, self.url)
+            await loop.run_in_executor(None, loader.load, self.url)
+
+        self.assertEqual(image.size, (20, 10))
+        self.assertEqual(loader.revalidations, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
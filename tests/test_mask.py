@@ -0,0 +1,40 @@
+import unittest
+
+from easy_pil import Canvas, Editor
+from easy_pil.mask import MaskCache, get_mask
+
+
+class TestMask(unittest.TestCase):
+    def test_mask_cached(self):
+        """Tests masks are drawn once per key"""
+        cache = MaskCache()
+        mask = cache.get("ellipse", (50, 50))
+        self.assertIs(cache.get("ellipse", (50, 50)), mask)
+        self.assertIsNot(cache.get("ellipse", (50, 50), supersample=2), mask)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertEqual(mask.mode, "L")
+
+    def test_mask_eviction(self):
+        """Tests masks are evicted over the limits"""
+        cache = MaskCache(maxsize=2, max_bytes=100 * 100)
+        cache.get("rounded_rectangle", (20, 20), radius=5)
+        cache.get("rounded_rectangle", (30, 30), radius=5)
+        cache.get("rounded_rectangle", (40, 40), radius=5)
+        self.assertEqual(len(cache), 2)
+        cache.get("rounded_rectangle", (95, 95), radius=5)
+        self.assertEqual(len(cache), 1)
+        self.assertLessEqual(cache.nbytes, 100 * 100)
+
+    def test_circle_alpha(self):
+        """Tests circle image only changes the alpha channel"""
+        editor = Editor(Canvas((100, 100), color="red")).circle_image()
+        self.assertEqual(editor.image.getpixel((0, 0))[3], 0)
+        self.assertEqual(editor.image.getpixel((50, 50)), (255, 0, 0, 255))
+        self.assertEqual(
+            editor.image.getchannel("A").tobytes(),
+            get_mask("ellipse", (100, 100)).tobytes(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
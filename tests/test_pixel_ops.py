@@ -0,0 +1,143 @@
+import unittest
+
+from PIL import Image, ImageChops
+
+from easy_pil import Canvas, Editor, pixel_ops
+
+
+def difference(first: Image.Image, second: Image.Image) -> int:
+    extrema = ImageChops.difference(first, second).getextrema()
+    if isinstance(extrema[0], tuple):
+        return max(high for _, high in extrema)
+    return extrema[1]
+
+
+class TestPixelOps(unittest.TestCase):
+    def setUp(self):
+        self.image = pixel_ops.linear_gradient((120, 80), "navy", "gold", 30)
+        self.image.putalpha(pixel_ops.linear_levels((120, 80), 90))
+
+    def backends(self):
+        yield False
+        if pixel_ops.HAS_NUMPY:
+            yield True
+
+    def test_tint(self):
+        """Tests tint, brightness and opacity"""
+        for use_numpy in self.backends():
+            tinted = pixel_ops.tint(self.image, "red", 1, use_numpy=use_numpy)
+            self.assertEqual(tinted.getpixel((5, 70))[:3], (255, 0, 0))
+            self.assertEqual(
+                tinted.getchannel("A").tobytes(),
+                self.image.getchannel("A").tobytes(),
+            )
+
+            dark = pixel_ops.brightness(self.image, 0, use_numpy=use_numpy)
+            self.assertEqual(dark.getpixel((60, 40))[:3], (0, 0, 0))
+
+            half = pixel_ops.opacity(self.image, 0.5, use_numpy=use_numpy)
+            alpha = self.image.getpixel((60, 79))[3]
+            self.assertEqual(half.getpixel((60, 79))[3], alpha // 2)
+
+    def test_remap_colors(self):
+        """Tests replacing exact colors"""
+        image = Canvas((10, 10), color="red").image
+        image.paste((0, 0, 255, 255), (0, 0, 5, 10))
+
+        for use_numpy in self.backends():
+            swapped = pixel_ops.remap_colors(
+                image, {"red": "blue", "blue": "red"}, use_numpy=use_numpy
+            )
+            self.assertEqual(swapped.getpixel((0, 0)), (255, 0, 0, 255))
+            self.assertEqual(swapped.getpixel((9, 0)), (0, 0, 255, 255))
+
+    def test_channel_mask(self):
+        """Tests masks of channel ranges"""
+        for use_numpy in self.backends():
+            mask = pixel_ops.channel_mask(
+                self.image, "A", 128, 255, use_numpy=use_numpy
+            )
+            self.assertEqual(mask.mode, "L")
+            self.assertEqual(mask.getpixel((0, 0)), 0)
+            self.assertEqual(mask.getpixel((0, 79)), 255)
+
+    def test_gradients(self):
+        """Tests gradient positions and colors"""
+        for use_numpy in self.backends():
+            levels = pixel_ops.linear_levels((100, 50), 0, use_numpy=use_numpy)
+            self.assertLessEqual(levels.getpixel((0, 25)), 2)
+            self.assertGreaterEqual(levels.getpixel((99, 25)), 253)
+
+            levels = pixel_ops.linear_levels(
+                (100, 50), 90, use_numpy=use_numpy
+            )
+            self.assertLessEqual(levels.getpixel((50, 0)), 3)
+            self.assertGreaterEqual(levels.getpixel((50, 49)), 252)
+
+            levels = pixel_ops.radial_levels(
+                (100, 50), (30, 25), 20, use_numpy=use_numpy
+            )
+            self.assertLessEqual(levels.getpixel((30, 25)), 10)
+            self.assertEqual(levels.getpixel((99, 0)), 255)
+
+            gradient = pixel_ops.radial_gradient(
+                (100, 50), "white", "black", use_numpy=use_numpy
+            )
+            self.assertLessEqual(max(gradient.getpixel((0, 0))[:3]), 4)
+            self.assertGreaterEqual(min(gradient.getpixel((50, 25))[:3]), 250)
+
+    @unittest.skipUnless(pixel_ops.HAS_NUMPY, "NumPy is not installed")
+    def test_backends_match(self):
+        """Tests that both backends give the same result"""
+        operations = [
+            lambda **kw: pixel_ops.tint(self.image, "red", 0.3, **kw),
+            lambda **kw: pixel_ops.brightness(self.image, 0.6, **kw),
+            lambda **kw: pixel_ops.opacity(self.image, 0.6, **kw),
+            lambda **kw: pixel_ops.duotone(self.image, "navy", "gold", **kw),
+            lambda **kw: pixel_ops.channel_mask(self.image, "R", **kw),
+        ]
+        for operation in operations:
+            self.assertEqual(
+                difference(operation(use_numpy=True), operation()), 0
+            )
+
+        for angle in (0, 30, 90, 135, 200):
+            self.assertLessEqual(
+                difference(
+                    pixel_ops.linear_levels((120, 80), angle, use_numpy=True),
+                    pixel_ops.linear_levels((120, 80), angle, use_numpy=False),
+                ),
+                4,
+            )
+
+        self.assertLessEqual(
+            difference(
+                pixel_ops.radial_levels((120, 80), use_numpy=True),
+                pixel_ops.radial_levels((120, 80), use_numpy=False),
+            ),
+            4,
+        )
+
+    def test_color_lut(self):
+        """Tests interpolating color stops"""
+        lut = pixel_ops.color_lut([(0, "red"), (0.5, "white"), (1, "blue")])
+        self.assertEqual(len(lut), 256)
+        self.assertEqual(lut[0], (255, 0, 0, 255))
+        self.assertEqual(lut[255], (0, 0, 255, 255))
+        self.assertEqual(lut[127], (255, 254, 254, 255))
+
+    def test_editor(self):
+        """Tests the editor pixel operations"""
+        editor = Editor(Canvas((20, 20), color=(200, 100, 50, 200)))
+        editor.tint("black", 0.5).brightness(2).opacity(0.5)
+        self.assertEqual(editor.image.getpixel((0, 0)), (200, 100, 50, 100))
+
+        editor.remap_colors({(200, 100, 50, 100): "white"})
+        self.assertEqual(editor.image.getpixel((0, 0)), (255, 255, 255, 255))
+
+        editor.duotone("black", "red")
+        self.assertEqual(editor.image.getpixel((0, 0)), (255, 0, 0, 255))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from easy_pil import AioEditor, Canvas, Editor, Gradient, Workspace, profiling
+
+
+class TestProfiling(unittest.TestCase):
+    def test_disabled(self):
+        """Tests nothing is reported without sinks"""
+        self.assertFalse(profiling.enabled())
+
+        events = []
+        with profiling.profile(events.append):
+            self.assertTrue(profiling.enabled())
+        Editor(Canvas((10, 10))).rectangle((0, 0), 5, 5, fill="red")
+
+        self.assertFalse(profiling.enabled())
+        self.assertEqual(events, [])
+
+        with self.assertRaises(ValueError):
+            profiling.remove_sink(events.append)
+
+    def test_editor(self):
+        """Tests editor operations and encoding are reported"""
+        with profiling.profile(trace_memory=True) as recorder:
+            editor = Editor(Canvas((40, 30)))
+            editor.rectangle((0, 0), 10, 10, fill="red").resize((20, 15))
+            editor.image_bytes
+
+        self.assertEqual(
+            [(event.kind, event.name) for event in recorder.events],
+            [("editor", "rectangle"), ("editor", "resize"), ("encode", "png")],
+        )
+        self.assertEqual(recorder.events[0].size, (40, 30))
+        self.assertEqual(recorder.events[1].size, (20, 15))
+        self.assertTrue(all(e.allocated is not None for e in recorder.events))
+        self.assertGreaterEqual(recorder.total("editor"), 0)
+
+    def test_nested_operations(self):
+        """Tests operations calling other operations are reported once"""
+        editor = Editor(Canvas((40, 30)))
+        other = Editor(Canvas((20, 20), color="red"))
+        revision = editor._revision
+
+        with profiling.profile() as recorder:
+            editor.bar((0, 0), 40, 10, 50, fill=Gradient(["red", "blue"]))
+            editor.blend(other, alpha=0.5)
+
+        self.assertEqual(
+            [(event.kind, event.name) for event in recorder.events],
+            [("editor", "bar"), ("editor", "blend")],
+        )
+        self.assertEqual(editor._revision, revision + 2)
+
+    def test_workspace_and_aio(self):
+        """Tests workspace components and aio instructions are reported"""
+        workspace = Workspace((50, 50))
+        workspace.create_layer("background", background="black")
+        workspace.add_component(
+            layer_name="background",
+            identifier="box",
+            func="rectangle",
+            options={"position": (0, 0), "width": 10, "height": 10},
+        )
+
+        aio = AioEditor(Canvas((20, 20)), executor=ThreadPoolExecutor(1))
+        aio.ellipse((0, 0), 10, 10, fill="blue")
+
+        counters = profiling.Counters()
+        with profiling.profile(counters):
+            workspace.generate_image()
+            asyncio.run(aio.execute())
+
+        self.assertEqual(counters.calls[("workspace", "box:rectangle")], 1)
+        self.assertEqual(counters.calls[("editor", "rectangle")], 1)
+        self.assertEqual(counters.calls[("aio", "ellipse")], 1)
+        self.assertGreater(counters.seconds[("aio", "ellipse")], 0)
+
+        counters.reset()
+        self.assertEqual(counters.calls, {})
+
+        workspace.invalidate()
+        with profiling.profile() as recorder:
+            workspace.generate_image()
+            asyncio.run(aio.execute())
+
+        # Inner steps finish, and are reported, first
+        self.assertEqual(
+            [(event.kind, event.nested) for event in recorder.events],
+            [
+                ("editor", True),
+                ("workspace", False),
+                ("editor", True),
+                ("aio", False),
+            ],
+        )
+        outer = [e.duration for e in recorder.events if e.kind != "editor"]
+        self.assertEqual(recorder.total(), sum(outer))
+        self.assertGreater(recorder.total("editor"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+import dataclasses
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from easy_pil import Font, Gradient, Template, Text, Var, Workspace
+from easy_pil.template import msgpack
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        avatar = Image.new("RGBA", (20, 20), "orange")
+        font = Font.poppins("bold", 14)
+
+        self.workspace = Workspace((120, 80))
+        self.workspace.create_layer("background", background="#23272A")
+        self.workspace.create_layer("content")
+        self.workspace.add_component(
+            layer_name="background",
+            identifier="bar",
+            func="bar",
+            options={
+                "position": (10, 60),
+                "max_width": 100,
+                "height": 10,
+                "percentage": 40,
+                "fill": Gradient(["red", "blue"]),
+                "radius": 5,
+            },
+        )
+        self.workspace.add_component(
+            layer_name="content",
+            identifier="avatar",
+            func="paste",
+            options={"image": avatar, "position": (5, 5)},
+        )
+        self.workspace.add_component(
+            layer_name="content",
+            identifier="name",
+            func="text",
+            options={
+                "position": (30, 5),
+                "text": "Shahriyar",
+                "font": Font(Font.poppins().path, 12),
+                "color": "white",
+            },
+        )
+        self.workspace.add_component(
+            layer_name="content",
+            identifier="level",
+            func="multi_text",
+            options={
+                "position": (30, 40),
+                "texts": [Text("LVL", font, "white"), Text("5", font, "red")],
+            },
+        )
+        self.workspace.add_component(
+            layer_name="content",
+            identifier="tint",
+            func="remap_colors",
+            options={"mapping": {(255, 0, 0): (0, 255, 0)}},
+        )
+
+    def test_compile(self):
+        """Tests compiled templates render like the workspace"""
+        template = self.workspace.compile()
+        expected = self.workspace.generate_image().image.tobytes()
+
+        self.assertEqual(template.render().image.tobytes(), expected)
+
+        self.workspace.update_component(
+            layer_name="content", identifier="name", options={"text": "X"}
+        )
+        self.assertEqual(template.render().image.tobytes(), expected)
+
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            template.size = (10, 10)
+
+        copy = pickle.loads(pickle.dumps(template))
+        self.assertEqual(copy.render().image.tobytes(), expected)
+
+    def test_validation(self):
+        """Tests options are validated when compiling"""
+        invalid = [
+            ("ellipse", {"position": (0, 0), "size": 3}),
+            ("text", {"position": (0, 0), "text": "x", "align": "top"}),
+            ("show", {}),
+            ("missing", {}),
+        ]
+
+        for func, options in invalid:
+            workspace = Workspace((10, 10))
+            workspace.create_layer("layer")
+            workspace.add_component(
+                layer_name="layer", func=func, options=options
+            )
+
+            with self.assertRaises(ValueError):
+                workspace.compile()
+
+    def test_serialize(self):
+        """Tests JSON and msgpack serialization"""
+        template = self.workspace.compile()
+        expected = template.render().image.tobytes()
+
+        loaded = Template.from_json(template.to_json())
+        self.assertEqual(loaded.render().image.tobytes(), expected)
+        self.assertEqual(loaded.to_dict(), template.to_dict())
+        options = template.to_dict()["layers"][1]["components"][1]["options"]
+        self.assertEqual(
+            options["font"]["$font"]["bundled"],
+            "poppins/poppins_regular.ttf",
+        )
+
+        if msgpack is not None:
+            loaded = Template.from_msgpack(template.to_msgpack())
+            self.assertEqual(loaded.render().image.tobytes(), expected)
+
+        with self.assertRaises(ValueError):
+            Template.from_dict({"version": 0})
+
+        workspace = Workspace((10, 10))
+        workspace.create_layer("layer")
+        workspace.add_component(
+            layer_name="layer",
+            func="paste",
+            options={"image": object(), "position": (0, 0)},
+        )
+        with self.assertRaises(TypeError):
+            workspace.compile().to_json()
+
+    def test_variables(self):
+        """Tests placeholders are resolved without changing the template"""
+        self.workspace.update_component(
+            layer_name="content",
+            identifier="name",
+            options={"text": Var("username"), "color": Var("color", "white")},
+        )
+        options = dict(
+            self.workspace.layers["content"]["components"]["name"]["options"]
+        )
+
+        expected = {}
+        for name in ("Alice", "Bob"):
+            workspace = self.workspace.override({"name": {"text": name}})
+            expected[name] = workspace.generate_image().image.tobytes()
+
+        self.assertEqual(
+            self.workspace.generate_image(username="Alice").image.tobytes(),
+            expected["Alice"],
+        )
+        self.assertEqual(
+            self.workspace.render({"username": "Bob"}).image.tobytes(),
+            expected["Bob"],
+        )
+        self.assertEqual(
+            self.workspace.layers["content"]["components"]["name"]["options"],
+            options,
+        )
+        with self.assertRaises(ValueError):
+            self.workspace.generate_image()
+
+        template = Template.from_json(self.workspace.compile().to_json())
+        self.assertEqual(template.variables, ("username", "color"))
+        with self.assertRaises(ValueError):
+            template.render(color="red")
+
+        names = ["Alice", "Bob"] * 16
+        with ThreadPoolExecutor(8) as pool:
+            images = pool.map(
+                lambda name: template.render(username=name).image.tobytes(),
+                names,
+            )
+
+            for name, image in zip(names, images):
+                self.assertEqual(image, expected[name])
+
+    def test_text_variables(self):
+        """Tests placeholders inside Text and Gradient options"""
+        font = Font.poppins("bold", 14)
+        self.workspace.update_component(
+            layer_name="content",
+            identifier="level",
+            options={
+                "texts": [
+                    Text("LVL", font, "white"),
+                    Text(Var("level"), font, Var("color", "red")),
+                ]
+            },
+        )
+        self.workspace.update_component(
+            layer_name="background",
+            identifier="bar",
+            options={"fill": Gradient([Var("start", "red"), "blue"])},
+        )
+
+        expected = self.workspace.override(
+            {
+                "level": {
+                    "texts": [
+                        Text("LVL", font, "white"),
+                        Text("12", font, "red"),
+                    ]
+                },
+                "bar": {"fill": Gradient(["green", "blue"])},
+            }
+        )
+        expected = expected.generate_image().image.tobytes()
+
+        variables = {"level": "12", "start": "green"}
+        self.assertEqual(
+            self.workspace.generate_image(**variables).image.tobytes(),
+            expected,
+        )
+
+        template = Template.from_json(self.workspace.compile().to_json())
+        self.assertEqual(set(template.variables), {"level", "color", "start"})
+        self.assertEqual(
+            template.render(**variables).image.tobytes(), expected
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+
+from PIL import ImageDraw
+
+from easy_pil import Canvas, Editor, Font, Text
+from easy_pil.font import font_registry, fonts_path
+from easy_pil.text_layout import (
+    TextLayoutCache,
+    draw_text,
+    fit_text,
+    text_layout_cache,
+    text_metrics,
+    wrap_text,
+)
+
+
+class TestTextLayout(unittest.TestCase):
+    def setUp(self):
+        self.font = Font.poppins("bold", 24)
+
+    def test_draw_text(self):
+        """Tests cached glyph masks draw the same pixels as ImageDraw"""
+        cache = TextLayoutCache()
+
+        for position in ((10, 10), (60.5, 20.25), (-3.5, 40.75)):
+            for anchor in ("lt", "mm", "rs"):
+                for stroke_width in (0, 2):
+                    expected = Canvas((200, 80), color=(0, 0, 0, 128)).image
+                    ImageDraw.Draw(expected).text(
+                        position,
+                        "Level 12",
+                        "#ff000080",
+                        font=self.font,
+                        anchor=anchor,
+                        stroke_width=stroke_width,
+                        stroke_fill="blue",
+                    )
+
+                    for _ in range(2):
+                        image = Canvas((200, 80), color=(0, 0, 0, 128)).image
+                        draw_text(
+                            ImageDraw.Draw(image),
+                            position,
+                            "Level 12",
+                            "#ff000080",
+                            font=self.font,
+                            anchor=anchor,
+                            stroke_width=stroke_width,
+                            stroke_fill="blue",
+                            cache=cache,
+                        )
+                        self.assertEqual(image.tobytes(), expected.tobytes())
+
+        # One mask per position and anchor, stroked texts and negative
+        # fractional positions are drawn by ImageDraw
+        self.assertEqual((cache.misses, cache.hits), (6, 6))
+        self.assertGreater(cache.nbytes, 0)
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+    def test_metrics(self):
+        """Tests cached text measurements"""
+        cache = TextLayoutCache(maxsize=2)
+        metrics = text_metrics(self.font, "Rank", "ls", cache=cache)
+
+        self.assertEqual(metrics.width, self.font.getlength("Rank"))
+        self.assertEqual(metrics.bbox, self.font.getbbox("Rank", anchor="ls"))
+        self.assertIs(
+            text_metrics(self.font, "Rank", "ls", cache=cache), metrics
+        )
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        text_metrics(self.font, "XP", cache=cache)
+        text_metrics(self.font, "Level", cache=cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_editor(self):
+        """Tests editor text with the layout cache"""
+        texts = [
+            Text("Level", self.font, "red"),
+            Text("12", self.font, "blue"),
+        ]
+
+        for align in ("left", "center", "right"):
+            editor = Editor(Canvas((300, 60)))
+            editor.multi_text((150, 30), texts, align=align)
+            editor.text((150, 0), "XP", self.font, align=align)
+
+            expected = Canvas((300, 60)).image
+            draw = ImageDraw.Draw(expected)
+            width = self.font.getlength("Level") + self.font.getlength("12")
+            x = {"left": 150, "center": int(150 - width / 2)}.get(
+                align, int(150 - width)
+            )
+            draw.text((x, 30), "Level", "red", font=self.font, anchor="lm")
+            x = int(x + self.font.getlength("Level "))
+            draw.text((x, 30), "12", "blue", font=self.font, anchor="lm")
+            draw.text(
+                (150, 0),
+                "XP",
+                "black",
+                font=self.font,
+                anchor={"left": "lt", "center": "mt", "right": "rt"}[align],
+            )
+
+            self.assertEqual(editor.image.tobytes(), expected.tobytes())
+
+    def test_wrap_text(self):
+        """Tests greedy and optimal line breaking"""
+        text = "aaa bb cc ddddd"
+        width = self.font.getlength("aaa bb")
+
+        self.assertEqual(
+            wrap_text(self.font, text, width), ["aaa bb", "cc", "ddddd"]
+        )
+        self.assertEqual(
+            wrap_text(self.font, text, width, "optimal"),
+            ["aaa", "bb cc", "ddddd"],
+        )
+        self.assertEqual(
+            wrap_text(self.font, "a b\nc", 1, "none"), ["a b", "c"]
+        )
+
+        with self.assertRaises(ValueError):
+            wrap_text(self.font, text, width, "balanced")  # type: ignore
+
+    def test_fit_text(self):
+        """Tests fitting texts in boxes"""
+        path = fonts_path["poppins"]["regular"]
+        name = "A rather long display name"
+
+        entries, fonts = len(text_layout_cache), len(font_registry)
+        layout = fit_text(name, path, (300, 40), 8, 64, wrap="none")
+        self.assertEqual(len(text_layout_cache), entries)
+        self.assertLessEqual(len(font_registry), fonts + 1)
+        self.assertIs(layout.font, font_registry.get(path, layout.size))
+        larger = layout.font.font_variant(size=layout.size + 1)
+        self.assertLessEqual(layout.width, 300)
+        self.assertLessEqual(layout.height, 40)
+        self.assertGreater(larger.getlength(name), 300)
+        self.assertEqual(layout.lines, (name,))
+
+        wrapped = fit_text(name, path, (300, 120), 8, 64)
+        self.assertGreater(wrapped.size, layout.size)
+        self.assertGreater(len(wrapped.lines), 1)
+        self.assertFalse(wrapped.truncated)
+
+        cut = fit_text(name, path, (80, 30), 14, 20, max_lines=1)
+        self.assertTrue(cut.truncated)
+        self.assertEqual(cut.size, 14)
+        self.assertEqual(len(cut.lines), 1)
+        self.assertTrue(cut.lines[0].endswith("…"))
+        self.assertLessEqual(cut.width, 80)
+
+        editor = Editor(Canvas((300, 120)))
+        drawn = editor.text_box((0, 0, 300, 120), name, path)
+        self.assertEqual(drawn, wrapped)
+        self.assertLessEqual(editor.image.getbbox()[3], 120)
+
+        again = Editor(Canvas((300, 120)))
+        again.text_box((0, 0, 300, 120), "", path, layout=drawn)
+        self.assertEqual(again.image.tobytes(), editor.image.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import pickle
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from easy_pil import Editor, Workspace
+
+
+class TestWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.workspace = Workspace((100, 100))
+        self.workspace.create_layer("background", background="black")
+        self.workspace.create_layer("content")
+        self.workspace.add_component(
+            layer_name="background",
+            identifier="box",
+            func="rectangle",
+            options={"position": (0, 0), "width": 50, "height": 50},
+        )
+        self.workspace.add_component(
+            layer_name="content",
+            identifier="dot",
+            func="ellipse",
+            options={"position": (60, 60), "width": 20, "height": 20},
+        )
+
+    def test_generate_image(self):
+        """Tests workspace image generation"""
+        editor = self.workspace.generate_image()
+        self.assertIsInstance(editor, Editor)
+        self.assertEqual(editor.image.getpixel((10, 10)), (0, 0, 0, 255))
+        self.assertEqual(editor.image.getpixel((70, 70)), (0, 0, 0, 255))
+
+    def test_layer_cache(self):
+        """Tests only changed layers are rendered again"""
+        self.workspace.generate_image()
+
+        with mock.patch.object(
+            Editor, "rectangle", autospec=True, side_effect=Editor.rectangle
+        ) as rectangle, mock.patch.object(
+            Editor, "ellipse", autospec=True, side_effect=Editor.ellipse
+        ) as ellipse:
+            self.workspace.update_component(
+                layer_name="content",
+                identifier="dot",
+                options={"color": "red"},
+            )
+            editor = self.workspace.generate_image()
+
+            self.assertEqual(rectangle.call_count, 0)
+            self.assertEqual(ellipse.call_count, 1)
+            self.assertEqual(editor.image.getpixel((70, 70)), (255, 0, 0, 255))
+
+            self.workspace.invalidate()
+            self.workspace.generate_image()
+            self.assertEqual(rectangle.call_count, 1)
+
+    def test_layer_cache_updates(self):
+        """Tests layer changes are rendered"""
+        self.workspace.generate_image()
+        self.workspace.update_layer("background", background="blue")
+        self.workspace.remove_component(layer_name="content", identifier="dot")
+        editor = self.workspace.generate_image()
+        self.assertEqual(editor.image.getpixel((70, 70)), (0, 0, 255, 255))
+
+        self.workspace.update_layer("content", new_layer_name="top")
+        self.workspace.remove_layer("background")
+        editor = self.workspace.generate_image()
+        self.assertEqual(editor.image.getpixel((70, 70)), (0, 0, 0, 0))
+
+    def test_without_layer_cache(self):
+        """Tests workspace without cached layers"""
+        workspace = Workspace((100, 100), cache_layers=False)
+        workspace.layers = self.workspace.layers
+
+        self.assertEqual(
+            workspace.generate_image().image.tobytes(),
+            self.workspace.generate_image().image.tobytes(),
+        )
+
+    def test_opaque_layer(self):
+        """Tests layers below an opaque layer are hidden"""
+        self.workspace.create_layer("cover", background="white")
+        self.workspace.create_layer("empty")
+        editor = self.workspace.generate_image()
+        self.assertEqual(editor.image.getcolors(), [(10000, (255,) * 4)])
+
+    def test_records(self):
+        """Tests layers are read-only records replaced on changes"""
+        layers = self.workspace.layers
+        options = {"position": (60, 60), "width": 20, "height": 20}
+
+        self.workspace.update_component(
+            layer_name="content", identifier="dot", options={"color": "red"}
+        )
+        self.assertIsNot(self.workspace.layers, layers)
+        self.assertIs(
+            self.workspace.layers["background"], layers["background"]
+        )
+        self.assertEqual(
+            layers["content"]["components"]["dot"]["options"], options
+        )
+
+        dot = self.workspace.layers["content"]["components"]["dot"]
+        with self.assertRaises(TypeError):
+            dot["options"]["color"] = "blue"
+
+        copy = pickle.loads(pickle.dumps(self.workspace))
+        copy.update_component(
+            layer_name="content", identifier="dot", options={"width": 30}
+        )
+        self.assertEqual(
+            copy.generate_image().image.getpixel((85, 70)),
+            (255, 0, 0, 255),
+        )
+
+    def test_concurrent_rendering(self):
+        """Tests rendering one workspace from many threads while editing"""
+        colors = ["red", "green", "blue"]
+        backgrounds = ["black", "navy"]
+        self.workspace.update_component(
+            layer_name="content", identifier="dot", options={"color": "red"}
+        )
+
+        expected = set()
+        for color in colors:
+            for background in backgrounds:
+                workspace = self.workspace.override({"dot": {"color": color}})
+                workspace.update_layer("background", background=background)
+                expected.add(workspace.generate_image().image.tobytes())
+
+        stop = threading.Event()
+
+        def edit():
+            i = 0
+            while not stop.is_set():
+                i += 1
+                self.workspace.update_component(
+                    layer_name="content",
+                    identifier="dot",
+                    options={"color": colors[i % 3]},
+                )
+                self.workspace.update_layer(
+                    "background", background=backgrounds[i % 2]
+                )
+
+        def render(_):
+            return [
+                self.workspace.generate_image().image.tobytes()
+                for _ in range(8)
+            ]
+
+        editor = threading.Thread(target=edit)
+        editor.start()
+        try:
+            with ThreadPoolExecutor(32) as pool:
+                results = [
+                    image
+                    for images in pool.map(render, range(32))
+                    for image in images
+                ]
+        finally:
+            stop.set()
+            editor.join()
+
+        self.assertEqual(len(results), 256)
+        self.assertLessEqual(set(results), expected)
+        self.assertIn(
+            self.workspace.generate_image().image.tobytes(), expected
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()